@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+import cv2 as cv
+from layout_to_occpmap import convert_layout
+
+# bumped whenever the conversion changes, so compiled layouts are not reused
+COMPILER_VERSION = 1
+INDEX_FILE = 'index.json'
+
+MAP_YAML = 'image: {image}\n' \
+           'resolution: {resolution:f}\n' \
+           'origin: [{origin_x:f}, {origin_y:f}, 0.000000]\n' \
+           'negate: 0\n' \
+           'occupied_thresh: 0.65\n' \
+           'free_thresh: 0.196\n'
+
+def get_content_hash(file_path: str, o_shape: int, resolution: float):
+    """
+    Create the cache key from the layout image content and compile options
+
+    Parameters
+    ----------
+    file_path: str
+        full path to layout image
+    o_shape: int
+        output occupancy map shape
+    resolution: float
+        map resolution (meters per cell)
+
+    Returns
+    -------
+    content_hash: str
+    """
+
+    digest = hashlib.sha1('{0}:{1}:{2}'.format(COMPILER_VERSION, o_shape, resolution).encode())
+    with open(file_path, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+def get_output_paths(output_dir: str, name: str):
+    """
+    Gets the paths of map image and yaml of the layout (<output_dir>/<name>/<name>_layout.*)
+
+    Returns
+    -------
+    paths: tuple
+        (pgm path, yaml path)
+    """
+
+    layout_dir = os.path.join(output_dir, name)
+    return os.path.join(layout_dir, name + '_layout.pgm'), os.path.join(layout_dir, name + '_layout.yaml')
+
+def compile_layout(file_path: str, name: str, output_dir: str, o_shape: int, resolution: float):
+    """
+    Compile the layout image to map image and yaml (as expected by map_server)
+
+    Parameters
+    ----------
+    file_path: str
+        full path to layout image
+    name: str
+        name of the layout
+    output_dir: str
+        directory of compiled layouts
+    o_shape: int
+        output occupancy map shape
+    resolution: float
+        map resolution (meters per cell)
+
+    Returns
+    -------
+    result: dict
+        name, status ('compiled' or 'failed'), error
+    """
+
+    result = {'name': name, 'status': 'failed', 'error': None}
+    try:
+        img = cv.imread(file_path, cv.IMREAD_GRAYSCALE)
+        if img is None:
+            raise IOError('cannot read image {0}'.format(file_path))
+        occupancy_img = convert_layout(img, (o_shape, o_shape))
+
+        pgm_path, yaml_path = get_output_paths(output_dir, name)
+        os.makedirs(os.path.dirname(pgm_path), exist_ok=True)
+        if not cv.imwrite(pgm_path, occupancy_img):
+            raise IOError('cannot write image {0}'.format(pgm_path))
+        # map origin is at the center of the map
+        half_extent = 0.5 * o_shape * resolution
+        with open(yaml_path, 'w') as f:
+            f.write(MAP_YAML.format(image = os.path.basename(pgm_path), resolution = resolution,
+                                    origin_x = -half_extent, origin_y = -half_extent))
+        result['status'] = 'compiled'
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+def is_compiled(output_dir: str, name: str):
+    """
+    Checks whether map image and yaml of the layout exist
+    """
+
+    return all(os.path.isfile(path) for path in get_output_paths(output_dir, name))
+
+def copy_layout(output_dir: str, source_name: str, name: str):
+    """
+    Copy the compiled layout to another name (same content hash)
+    """
+
+    source_pgm, _ = get_output_paths(output_dir, source_name)
+    pgm_path, yaml_path = get_output_paths(output_dir, name)
+    os.makedirs(os.path.dirname(pgm_path), exist_ok=True)
+    shutil.copyfile(source_pgm, pgm_path)
+    with open(get_output_paths(output_dir, source_name)[1], 'r') as f:
+        content = f.read().replace(os.path.basename(source_pgm), os.path.basename(pgm_path))
+    with open(yaml_path, 'w') as f:
+        f.write(content)
+
+def load_index(output_dir: str):
+    """
+    Load the index of compiled layouts
+
+    Returns
+    -------
+    index: dict
+        layouts (name => entry) and stats of the last run
+    """
+
+    try:
+        with open(os.path.join(output_dir, INDEX_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'layouts': {}, 'stats': {}}
+
+def save_index(output_dir: str, index: dict):
+    """
+    Save the index of compiled layouts
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+    file_path = os.path.join(output_dir, INDEX_FILE)
+    # write to temporary file first, concurrent readers never see partial file
+    tmp_path = '{0}.{1}.tmp'.format(file_path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, file_path)
+
+def compile_layouts(input_dir: str, output_dir: str, o_shape: int = 768, resolution: float = 0.05,
+                    num_workers: int = None, pattern: str = '*.png'):
+    """
+    Compile all layout images of the directory (recursively) across a process pool
+
+    Parameters
+    ----------
+    input_dir: str
+        directory of layout images
+    output_dir: str
+        directory of compiled layouts
+    o_shape: int
+        output occupancy map shape
+    resolution: float
+        map resolution (meters per cell)
+    num_workers: int
+        number of worker processes, default is number of cpus
+    pattern: str
+        file name pattern of layout images
+
+    Returns
+    -------
+    stats: dict
+        compiled, skipped, copied, failed counts, elapsed time and throughput
+    """
+
+    start = time.perf_counter()
+    file_paths = sorted(glob.glob(os.path.join(input_dir, '**', pattern), recursive=True))
+    index = load_index(output_dir)
+    layouts = index['layouts']
+    stats = {'inputs': len(file_paths), 'compiled': 0, 'skipped': 0, 'copied': 0, 'failed': 0}
+
+    # content hash => name of an already compiled layout
+    compiled = {entry['hash']: name for name, entry in layouts.items()
+                if is_compiled(output_dir, name)}
+    to_compile = []
+    to_copy = []
+    # name => source path, layouts are named by file name so outputs of
+    # layouts in different subdirectories with the same file name would collide
+    sources = {}
+    for file_path in file_paths:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        if name in sources:
+            stats['failed'] += 1
+            print('failed to compile {0}: duplicate layout name of {1}'.format(file_path, sources[name]))
+            continue
+        sources[name] = file_path
+        content_hash = get_content_hash(file_path, o_shape, resolution)
+        entry = layouts.get(name)
+        if entry is not None and entry['hash'] == content_hash and is_compiled(output_dir, name):
+            stats['skipped'] += 1
+            continue
+        # drop stale entry (outputs are overwritten), it is added back once compiled
+        stale = layouts.pop(name, None)
+        if stale is not None and compiled.get(stale['hash']) == name:
+            del compiled[stale['hash']]
+        if content_hash in compiled:
+            to_copy.append((file_path, name, content_hash))
+        else:
+            compiled[content_hash] = name
+            to_compile.append((file_path, name, content_hash))
+
+    def add_entry(file_path: str, name: str, content_hash: str):
+        pgm_path, yaml_path = get_output_paths(output_dir, name)
+        layouts[name] = {
+            'source': file_path,
+            'hash': content_hash,
+            'image': os.path.relpath(pgm_path, output_dir),
+            'yaml': os.path.relpath(yaml_path, output_dir),
+        }
+
+    if to_compile:
+        num_workers = num_workers or os.cpu_count() or 1
+        # few large chunks keep the inter process overhead low
+        chunksize = max(1, len(to_compile) // (4 * num_workers))
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            results = executor.map(compile_layout, *zip(*[(file_path, name, output_dir, o_shape, resolution)
+                                                          for file_path, name, _ in to_compile]),
+                                   chunksize=chunksize)
+            for (file_path, name, content_hash), result in zip(to_compile, results):
+                if result['status'] == 'failed':
+                    stats['failed'] += 1
+                    compiled.pop(content_hash, None)
+                    print('failed to compile {0}: {1}'.format(file_path, result['error']))
+                    continue
+                stats['compiled'] += 1
+                add_entry(file_path, name, content_hash)
+                # interrupted run keeps the layouts compiled so far
+                save_index(output_dir, index)
+
+    # duplicate content is copied from the compiled layout instead of compiling again
+    for file_path, name, content_hash in to_copy:
+        if content_hash not in compiled:
+            stats['failed'] += 1
+            print('failed to compile {0}: duplicate of failed layout'.format(file_path))
+            continue
+        copy_layout(output_dir, compiled[content_hash], name)
+        stats['copied'] += 1
+        add_entry(file_path, name, content_hash)
+        save_index(output_dir, index)
+
+    elapsed = time.perf_counter() - start
+    stats['elapsed'] = elapsed
+    stats['layouts_per_sec'] = len(file_paths) / elapsed if elapsed > 0 else 0.0
+    stats['compiled_per_sec'] = stats['compiled'] / elapsed if elapsed > 0 else 0.0
+    index['stats'] = stats
+    index['options'] = {'o_shape': o_shape, 'resolution': resolution, 'version': COMPILER_VERSION}
+    save_index(output_dir, index)
+    return stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile directories of HouseExpo indoor layout images to occupancy maps (*.pgm + *.yaml)')
+    parser.add_argument('--input_dir', dest='input_dir', \
+                    required=True, help='directory of layout images (searched recursively)')
+    parser.add_argument('--output_dir', dest='output_dir', \
+                    required=True, help='directory of compiled layouts (<output_dir>/<name>/<name>_layout.*)')
+    parser.add_argument('--o_shape', dest='o_shape', type=int, \
+                    default=768, help='output occupancy map shape')
+    parser.add_argument('--resolution', dest='resolution', type=float, \
+                    default=0.05, help='map resolution (meters per cell)')
+    parser.add_argument('--num_workers', dest='num_workers', type=int, \
+                    default=None, help='number of worker processes (default: number of cpus)')
+    parser.add_argument('--pattern', dest='pattern', \
+                    default='*.png', help='file name pattern of layout images')
+    args = parser.parse_args()
+
+    stats = compile_layouts(args.input_dir, args.output_dir, args.o_shape, args.resolution,
+                            args.num_workers, args.pattern)
+    print('{0:>8} {1:>10} {2:>9} {3:>8} {4:>8} {5:>12} {6:>14}'.format(
+            'inputs', 'compiled', 'skipped', 'copied', 'failed', 'elapsed (s)', 'layouts/sec'))
+    print('{0:>8} {1:>10} {2:>9} {3:>8} {4:>8} {5:>12.2f} {6:>14.2f}'.format(
+            stats['inputs'], stats['compiled'], stats['skipped'], stats['copied'], stats['failed'],
+            stats['elapsed'], stats['layouts_per_sec']))
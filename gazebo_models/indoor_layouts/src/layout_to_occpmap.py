@@ -4,18 +4,27 @@ import argparse
 import numpy as np
 import cv2 as cv
 
-def get_occupany_map(img: np.ndarray, output_path: str, output_size: tuple):
+# occupancy values of map_server trinary mode
+UNKNOWN, FREE, OCCUPIED = 205, 255, 0
+# single pass color remap => 255 (outside layout): unknown, 0 (inside layout): free, 100 (borders): obstacle
+REMAP_LUT = np.arange(256, dtype=np.uint8)
+REMAP_LUT[[255, 0, 100]] = [UNKNOWN, FREE, OCCUPIED]
+
+def convert_layout(img: np.ndarray, output_size: tuple):
     """
-    Convert the HouseExpo indoor layout to occupancy map
+    Convert the HouseExpo indoor layout to occupancy map image
 
     Parameters
     ----------
     img: numpy.ndarray
         input image
-    output_path: str
-        full path (*.pgm) indicating where to store the file
     output_size: tuple
         the output image shape as (rows, cols)
+
+    Returns
+    -------
+    occupancy_img: numpy.ndarray
+        uint8 image with 205: unknown, 255: free, 0: occupied
     """
 
     (rows, cols) = img.shape
@@ -29,18 +38,37 @@ def get_occupany_map(img: np.ndarray, output_path: str, output_size: tuple):
     cv.drawContours(thresh_img, contours, contourIdx=1, color=100, thickness=3)
 
     # switch colors => 205: unknown, 255: free, 0: occupied
-    thresh_img = np.where(thresh_img==255, np.uint8(205), thresh_img) # unknown
-    thresh_img = np.where(thresh_img==0, np.uint8(255), thresh_img) # free
-    thresh_img = np.where(thresh_img==100, np.uint8(0), thresh_img) # obstacle
+    thresh_img = cv.LUT(thresh_img, REMAP_LUT)
 
-    # add padding to borders to make the output have equal width and height
+    # the layout padded to equal width and height is scaled to output size, so only
+    # the layout is resized and the (constant) padding is added at output scale
     padding = max(rows, cols) + 50
-    thresh_img = cv.copyMakeBorder(thresh_img, (padding-rows)//2, (padding-rows)//2, \
-            (padding-cols)//2, (padding-cols)//2, cv.BORDER_CONSTANT, value=205)
-    thresh_img = cv.resize(thresh_img, output_size)
+    out_rows, out_cols = output_size
+    scale_rows, scale_cols = out_rows / (padding - (padding-rows) % 2), out_cols / (padding - (padding-cols) % 2)
+    resized_rows = max(1, min(out_rows, int(round(rows * scale_rows))))
+    resized_cols = max(1, min(out_cols, int(round(cols * scale_cols))))
+    thresh_img = cv.resize(thresh_img, (resized_cols, resized_rows))
+    top = min(out_rows - resized_rows, int(round(((padding-rows)//2) * scale_rows)))
+    left = min(out_cols - resized_cols, int(round(((padding-cols)//2) * scale_cols)))
+    return cv.copyMakeBorder(thresh_img, top, out_rows - resized_rows - top, \
+            left, out_cols - resized_cols - left, cv.BORDER_CONSTANT, value=UNKNOWN)
+
+def get_occupany_map(img: np.ndarray, output_path: str, output_size: tuple):
+    """
+    Convert the HouseExpo indoor layout to occupancy map
+
+    Parameters
+    ----------
+    img: numpy.ndarray
+        input image
+    output_path: str
+        full path (*.pgm) indicating where to store the file
+    output_size: tuple
+        the output image shape as (rows, cols)
+    """
 
     # store the image
-    cv.imwrite(output_path, thresh_img)
+    cv.imwrite(output_path, convert_layout(img, output_size))
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Convert HouseExpo indoor layout images to occupany map')
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros import pojo, distance_field
+from bench_map import SAMPLE_MAP, read_pgm
+
+import argparse
+import tempfile
+import time
+import numpy as np
+
+def make_map(cells):
+    """
+    Create pojo.Map (0.05 m/cell, origin at its center) of the grid cells
+
+    :return pojo.Map
+    """
+    height, width = cells.shape
+    map = pojo.Map()
+    map.set_size(width, height)
+    map.set_cells(np.ascontiguousarray(cells, dtype=np.int8))
+    return map
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure distance field computation, disk cache load and clearance lookups')
+    parser.add_argument('--map_sizes', dest='map_sizes', type=int, nargs='+', \
+                    default=[1024, 2048], help='sizes (in cells) of synthetic square maps')
+    parser.add_argument('--num_lookups', dest='num_lookups', type=int, \
+                    default=100000, help='number of world positions per clearance lookup')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    maps = [('sample', read_pgm(SAMPLE_MAP))]
+    for size in args.map_sizes:
+        # sparse random obstacles within walled square
+        cells = np.where(rng.random((size, size)) < 0.001, 100, 0).astype(np.int8)
+        cells[[0, -1], :] = cells[:, [0, -1]] = 100
+        maps.append(('synthetic', cells))
+
+    print('{0:>10} {1:>11} {2:>14} {3:>14} {4:>20}'.format(
+            'map', 'size', 'compute (ms)', 'disk (ms)', 'lookups/sec'))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        distance_field.set_cache(distance_field.DistanceFieldCache(cache_dir = cache_dir))
+        for name, cells in maps:
+            height, width = cells.shape
+
+            # cold: transform is computed and persisted, warm: loaded from disk
+            start = time.perf_counter()
+            make_map(cells).get_distance_field()
+            compute_time = time.perf_counter() - start
+            map = make_map(cells)
+            start = time.perf_counter()
+            map.get_distance_field()
+            disk_time = time.perf_counter() - start
+
+            half_extent = 0.5 * map.get_scale() * np.array([width, height])
+            xs = rng.uniform(-half_extent[0], half_extent[0], args.num_lookups)
+            ys = rng.uniform(-half_extent[1], half_extent[1], args.num_lookups)
+            start = time.perf_counter()
+            map.get_clearance(xs, ys)
+            lookup_time = time.perf_counter() - start
+
+            print('{0:>10} {1:>11} {2:>14.2f} {3:>14.2f} {4:>20.0f}'.format(
+                    name, '{0}x{1}'.format(width, height), 1000 * compute_time,
+                    1000 * disk_time, args.num_lookups / lookup_time))
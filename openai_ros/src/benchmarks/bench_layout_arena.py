@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros.gazebo_connection import GazeboConnection
+
+import argparse
+import time
+import rospy
+import numpy as np
+from geometry_msgs.msg import Pose
+from gazebo_msgs.msg import ModelState
+
+def teleport(gazebo, model_name: str, x: float, y: float):
+    """
+    Teleport the model to the world position
+    """
+    model_state = ModelState()
+    model_state.model_name = model_name
+    model_state.pose.position.x = x
+    model_state.pose.position.y = y
+    model_state.pose.orientation.w = 1.0
+    gazebo.set_model_state(model_state)
+
+def bench_spawn_delete(layouts: list, switches: int, robot_name: str):
+    """
+    Measure layout switch by deleting the current layout and spawning the next one
+    at the world origin (one layout within the world at a time)
+
+    :return numpy.ndarray (durations in seconds)
+    """
+    gazebo = GazeboConnection(reset_type = 'WORLD', preload_models = layouts)
+    gazebo.unpause_sim()
+    current = None
+    durations = []
+    for idx in range(switches):
+        layout = layouts[idx % len(layouts)]
+        start = time.perf_counter()
+        if current is not None:
+            gazebo.delete_model(current)
+        gazebo.spawn_sdf_model(layout, Pose())
+        teleport(gazebo, robot_name, 0.0, -1.0)
+        durations.append(time.perf_counter() - start)
+        current = layout
+
+    # leave the world empty for the arena
+    for model_name in gazebo.get_spawned_models():
+        gazebo.delete_model(model_name)
+    return np.asarray(durations)
+
+def bench_arena(layouts: list, switches: int, robot_name: str, spacing: float):
+    """
+    Measure layout switch within the arena (all layouts preloaded at their offsets)
+
+    :return float (preload duration in seconds), numpy.ndarray (durations in seconds)
+    """
+    start = time.perf_counter()
+    gazebo = GazeboConnection(reset_type = 'WORLD', layouts = layouts, layout_spacing = spacing)
+    preload_time = time.perf_counter() - start
+    gazebo.unpause_sim()
+    arena = gazebo.get_arena()
+    durations = []
+    for idx in range(switches):
+        layout = layouts[idx % len(layouts)]
+        start = time.perf_counter()
+        arena.activate(layout)
+        offset_x, offset_y = arena.get_offset()
+        teleport(gazebo, robot_name, offset_x, offset_y - 1.0)
+        durations.append(time.perf_counter() - start)
+    arena.close()
+    return preload_time, np.asarray(durations)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure layout switch latency of spawn/delete against the preloaded layout arena, '
+                                                 'world must be already launched (without map_server)')
+    parser.add_argument('--layouts', dest='layouts', type=str, nargs='+', \
+                    default=['sample'], help='layouts (models of indoor_layouts) to switch between')
+    parser.add_argument('--switches', dest='switches', type=int, \
+                    default=10, help='number of layout switches per mode')
+    parser.add_argument('--spacing', dest='spacing', type=float, \
+                    default=100.0, help='distance (in meters) between the layouts of the arena')
+    parser.add_argument('--robot_name', dest='robot_name', type=str, \
+                    default='turtlebot3', help='gazebo model name of the robot')
+    args = parser.parse_args()
+
+    rospy.init_node('bench_layout_arena')
+
+    durations = bench_spawn_delete(args.layouts, args.switches, args.robot_name)
+    preload_time, arena_durations = bench_arena(args.layouts, args.switches, args.robot_name, args.spacing)
+
+    print('{0:>14} {1:>12} {2:>12} {3:>12}'.format('mode', 'mean (ms)', 'p95 (ms)', 'setup (ms)'))
+    print('{0:>14} {1:>12.2f} {2:>12.2f} {3:>12}'.format(
+            'spawn/delete', 1e3 * np.mean(durations), 1e3 * np.percentile(durations, 95), '-'))
+    print('{0:>14} {1:>12.2f} {2:>12.2f} {3:>12.2f}'.format(
+            'arena', 1e3 * np.mean(arena_durations), 1e3 * np.percentile(arena_durations, 95),
+            1e3 * preload_time))
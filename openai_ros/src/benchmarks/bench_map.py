@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros import pojo, msg_decoder
+
+import argparse
+import struct
+import timeit
+import tracemalloc
+import numpy as np
+
+SAMPLE_MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                    '../../../gazebo_models/indoor_layouts/map/sample/sample_layout.pgm')
+
+def read_pgm(file_path: str):
+    """
+    Read binary (P5) pgm image and convert it to occupancy values as map_server does
+        (trinary mode, occupied_thresh: 0.65, free_thresh: 0.196)
+
+    :return numpy.ndarray (int8)
+    """
+
+    with open(file_path, 'rb') as f:
+        tokens = []
+        while len(tokens) < 4:
+            line = f.readline()
+            if not line.startswith(b'#'):
+                tokens.extend(line.split())
+        width, height = int(tokens[1]), int(tokens[2])
+        pixels = np.frombuffer(f.read(width * height), dtype=np.uint8).reshape(height, width)
+
+    occupancy = (255 - pixels.astype(float)) / 255.0
+    cells = np.full(pixels.shape, -1, dtype=np.int8)
+    cells[occupancy > 0.65] = 100
+    cells[occupancy < 0.196] = 0
+    # map_server stores the image rows bottom up
+    return np.flipud(cells)
+
+def serialize_occupancy_grid(cells):
+    """
+    Serialize int8 cells as nav_msgs/OccupancyGrid message
+
+    :return bytes
+    """
+
+    height, width = cells.shape
+    frame_id = b'map'
+    buff = struct.pack('<3II', 0, 0, 0, len(frame_id)) + frame_id
+    buff += struct.pack('<2IfII', 0, 0, 0.05, width, height)
+    buff += np.array([-10.0, -10.0, 0.0, 0.0, 0.0, 0.0, 1.0]).tobytes()
+    buff += struct.pack('<I', cells.size) + cells.tobytes()
+    return buff
+
+def legacy_ingest(buff, width: int, height: int):
+    """
+    genpy int8[] deserialization into tuple followed by np.array() as previously
+    used in pojo.Map.set_cells()
+    """
+
+    _, info, cells = msg_decoder.decode_occupancy_grid(buff)
+    data = struct.unpack('<%sb' % cells.size, cells.tobytes())
+    return np.array(data).reshape(height, width)
+
+def zero_copy_ingest(buff, width: int, height: int):
+    """
+    Ingest serialized map into pojo.Map without copying grid cells
+    """
+
+    _, info, cells = msg_decoder.decode_occupancy_grid(buff)
+    map = pojo.Map()
+    map.set_size(width, height)
+    map.set_cells(cells)
+    return map.get_cells()
+
+def measure_memory(ingest, buff, width: int, height: int):
+    """
+    Measure the memory held by the ingested grid and the peak during ingestion
+
+    :return int, int (bytes)
+    """
+
+    tracemalloc.start()
+    grid = ingest(buff, width, height)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del grid
+    return current, peak
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare map ingestion into numpy.ndarray against zero-copy pojo.Map')
+    parser.add_argument('--repeat', dest='repeat', type=int, \
+                    default=5, help='number of ingestions per measurement')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    maps = [('sample', read_pgm(SAMPLE_MAP)),
+            ('synthetic', rng.choice(np.array([-1, 0, 100], dtype=np.int8), size=(2048, 2048)))]
+
+    print('{0:>10} {1:>11} {2:>9} {3:>12} {4:>12} {5:>12}'.format(
+            'map', 'size', 'ingest', 'time (ms)', 'held (MB)', 'peak (MB)'))
+    for name, cells in maps:
+        height, width = cells.shape
+        buff = serialize_occupancy_grid(cells)
+        for ingest_name, ingest in [('legacy', legacy_ingest), ('zero-copy', zero_copy_ingest)]:
+            elapsed = min(timeit.repeat(lambda: ingest(buff, width, height), number=1, repeat=args.repeat))
+            current, peak = measure_memory(ingest, buff, width, height)
+            print('{0:>10} {1:>11} {2:>9} {3:>12.3f} {4:>12.2f} {5:>12.2f}'.format(
+                    name, '{0}x{1}'.format(width, height), ingest_name, 1000 * elapsed, current / 2**20, peak / 2**20))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros import pojo, msg_decoder
+
+import argparse
+import timeit
+import numpy as np
+from io import BytesIO
+from geometry_msgs.msg import PoseArray, Pose
+from tf.transformations import quaternion_from_euler
+
+def legacy_decode(buff):
+    """
+    genpy deserialization followed by per particle pojo.Pose construction as
+    previously used in TurtleBot3LocalizeEnv.__process_particle_msg()
+    """
+
+    msg = PoseArray().deserialize(buff)
+    poses = []
+    for pose_msg in msg.poses:
+        pose = pojo.Pose()
+        pose.set_position(pose_msg.position.x, pose_msg.position.y, pose_msg.position.z)
+        pose.set_quaternion(pose_msg.orientation.x, pose_msg.orientation.y,
+                            pose_msg.orientation.z, pose_msg.orientation.w)
+        x, y, _ = pose.get_position()
+        _, _, yaw = pose.get_euler()
+        poses.append([x, y, yaw])
+    return np.asarray(poses).astype(np.float32)
+
+def random_particle_cloud(num_particles: int, rng):
+    """
+    Serialize a random particle cloud
+
+    :return bytes
+    """
+
+    msg = PoseArray()
+    msg.header.frame_id = 'map'
+    for x, y, yaw in zip(rng.uniform(-10, 10, num_particles),
+                         rng.uniform(-10, 10, num_particles),
+                         rng.uniform(-np.pi, np.pi, num_particles)):
+        pose = Pose()
+        pose.position.x = x
+        pose.position.y = y
+        pose.orientation.x, pose.orientation.y, pose.orientation.z, pose.orientation.w = \
+                quaternion_from_euler(0.0, 0.0, yaw)
+        msg.poses.append(pose)
+
+    buff = BytesIO()
+    msg.serialize(buff)
+    return buff.getvalue()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare particle cloud decoding against msg_decoder')
+    parser.add_argument('--repeat', dest='repeat', type=int, \
+                    default=10, help='number of messages decoded per measurement')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    out = np.zeros((20000, 3), dtype=np.float32)
+
+    print('{0:>9} {1:>14} {2:>14} {3:>9}'.format('particles', 'legacy (ms)', 'decoder (ms)', 'speedup'))
+    for num_particles in [1000, 5000, 10000, 20000]:
+        buff = random_particle_cloud(num_particles, rng)
+
+        _, particles = msg_decoder.decode_particle_cloud(buff, out)
+        assert np.allclose(particles, legacy_decode(buff), atol=1e-5)
+
+        legacy_time = timeit.timeit(lambda: legacy_decode(buff), number=args.repeat)
+        decoder_time = timeit.timeit(lambda: msg_decoder.decode_particle_cloud(buff, out), number=args.repeat)
+        print('{0:>9} {1:>14.3f} {2:>14.3f} {3:>8.1f}x'.format(num_particles,
+                1000 * legacy_time / args.repeat, 1000 * decoder_time / args.repeat, legacy_time / decoder_time))
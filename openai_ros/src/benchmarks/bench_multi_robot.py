@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import argparse
+import rospy
+
+def bench_shared(num_agents: int, steps: int):
+    """
+    Measure per agent throughput of K namespaced robots within one gazebo world,
+    world with robots tb3_0 ... tb3_{K-1} (and their amcl) must be already launched
+
+    :return float (agent steps/sec per agent)
+    """
+    from openai_ros.multi_robot_env import MultiRobotEnv
+
+    env = MultiRobotEnv(['tb3_{0}'.format(idx) for idx in range(num_agents)])
+    try:
+        env.reset()
+        for _ in range(steps):
+            env.step([env.action_space.sample() for _ in range(num_agents)])
+        stats = env.get_stats()
+    finally:
+        # also shuts down the ros node, so one measurement per launched world
+        env.close()
+    return stats['agent_steps_per_sec'] / num_agents
+
+def bench_separate(num_agents: int, steps: int):
+    """
+    Measure per agent throughput of K robots each within its own simulator
+
+    :return float (agent steps/sec per agent)
+    """
+    from openai_ros.vec_env import VecEnv
+
+    env = VecEnv(num_agents)
+    try:
+        env.reset()
+        for _ in range(steps):
+            env.step(env.action_space.sample())
+        stats = env.get_stats()
+    finally:
+        env.close()
+    return stats['steps_per_sec'] / num_agents
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare per agent throughput of K robots in one world against K separate simulators')
+    parser.add_argument('--mode', dest='mode', type=str, choices=['shared', 'separate'], \
+                    default='shared', help='shared: one world (must be launched), separate: one simulator per robot')
+    parser.add_argument('--num_agents', dest='num_agents', type=int, nargs='+', \
+                    default=None, help='number of robots per measurement (default: 1 2 4 8), single one in shared mode')
+    parser.add_argument('--steps', dest='steps', type=int, \
+                    default=100, help='number of batched steps per measurement')
+    args = parser.parse_args()
+
+    if args.mode == 'shared':
+        if args.num_agents is None or len(args.num_agents) != 1:
+            parser.error('shared mode measures the launched world, give a single --num_agents')
+        # plots must not block env.close()
+        os.environ['MPLBACKEND'] = 'Agg'
+        rospy.init_node('bench_multi_robot')
+    elif args.num_agents is None:
+        args.num_agents = [1, 2, 4, 8]
+
+    print('{0:>10} {1:>8} {2:>24}'.format('mode', 'agents', 'steps/sec per agent'))
+    for num_agents in args.num_agents:
+        if args.mode == 'shared':
+            throughput = bench_shared(num_agents, args.steps)
+        else:
+            throughput = bench_separate(num_agents, args.steps)
+        print('{0:>10} {1:>8} {2:>24.2f}'.format(args.mode, num_agents, throughput))
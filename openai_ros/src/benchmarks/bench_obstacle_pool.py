@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros import pojo
+from openai_ros.gazebo_connection import GazeboConnection
+from openai_ros.kinematic_sim import DEFAULT_MAP_FILE, load_map
+from openai_ros.model_cache import get_package_path
+from openai_ros.obstacle_pool import ObstaclePool, OBSTACLE_SDF, sample_free_positions
+
+import argparse
+import time
+import rospy
+import numpy as np
+from geometry_msgs.msg import Pose
+
+def make_map(map_file: str):
+    """
+    Create pojo.Map (origin at its center) of the map yaml file
+
+    :return pojo.Map
+    """
+    map_data = load_map(map_file)
+    height, width = map_data['cells'].shape
+    resolution = map_data['resolution']
+    center = pojo.Pose()
+    center.set_position(map_data['origin'][0] + (width / 2) * resolution,
+                        map_data['origin'][1] + (height / 2) * resolution, 0.0)
+    map = pojo.Map()
+    map.set_scale(resolution)
+    map.set_size(width, height)
+    map.set_origin(center)
+    map.set_cells(map_data['cells'])
+    return map
+
+def bench_spawn_delete(gazebo, map, num_obstacles: int, episodes: int, seed: int):
+    """
+    Measure per episode randomization by deleting last episode obstacles and spawning
+    new ones at free positions (sampled the same way as the pool)
+
+    :return numpy.ndarray (durations in seconds)
+    """
+    rng = np.random.default_rng(seed)
+    geometry = '<box><size>0.3 0.3 0.5</size></box>'
+    radii = np.full(num_obstacles, 0.3 * np.sqrt(0.5))
+    durations = []
+    for _ in range(episodes):
+        start = time.perf_counter()
+        for model_name in [name for name in gazebo.get_spawned_models() if name.startswith('churn_')]:
+            gazebo.delete_model(model_name)
+        for idx, (x, y) in enumerate(sample_free_positions(map, radii, rng)):
+            if np.isnan(x):
+                continue
+            pose = Pose()
+            pose.position.x, pose.position.y = x, y
+            pose.orientation.w = 1.0
+            model_name = 'churn_{0}'.format(idx)
+            gazebo.spawn_sdf_model(model_name, pose, model_xml = OBSTACLE_SDF.format(
+                                    name = model_name, half_height = 0.25, geometry = geometry))
+        durations.append(time.perf_counter() - start)
+
+    for model_name in [name for name in gazebo.get_spawned_models() if name.startswith('churn_')]:
+        gazebo.delete_model(model_name)
+    return np.asarray(durations)
+
+def bench_pool(gazebo, map, num_obstacles: int, episodes: int, seed: int):
+    """
+    Measure per episode randomization of the obstacle pool
+
+    :return float (spawn duration in seconds), numpy.ndarray (durations in seconds)
+    """
+    start = time.perf_counter()
+    pool = ObstaclePool(gazebo, num_obstacles = num_obstacles, seed = seed)
+    spawn_time = time.perf_counter() - start
+    durations = np.asarray([pool.randomize(map)['duration'] for _ in range(episodes)])
+
+    for model_name in pool.get_model_names():
+        gazebo.delete_model(model_name)
+    return spawn_time, durations
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure per episode obstacle randomization with spawn/delete '
+                                                 'against the obstacle pool, world must be already launched')
+    parser.add_argument('--num_obstacles', dest='num_obstacles', type=int, nargs='+', \
+                    default=[4, 8, 16], help='number of obstacles per measurement')
+    parser.add_argument('--episodes', dest='episodes', type=int, \
+                    default=10, help='number of randomized episodes per measurement')
+    parser.add_argument('--map_file', dest='map_file', type=str, \
+                    default=None, help='map yaml file of the launched layout (default: sample layout)')
+    parser.add_argument('--seed', dest='seed', type=int, \
+                    default=0, help='random seed')
+    args = parser.parse_args()
+
+    rospy.init_node('bench_obstacle_pool')
+    map_file = args.map_file
+    if map_file is None:
+        package, relative_path = DEFAULT_MAP_FILE
+        map_file = os.path.join(get_package_path(package), relative_path)
+    map = make_map(map_file)
+    gazebo = GazeboConnection(reset_type = 'WORLD')
+    gazebo.unpause_sim()
+
+    print('{0:>10} {1:>14} {2:>12} {3:>12} {4:>12}'.format(
+            'obstacles', 'mode', 'mean (ms)', 'p95 (ms)', 'setup (ms)'))
+    for num_obstacles in args.num_obstacles:
+        durations = bench_spawn_delete(gazebo, map, num_obstacles, args.episodes, args.seed)
+        print('{0:>10} {1:>14} {2:>12.2f} {3:>12.2f} {4:>12}'.format(
+                num_obstacles, 'spawn/delete', 1e3 * np.mean(durations),
+                1e3 * np.percentile(durations, 95), '-'))
+        spawn_time, durations = bench_pool(gazebo, map, num_obstacles, args.episodes, args.seed)
+        print('{0:>10} {1:>14} {2:>12.2f} {3:>12.2f} {4:>12.2f}'.format(
+                num_obstacles, 'pool', 1e3 * np.mean(durations),
+                1e3 * np.percentile(durations, 95), 1e3 * spawn_time))
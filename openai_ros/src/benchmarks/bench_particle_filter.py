@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros.particle_filter import ParticleFilter
+
+import argparse
+import time
+import numpy as np
+
+def bench_filter(num_particles: int, steps: int, map_file: str, seed: int):
+    """
+    Measure update latency and accuracy of the in-process particle filter with
+    fixed number of particles on the kinematic simulation (global localization)
+
+    :return dict
+    """
+    from openai_ros.kinematic_sim import KinematicSim
+
+    sim = KinematicSim(map_file = map_file, num_particles = 0, seed = seed)
+    model_name = 'turtlebot3'
+    robot = sim.get_robot(model_name)
+    particle_filter = ParticleFilter(sim.get_map(), min_particles = num_particles,
+                                     max_particles = num_particles, seed = seed)
+    particle_filter.global_localization()
+
+    durations = []
+    errors = []
+    for step in range(steps):
+        # alternate between driving forward and turning
+        if (step // 20) % 2 == 0:
+            robot.cmd_linear_vel, robot.cmd_angular_vel = 0.2, 0.0
+        else:
+            robot.cmd_linear_vel, robot.cmd_angular_vel = 0.05, 0.8
+        sim.step(100)
+
+        pose = sim.get_model_pose(model_name)
+        start = time.perf_counter()
+        is_updated = particle_filter.update(pose, sim.raycast(*pose))
+        if is_updated:
+            durations.append(time.perf_counter() - start)
+            mean, _ = particle_filter.get_estimate()
+            errors.append(np.hypot(*(mean[0:2] - pose[0:2])))
+    sim.close()
+
+    errors = np.asarray(errors)
+    converged = np.nonzero(errors < 0.2)[0]
+    return {
+        'updates': len(durations),
+        'mean_ms': 1e3 * np.mean(durations),
+        'p95_ms': 1e3 * np.percentile(durations, 95),
+        'final_error': errors[-1],
+        'converged_update': converged[0] + 1 if converged.shape[0] > 0 else -1,
+    }
+
+def bench_env(localizer: str, num_particles: int, steps: int):
+    """
+    Measure step throughput and localization error of TurtleBot3LocalizeEnv,
+    world (and amcl for 'AMCL' localizer) must be already launched
+
+    :return dict
+    """
+    from openai_ros.task_envs.turtlebot3.turtlebot3_localize import TurtleBot3LocalizeEnv
+
+    env = TurtleBot3LocalizeEnv(profile = True, localizer = localizer)
+    env.reset()
+    if localizer == 'PARTICLE_FILTER':
+        # fixed number of particles to match amcl launched with min_particles = max_particles
+        env._particle_filter = ParticleFilter(env._map_data, min_particles = num_particles,
+                                              max_particles = num_particles)
+        env.reset()
+
+    errors = []
+    start = time.perf_counter()
+    for _ in range(steps):
+        _, _, done, info = env.step(env.action_space.sample())
+        errors.append(env._amcl_pose.get_estimate_error())
+        if done:
+            env.reset()
+    elapsed = time.perf_counter() - start
+    summary = env.profiler.get_summary()
+    env._sensor_hub.close()
+
+    return {
+        'steps_per_sec': steps / elapsed,
+        'check_all_systems_ms': 1e3 * summary.get(('step', 'check_all_systems'), {}).get('mean_wall', np.nan),
+        'mean_error': np.mean(errors),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the in-process particle filter against amcl')
+    parser.add_argument('--mode', dest='mode', type=str, choices=['filter', 'env'], \
+                    default='filter', help='filter: particle filter on kinematic simulation, '
+                                           'env: environment step with amcl and particle filter (world must be launched)')
+    parser.add_argument('--num_particles', dest='num_particles', type=int, nargs='+', \
+                    default=[1000, 5000, 10000, 20000], help='number of particles per measurement')
+    parser.add_argument('--steps', dest='steps', type=int, \
+                    default=200, help='number of steps per measurement')
+    parser.add_argument('--map_file', dest='map_file', type=str, \
+                    default=None, help='map yaml file (filter mode, default: sample layout)')
+    parser.add_argument('--seed', dest='seed', type=int, \
+                    default=0, help='random seed (filter mode)')
+    args = parser.parse_args()
+
+    if args.mode == 'filter':
+        print('{0:>10} {1:>8} {2:>12} {3:>12} {4:>14} {5:>12}'.format(
+                'particles', 'updates', 'mean (ms)', 'p95 (ms)', 'final err (m)', 'converged'))
+        for num_particles in args.num_particles:
+            result = bench_filter(num_particles, args.steps, args.map_file, args.seed)
+            print('{0:>10} {1:>8} {2:>12.2f} {3:>12.2f} {4:>14.3f} {5:>12}'.format(
+                    num_particles, result['updates'], result['mean_ms'], result['p95_ms'],
+                    result['final_error'], result['converged_update']))
+    else:
+        import rospy
+        rospy.init_node('bench_particle_filter')
+
+        # amcl particles are set in its launch file, relaunch amcl with
+        # min_particles = max_particles = N before measuring N
+        print('{0:>16} {1:>10} {2:>12} {3:>22} {4:>16}'.format(
+                'localizer', 'particles', 'steps/sec', 'check_all_systems (ms)', 'mean sqr error'))
+        for num_particles in args.num_particles:
+            for localizer in ['AMCL', 'PARTICLE_FILTER']:
+                result = bench_env(localizer, num_particles, args.steps)
+                print('{0:>16} {1:>10} {2:>12.2f} {3:>22.2f} {4:>16.3f}'.format(
+                        localizer, num_particles, result['steps_per_sec'],
+                        result['check_all_systems_ms'], result['mean_error']))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros import pojo
+
+import argparse
+import timeit
+import tracemalloc
+import numpy as np
+from tf.transformations import euler_from_quaternion, quaternion_from_euler
+
+class LegacyPose():
+    """
+        Eager pose implementation as previously used in pojo.Pose
+    """
+
+    def __init__(self):
+        self.__position = np.zeros(3, dtype=float)
+        self.__euler = np.zeros(3)
+        self.__quaternion = np.zeros(4)
+        self.__covariance = np.zeros((6, 6))
+        self.__entropy = 0.0
+        self.__error = 0.0
+        self._frame_id = 'world'
+
+    def set_position(self, x: float, y: float, z:float):
+        self.__position[0] = x
+        self.__position[1] = y
+        self.__position[2] = z
+
+    def get_position(self):
+        return self.__position
+
+    def set_quaternion(self, x: float, y: float, z: float, w: float):
+        self.__quaternion[0] = x
+        self.__quaternion[1] = y
+        self.__quaternion[2] = z
+        self.__quaternion[3] = w
+        roll, pitch, yaw = euler_from_quaternion([x, y, z, w])
+        self.__euler[0] = roll
+        self.__euler[1] = pitch
+        self.__euler[2] = yaw
+
+    def set_covariance(self, covariance):
+        self.__covariance = np.array(covariance).reshape((6, 6))
+        cov = np.array([
+            [self.__covariance[0,0], self.__covariance[0,1], self.__covariance[0,5]],
+            [self.__covariance[1,0], self.__covariance[1,1], self.__covariance[1,5]],
+            [self.__covariance[5,0], self.__covariance[5,2], self.__covariance[5,5]]
+        ])
+        self.__entropy = 0.5 * np.log(np.linalg.det(2 * np.pi * np.e * cov))
+
+def create_poses(pose_class, num_poses: int, quaternion, covariance):
+    """
+    Create poses the way the environment does per step (position, orientation and covariance)
+
+    :return list
+    """
+
+    poses = []
+    for _ in range(num_poses):
+        pose = pose_class()
+        pose.set_position(1.0, 2.0, 0.0)
+        pose.set_quaternion(*quaternion)
+        pose.set_covariance(covariance)
+        poses.append(pose)
+    return poses
+
+def measure_allocation(pose_class, num_poses: int, quaternion, covariance):
+    """
+    Measure the memory held by num_poses poses
+
+    :return int (bytes)
+    """
+
+    tracemalloc.start()
+    poses = create_poses(pose_class, num_poses, quaternion, covariance)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del poses
+    return current
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare eager pose against slotted lazy pojo.Pose')
+    parser.add_argument('--num_poses', dest='num_poses', type=int, \
+                    default=10000, help='number of poses created per measurement')
+    parser.add_argument('--repeat', dest='repeat', type=int, \
+                    default=5, help='number of measurements')
+    args = parser.parse_args()
+
+    quaternion = quaternion_from_euler(0.0, 0.0, 0.7)
+    covariance = tuple(np.diag([0.25, 0.25, 0.0, 0.0, 0.0, 0.07]).flatten())
+
+    print('{0:>8} {1:>16} {2:>16}'.format('pose', 'time/pose (us)', 'bytes/pose'))
+    for name, pose_class in [('legacy', LegacyPose), ('slotted', pojo.Pose)]:
+        elapsed = min(timeit.repeat(lambda: create_poses(pose_class, args.num_poses, quaternion, covariance),
+                                    number=1, repeat=args.repeat))
+        allocated = measure_allocation(pose_class, args.num_poses, quaternion, covariance)
+        print('{0:>8} {1:>16.2f} {2:>16.1f}'.format(name, 1e6 * elapsed / args.num_poses,
+                                                   allocated / args.num_poses))
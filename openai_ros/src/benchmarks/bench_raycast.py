@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros import pojo
+from openai_ros.kinematic_sim import DEFAULT_MAP_FILE, load_map
+from openai_ros.raycast import Raycaster
+
+import argparse
+import time
+import numpy as np
+
+def make_map(cells, resolution: float):
+    """
+    Create pojo.Map (origin at its center) of the grid cells
+
+    :param numpy.ndarray cells: int8 (height, width) occupancy values
+           float resolution: map resolution (in meters/cell)
+    :return pojo.Map
+    """
+    height, width = cells.shape
+    center = pojo.Pose()
+    center.set_position(0.0, 0.0, 0.0)
+    grid_map = pojo.Map()
+    grid_map.set_scale(resolution)
+    grid_map.set_size(width, height)
+    grid_map.set_origin(center)
+    grid_map.set_cells(np.ascontiguousarray(cells, dtype=np.int8))
+    return grid_map
+
+def make_synthetic_cells(size: int, num_obstacles: int, seed: int):
+    """
+    Create square grid with border walls and random rectangular obstacles
+
+    :return numpy.ndarray (int8 (size, size) occupancy values)
+    """
+    rng = np.random.default_rng(seed)
+    cells = np.zeros((size, size), dtype=np.int8)
+    cells[[0, -1], :] = 100
+    cells[:, [0, -1]] = 100
+    for _ in range(num_obstacles):
+        row, col = rng.integers(0, size, 2)
+        height, width = rng.integers(2, max(3, size // 32), 2)
+        cells[row:row + height, col:col + width] = 100
+    return cells
+
+def bench(raycaster, grid_map, batch_size: int, repeats: int, seed: int):
+    """
+    Measure raycast throughput for batches of random poses within the map
+
+    :return float (rays/sec)
+    """
+    rng = np.random.default_rng(seed)
+    width, height = grid_map.get_size()
+    half_extent = 0.5 * grid_map.get_scale() * np.array([width, height])
+    poses = np.column_stack([rng.uniform(-half_extent[0], half_extent[0], batch_size),
+                             rng.uniform(-half_extent[1], half_extent[1], batch_size),
+                             rng.uniform(-np.pi, np.pi, batch_size)])
+
+    # warm up
+    raycaster.cast(poses)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        raycaster.cast(poses)
+    elapsed = time.perf_counter() - start
+    return repeats * batch_size * raycaster.get_beam_angles().shape[0] / elapsed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure batched laser raycast throughput across map and batch sizes')
+    parser.add_argument('--map_file', dest='map_file', type=str, \
+                    default=None, help='map yaml file saved by map_server (default: sample layout)')
+    parser.add_argument('--map_sizes', dest='map_sizes', type=int, nargs='+', \
+                    default=[1024, 2048], help='sizes (in cells) of synthetic square maps')
+    parser.add_argument('--batch_sizes', dest='batch_sizes', type=int, nargs='+', \
+                    default=[1, 100, 1000, 5000], help='number of poses per cast')
+    parser.add_argument('--num_beams', dest='num_beams', type=int, \
+                    default=360, help='number of beams per scan')
+    parser.add_argument('--repeats', dest='repeats', type=int, \
+                    default=5, help='number of casts per measurement')
+    args = parser.parse_args()
+
+    if args.map_file is None:
+        import rospkg
+        package, relative_path = DEFAULT_MAP_FILE
+        args.map_file = os.path.join(rospkg.RosPack().get_path(package), relative_path)
+
+    maps = []
+    map_data = load_map(args.map_file)
+    maps.append((os.path.basename(args.map_file), make_map(map_data['cells'], map_data['resolution'])))
+    for size in args.map_sizes:
+        cells = make_synthetic_cells(size, num_obstacles = size // 4, seed = size)
+        maps.append(('synthetic {0}x{0}'.format(size), make_map(cells, 0.05)))
+
+    print('{0:>20} {1:>12} {2:>8} {3:>12} {4:>16}'.format(
+            'map', 'cells', 'batch', 'skip field', 'rays/sec'))
+    for name, grid_map in maps:
+        width, height = grid_map.get_size()
+        for use_skip_field in [False, True]:
+            start = time.perf_counter()
+            raycaster = Raycaster(grid_map, num_beams = args.num_beams, use_skip_field = use_skip_field)
+            build_time = time.perf_counter() - start
+            for batch_size in args.batch_sizes:
+                rays_per_sec = bench(raycaster, grid_map, batch_size, args.repeats, seed = batch_size)
+                print('{0:>20} {1:>12} {2:>8} {3:>12} {4:>16.0f}'.format(
+                        name, '{0}x{1}'.format(width, height), batch_size,
+                        '{0:.3f}s'.format(build_time) if use_skip_field else 'off', rays_per_sec))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros.scan_processor import ScanProcessor
+
+import argparse
+import timeit
+import numpy as np
+
+def legacy_process(ranges, angle_min, angle_increment, gt_x, gt_y, gt_a, scale,
+                   sector_angle, sector_laser_scan, max_laser_value, min_laser_value):
+    """
+    Per beam python loop as previously used in TurtleBot3LocalizeEnv.__process_laser_msg()
+    """
+
+    scan_ranges = []
+    scan_points = []
+    sector_laser_scan[:, ...].fill(np.inf)
+    for idx in range(len(ranges)):
+        lrange = ranges[idx]
+        if np.isinf(lrange):
+            scan_ranges.append(max_laser_value)
+            continue
+        elif np.isnan(lrange):
+            scan_ranges.append(min_laser_value)
+            continue
+        else:
+            scan_ranges.append(lrange)
+
+        langle = gt_a + angle_min + ( idx * angle_increment )
+        x = gt_x + lrange * np.cos(langle) / scale
+        y = gt_y + lrange * np.sin(langle) / scale
+        scan_points.append([x, y])
+
+        collision_idx = idx//sector_angle
+        if lrange < sector_laser_scan[collision_idx][0]:
+            sector_laser_scan[collision_idx][0] = lrange
+            sector_laser_scan[collision_idx][1] = langle
+    return np.asarray(scan_points), scan_ranges
+
+def random_scan(num_beams: int, rng):
+    """
+    Generate laser scan ranges with some inf and nan beams
+
+    :return tuple
+    """
+    ranges = rng.uniform(0.12, 3.5, num_beams)
+    ranges[rng.random(num_beams) < 0.2] = np.inf
+    ranges[rng.random(num_beams) < 0.02] = np.nan
+    return tuple(ranges.tolist())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare laser scan processing loop against ScanProcessor')
+    parser.add_argument('--repeat', dest='repeat', type=int, \
+                    default=200, help='number of scans processed per measurement')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    sector_angle = 15
+    scale = 0.05
+    gt_x, gt_y, gt_a = 12.0, -4.0, 0.7
+
+    print('{0:>6} {1:>14} {2:>14} {3:>9}'.format('beams', 'loop (ms)', 'numpy (ms)', 'speedup'))
+    for num_beams in [360, 720, 1080]:
+        ranges = random_scan(num_beams, rng)
+        angle_increment = 2 * np.pi / num_beams
+        # legacy loop assumes one beam per degree, scale the sector width so both agree
+        beams_per_sector = sector_angle * num_beams // 360
+
+        processor = ScanProcessor(sector_angle, 6, 0)
+        points = processor.process(ranges, 0.0, angle_increment, gt_x, gt_y, gt_a, scale)
+        legacy_sectors = np.zeros((360//sector_angle, 2))
+        legacy_points, legacy_ranges = legacy_process(ranges, 0.0, angle_increment, gt_x, gt_y, gt_a, scale,
+                                        beams_per_sector, legacy_sectors, 6, 0)
+        assert np.allclose(points, legacy_points)
+        assert np.allclose(processor.get_scan_ranges(), legacy_ranges)
+        assert np.allclose(processor.get_sector_laser_scan(), legacy_sectors)
+
+        loop_time = timeit.timeit(lambda: legacy_process(ranges, 0.0, angle_increment, gt_x, gt_y, gt_a, scale,
+                                        beams_per_sector, legacy_sectors, 6, 0), number=args.repeat)
+        numpy_time = timeit.timeit(lambda: processor.process(ranges, 0.0, angle_increment,
+                                        gt_x, gt_y, gt_a, scale), number=args.repeat)
+        print('{0:>6} {1:>14.3f} {2:>14.3f} {3:>8.1f}x'.format(num_beams,
+                1000 * loop_time / args.repeat, 1000 * numpy_time / args.repeat, loop_time / numpy_time))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros import utils
+from openai_ros.sensor_hub import SensorHub
+
+import rospy
+import argparse
+import time
+import threading
+import numpy as np
+from sensor_msgs.msg import LaserScan
+
+def publish_scans(topic_name: str, rate: float, num_beams: int):
+    """
+    Publish fake laser scans at the given rate until ros is shutdown
+    """
+
+    publisher = rospy.Publisher(topic_name, LaserScan, queue_size=1)
+    scan = LaserScan()
+    scan.header.frame_id = 'base_scan'
+    scan.angle_min = 0.0
+    scan.angle_increment = 2 * np.pi / num_beams
+    scan.angle_max = scan.angle_increment * (num_beams - 1)
+    scan.range_min = 0.12
+    scan.range_max = 3.5
+    scan.ranges = [1.0] * num_beams
+
+    period = 1.0 / rate
+    while not rospy.is_shutdown():
+        scan.header.stamp = rospy.get_rostime()
+        publisher.publish(scan)
+        time.sleep(period)
+
+def measure(receive, steps: int):
+    """
+    Measure per step latency of receiving the next laser scan
+
+    :return numpy.ndarray (milliseconds)
+    """
+
+    latencies = np.zeros(steps)
+    for idx in range(steps):
+        start = time.perf_counter()
+        receive()
+        latencies[idx] = 1000 * (time.perf_counter() - start)
+    return latencies
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare per step sensor latency of receive_topic_msg against SensorHub')
+    parser.add_argument('--steps', dest='steps', type=int, \
+                    default=200, help='number of steps per measurement')
+    parser.add_argument('--rate', dest='rate', type=float, \
+                    default=5.0, help='laser scan publish rate (Hz)')
+    parser.add_argument('--beams', dest='beams', type=int, \
+                    default=360, help='number of beams per laser scan')
+    args = parser.parse_args()
+
+    rospy.init_node('bench_sensor_hub', anonymous=True)
+    topic_name = '/bench_scan'
+    publisher = threading.Thread(target=publish_scans, args=(topic_name, args.rate, args.beams))
+    publisher.daemon = True
+    publisher.start()
+
+    hub = SensorHub()
+    hub.register(topic_name, LaserScan)
+    seqs = {'last': 0}
+    def receive_from_hub():
+        # same as TurtleBot3Env._wait_for_sensor_msg()
+        _, seqs['last'] = hub.wait_for_message(topic_name, seqs['last'])
+
+    def receive_latest_from_hub():
+        # latest message without waiting for a newer one
+        hub.get_latest(topic_name)
+
+    receivers = [
+        ('receive_topic_msg', lambda: utils.receive_topic_msg(topic_name, LaserScan)),
+        ('hub (next msg)', receive_from_hub),
+        ('hub (latest)', receive_latest_from_hub),
+    ]
+
+    # wait for first scan
+    hub.wait_for_message(topic_name)
+
+    print('{0:>18} {1:>10} {2:>10} {3:>10} {4:>10}'.format(
+            'receiver', 'mean (ms)', 'p50 (ms)', 'p95 (ms)', 'max (ms)'))
+    for name, receive in receivers:
+        latencies = measure(receive, args.steps)
+        print('{0:>18} {1:>10.3f} {2:>10.3f} {3:>10.3f} {4:>10.3f}'.format(
+                name, latencies.mean(), np.percentile(latencies, 50),
+                np.percentile(latencies, 95), latencies.max()))
+
+    hub.close()
+    rospy.signal_shutdown('benchmark done')
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros.model_cache import UrdfCache, get_package_path
+
+import argparse
+import tempfile
+import time
+import numpy as np
+
+def expand_legacy(xacro_file: str):
+    """
+    Expand the xacro file the way spawn_urdf_model() did before caching
+
+    :return str
+    """
+    p = os.popen('rosrun xacro xacro ' + xacro_file)
+    model_xml = p.read().replace('\n', '')
+    p.close()
+    return model_xml
+
+def measure(fn, repeats: int):
+    """
+    Measure latency of the function call
+
+    :return numpy.ndarray (durations in seconds)
+    """
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return np.asarray(durations)
+
+def bench_respawn(model_name: str, repeats: int, use_legacy: bool):
+    """
+    Measure delete + spawn latency of the robot model, world must be already launched
+
+    :return numpy.ndarray (durations in seconds)
+    """
+    from openai_ros.gazebo_connection import GazeboConnection
+    from geometry_msgs.msg import Pose
+
+    gazebo = GazeboConnection(reset_type = 'WORLD', preload_models = [])
+    if use_legacy:
+        # every respawn pays for the xacro expansion
+        gazebo._urdf_cache = UrdfCache(cache_dir = None, revalidate_interval = 0.0)
+        gazebo._urdf_cache.get_urdf = lambda xacro_file, mappings = None: expand_legacy(xacro_file)
+
+    def respawn():
+        gazebo.delete_model(model_name)
+        gazebo.spawn_urdf_model(model_name, Pose())
+    return measure(respawn, repeats)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure xacro expansion and robot respawn latency with and without urdf cache')
+    parser.add_argument('--model_name', dest='model_name', type=str, \
+                    default='turtlebot3', help='model name (turtlebot3_description/urdf/<model_name>_waffle.urdf.xacro)')
+    parser.add_argument('--repeats', dest='repeats', type=int, \
+                    default=10, help='number of measurements per mode')
+    parser.add_argument('--respawn', dest='respawn', action='store_true', \
+                    help='also measure delete + spawn in gazebo (world must be launched)')
+    args = parser.parse_args()
+
+    xacro_file = os.path.join(get_package_path('turtlebot3_description'), 'urdf',
+                              args.model_name + '_waffle.urdf.xacro')
+
+    print('{0:>22} {1:>12} {2:>12}'.format('mode', 'mean (ms)', 'p95 (ms)'))
+    def report(mode, durations):
+        print('{0:>22} {1:>12.3f} {2:>12.3f}'.format(
+                mode, 1e3 * np.mean(durations), 1e3 * np.percentile(durations, 95)))
+
+    report('rosrun xacro', measure(lambda: expand_legacy(xacro_file), args.repeats))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # cold: expanded in-process (new cache every call), disk: new process with persisted urdf
+        report('in-process expand', measure(lambda: UrdfCache(cache_dir = None).get_urdf(xacro_file), args.repeats))
+        UrdfCache(cache_dir = cache_dir).get_urdf(xacro_file)
+        report('disk hit', measure(lambda: UrdfCache(cache_dir = cache_dir).get_urdf(xacro_file), args.repeats))
+        cache = UrdfCache(cache_dir = cache_dir, revalidate_interval = 0.0)
+        cache.get_urdf(xacro_file)
+        report('memory hit (validated)', measure(lambda: cache.get_urdf(xacro_file), args.repeats))
+
+    if args.respawn:
+        import rospy
+        rospy.init_node('bench_urdf_cache')
+        report('respawn (rosrun xacro)', bench_respawn(args.model_name, args.repeats, True))
+        report('respawn (cached)', bench_respawn(args.model_name, args.repeats, False))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros.vec_env import VecEnv
+
+import argparse
+import time
+import numpy as np
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure aggregate steps/sec of VecEnv for increasing number of workers')
+    parser.add_argument('--num_envs', dest='num_envs', type=int, nargs='+', \
+                    default=[1, 2, 4, 8], help='number of workers per measurement')
+    parser.add_argument('--steps', dest='steps', type=int, \
+                    default=100, help='number of batched steps per measurement')
+    parser.add_argument('--env_id', dest='env_id', type=str, \
+                    default='TurtleBot3Localize-v0', help='registered gym environment id')
+    args = parser.parse_args()
+
+    print('{0:>8} {1:>12} {2:>14} {3:>10}'.format('workers', 'startup (s)', 'steps/sec', 'restarts'))
+    for num_envs in args.num_envs:
+        start_time = time.monotonic()
+        env = VecEnv(num_envs, env_id = args.env_id)
+        startup = time.monotonic() - start_time
+
+        env.reset()
+        for _ in range(args.steps):
+            env.step(env.action_space.sample())
+        stats = env.get_stats()
+        env.close()
+
+        print('{0:>8} {1:>12.1f} {2:>14.2f} {3:>10}'.format(
+                num_envs, startup, stats['steps_per_sec'], int(np.sum(stats['restarts']))))
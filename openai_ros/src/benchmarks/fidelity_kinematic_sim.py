@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from openai_ros import msg_decoder
+from openai_ros.kinematic_sim import KinematicSim
+
+import argparse
+import time
+import numpy as np
+
+def read_gazebo_run(bag_file: str, model_name: str, robot_ns: str = ''):
+    """
+    Read the gazebo run recorded with:
+        rosbag record /cmd_vel /scan /gazebo/model_states
+
+    :param str bag_file: path of the bag file
+           str model_name: gazebo model name of the robot
+           str robot_ns: namespace of the robot topics
+    :return dict with keys: cmds ((N, 3) [t, linear, angular]), poses ((M, 4) [t, x, y, yaw]),
+            scans (list of (t, numpy.ndarray ranges))
+    """
+    import rosbag
+
+    prefix = '/' + robot_ns.strip('/') if robot_ns.strip('/') else ''
+    cmd_topic, scan_topic = prefix + '/cmd_vel', prefix + '/scan'
+    cmds, poses, scans = [], [], []
+    with rosbag.Bag(bag_file) as bag:
+        for topic, msg, stamp in bag.read_messages(topics=[cmd_topic, scan_topic, '/gazebo/model_states']):
+            if topic == cmd_topic:
+                cmds.append((stamp.to_sec(), msg.linear.x, msg.angular.z))
+            elif topic == scan_topic:
+                scans.append((msg.header.stamp.to_sec(), np.asarray(msg.ranges, dtype=np.float32)))
+            elif model_name in msg.name:
+                pose = msg.pose[msg.name.index(model_name)]
+                quaternion = np.array([pose.orientation.x, pose.orientation.y,
+                                       pose.orientation.z, pose.orientation.w])
+                poses.append((stamp.to_sec(), pose.position.x, pose.position.y,
+                              msg_decoder.quaternion_to_yaw(quaternion)))
+
+    return {
+        'cmds': np.array(cmds, dtype=np.float64).reshape(-1, 3),
+        'poses': np.array(poses, dtype=np.float64).reshape(-1, 4),
+        'scans': scans,
+    }
+
+def replay(run: dict, map_file: str, odom_rate: float, model_name: str):
+    """
+    Replay the recorded velocity commands in the kinematic simulation, starting at the
+    first recorded ground truth pose
+
+    :return numpy.ndarray ((M, 3) simulated [x, y, yaw] at recorded pose times), float (wall time)
+    """
+
+    sim = KinematicSim(map_file = map_file, odom_rate = odom_rate, scan_noise = 0.0, seed = 0)
+    robot = sim.get_robot(model_name)
+    time_step = sim.get_time_step()
+    poses, cmds = run['poses'], run['cmds']
+
+    start_time = poses[0, 0]
+    sim.set_model_pose(model_name, *poses[0, 1:])
+    # events: (time, 0 => pose sample, 1 => velocity command, index)
+    events = sorted([(t, 0, idx) for idx, t in enumerate(poses[:, 0])] +
+                    [(t, 1, idx) for idx, t in enumerate(cmds[:, 0]) if t >= start_time])
+
+    sim_poses = np.zeros((poses.shape[0], 3), dtype=np.float64)
+    elapsed = 0
+    wall_start = time.perf_counter()
+    for t, kind, idx in events:
+        iterations = int(round((t - start_time) / time_step)) - elapsed
+        if iterations > 0:
+            sim.step(iterations)
+            elapsed += iterations
+        if kind == 0:
+            sim_poses[idx] = sim.get_model_pose(model_name)
+        else:
+            robot.cmd_linear_vel, robot.cmd_angular_vel = cmds[idx, 1:]
+    wall_time = time.perf_counter() - wall_start
+    sim.close()
+
+    return sim_poses, wall_time
+
+def scan_errors(run: dict, map_file: str, model_name: str):
+    """
+    Compare the recorded laser scans against the kinematic raycast from the
+    recorded ground truth pose (closest in time)
+
+    :return float (mean absolute range error of beams finite in both), float (hit/miss agreement)
+    """
+
+    sim = KinematicSim(map_file = map_file, scan_noise = 0.0, seed = 0)
+    poses = run['poses']
+    abs_errors = []
+    agreements = []
+    for t, ranges in run['scans']:
+        idx = min(np.searchsorted(poses[:, 0], t), poses.shape[0] - 1)
+        sim_ranges = sim.raycast(*poses[idx, 1:])
+        if sim_ranges.shape != ranges.shape:
+            continue
+        is_hit, is_sim_hit = np.isfinite(ranges), np.isfinite(sim_ranges)
+        both = is_hit & is_sim_hit
+        if np.any(both):
+            abs_errors.append(np.mean(np.abs(ranges[both] - sim_ranges[both])))
+        agreements.append(np.mean(is_hit == is_sim_hit))
+    sim.close()
+
+    if not agreements:
+        return np.nan, np.nan
+    return float(np.mean(abs_errors)) if abs_errors else np.nan, float(np.mean(agreements))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare fidelity and speed of the kinematic simulation against recorded gazebo runs')
+    parser.add_argument('bag_files', type=str, nargs='+', \
+                    help='gazebo runs recorded with: rosbag record /cmd_vel /scan /gazebo/model_states')
+    parser.add_argument('--map_file', dest='map_file', type=str, \
+                    default=None, help='map yaml file of the recorded world (default: sample layout)')
+    parser.add_argument('--model_name', dest='model_name', type=str, \
+                    default='turtlebot3', help='gazebo model name of the robot')
+    parser.add_argument('--odom_rates', dest='odom_rates', type=float, nargs='+', \
+                    default=[5.0, 10.0, 30.0, 100.0], help='integration rates (Hz) to trade fidelity for speed')
+    args = parser.parse_args()
+
+    print('{0:>24} {1:>10} {2:>14} {3:>14} {4:>14} {5:>14}'.format(
+            'run', 'odom (Hz)', 'pos rmse (m)', 'yaw rmse (rad)', 'final err (m)', 'real-time x'))
+    for bag_file in args.bag_files:
+        run = read_gazebo_run(bag_file, args.model_name)
+        if run['poses'].shape[0] < 2:
+            print('{0:>24} no ground truth poses of {1}'.format(os.path.basename(bag_file), args.model_name))
+            continue
+        duration = run['poses'][-1, 0] - run['poses'][0, 0]
+        for odom_rate in args.odom_rates:
+            sim_poses, wall_time = replay(run, args.map_file, odom_rate, args.model_name)
+            position_errors = np.hypot(*(sim_poses[:, 0:2] - run['poses'][:, 1:3]).T)
+            yaw_errors = np.mod(sim_poses[:, 2] - run['poses'][:, 3] + np.pi, 2 * np.pi) - np.pi
+            print('{0:>24} {1:>10.1f} {2:>14.4f} {3:>14.4f} {4:>14.4f} {5:>14.1f}'.format(
+                    os.path.basename(bag_file), odom_rate,
+                    np.sqrt(np.mean(position_errors ** 2)), np.sqrt(np.mean(yaw_errors ** 2)),
+                    position_errors[-1], duration / max(wall_time, 1e-9)))
+
+        range_error, agreement = scan_errors(run, args.map_file, args.model_name)
+        print('{0:>24} scan: mean abs range error {1:.4f} m, hit/miss agreement {2:.3f}'.format(
+                os.path.basename(bag_file), range_error, agreement))
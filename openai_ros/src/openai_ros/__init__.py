@@ -1,3 +1,7 @@
+# generated services (openai_ros.srv) are installed into the catkin devel space
+from pkgutil import extend_path
+__path__ = extend_path(__path__, __name__)
+
 from gym.envs.registration import register
 
 register(
@@ -9,3 +13,8 @@ register(
         id='TurtleBot3Localize-v0',
         entry_point='openai_ros.task_envs.turtlebot3.turtlebot3_localize:TurtleBot3LocalizeEnv'
 )
+
+register(
+        id='TurtleBot3LocalizeKinematic-v0',
+        entry_point='openai_ros.kinematic_sim:make_localize_env'
+)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+import rospy
+import hashlib
+import os
+import tempfile
+import threading
+import numpy as np
+
+# persisted distance fields: <cache dir>/<content hash>.npy
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('ROS_HOME', os.path.join(os.path.expanduser('~'), '.ros')),
+                                 'openai_ros', 'distance_fields')
+
+def distance_transform(occupied, max_distance: int = None):
+    """
+    Compute the euclidean distance (in cells, between cell centers) from every cell
+    to the nearest occupied cell
+
+    Exact two pass transform: distance along each row first, then the lower envelope
+    of parabolas along each column (Felzenszwalb and Huttenlocher), the columns are
+    processed together (vectorized) while the rows are swept
+
+    :param numpy.ndarray occupied: (height, width) bool mask of occupied cells
+           int max_distance: cap of the distance, farther cells get max_distance
+                 (None => uncapped, inf if map has no occupied cell)
+    :return numpy.ndarray (float32 (height, width) distances)
+    """
+
+    occupied = np.asarray(occupied, dtype=bool)
+    height, width = occupied.shape
+    cols = np.arange(width, dtype=np.float64)
+    # squared distance along each row to the nearest occupied cell on either side,
+    # rows without occupied cell get a large finite value (keeps the envelope finite)
+    before = np.maximum.accumulate(np.where(occupied, cols, -np.inf), axis=1)
+    after = np.minimum.accumulate(np.where(occupied, cols, np.inf)[:, ::-1], axis=1)[:, ::-1]
+    no_obstacle = 4.0 * float(height + width) ** 2
+    row_sqr = np.minimum(np.minimum(cols - before, after - cols) ** 2, no_obstacle)
+
+    sqr = _lower_envelope(row_sqr)
+    distance = np.sqrt(sqr)
+    distance[sqr >= no_obstacle] = np.inf
+    if max_distance is not None:
+        np.minimum(distance, float(max_distance), out=distance)
+    return distance.astype(np.float32)
+
+def _lower_envelope(f):
+    """
+    Compute min over p of f[p, col] + (q - p)^2 for every row q and column col
+
+    :param numpy.ndarray f: (height, width) finite float64 values
+    :return numpy.ndarray (float64 (height, width))
+    """
+
+    height, width = f.shape
+    cols = np.arange(width)
+    # per column: rows of the parabolas of the envelope and boundaries between them
+    parabolas = np.zeros((height, width), dtype=np.intp)
+    boundaries = np.empty((height + 1, width), dtype=np.float64)
+    boundaries[0] = -np.inf
+    boundaries[1] = np.inf
+    last = np.zeros(width, dtype=np.intp)
+    for q in range(1, height):
+        f_q = f[q] + q * q
+        while True:
+            p = parabolas[last, cols]
+            # intersection of parabola of row q with the last parabola of the envelope
+            intersection = (f_q - (f[p, cols] + p * p)) / (2.0 * (q - p))
+            is_hidden = intersection <= boundaries[last, cols]
+            if not np.any(is_hidden):
+                break
+            last[is_hidden] -= 1
+        last += 1
+        parabolas[last, cols] = q
+        boundaries[last, cols] = intersection
+        boundaries[last + 1, cols] = np.inf
+
+    result = np.empty((height, width), dtype=np.float64)
+    current = np.zeros(width, dtype=np.intp)
+    for q in range(height):
+        while True:
+            is_passed = boundaries[current + 1, cols] < q
+            if not np.any(is_passed):
+                break
+            current[is_passed] += 1
+        p = parabolas[current, cols]
+        result[q] = (q - p) ** 2 + f[p, cols]
+    return result
+
+class DistanceFieldCache():
+    """
+        DistanceFieldCache class is an implementation to persist the distance
+        fields of maps on disk keyed by the content hash of the occupied cells,
+        so the transform is computed once per map across processes and runs
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        """
+        Initialize DistanceFieldCache class
+
+        :param str cache_dir: directory of persisted distance fields (None => memory only)
+        """
+        super(DistanceFieldCache, self).__init__()
+
+        self.__lock = threading.Lock()
+        self.__cache_dir = cache_dir
+        self.__hits = 0
+        self.__misses = 0
+
+    @staticmethod
+    def content_hash(occupied):
+        """
+        Create the cache key from the occupied cells
+
+        :param numpy.ndarray occupied: (height, width) bool mask of occupied cells
+        :return str
+        """
+        digest = hashlib.sha1('{0}x{1}'.format(*occupied.shape).encode())
+        digest.update(np.packbits(occupied).tobytes())
+        return digest.hexdigest()
+
+    def get(self, occupied):
+        """
+        Gets the distance field (in cells) of the occupied cells, loaded from disk
+        if already computed otherwise computed and persisted
+
+        :param numpy.ndarray occupied: (height, width) bool mask of occupied cells
+        :return numpy.ndarray (float32 (height, width) distances)
+        """
+        content_hash = self.content_hash(occupied)
+        file_path = None
+        if self.__cache_dir is not None:
+            file_path = os.path.join(self.__cache_dir, content_hash + '.npy')
+            try:
+                distance = np.load(file_path)
+                if distance.shape == occupied.shape:
+                    with self.__lock:
+                        self.__hits += 1
+                    return distance
+            except (OSError, ValueError):
+                pass
+
+        with self.__lock:
+            self.__misses += 1
+        distance = distance_transform(occupied)
+        if file_path is not None:
+            tmp_path = None
+            try:
+                os.makedirs(self.__cache_dir, exist_ok=True)
+                # write to unique temporary file first, concurrent writers (processes
+                # or threads) never clobber each other and readers never see partial file
+                fd, tmp_path = tempfile.mkstemp(dir=self.__cache_dir, prefix='.' + content_hash, suffix='.npy')
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, distance)
+                os.replace(tmp_path, file_path)
+            except OSError as e:
+                rospy.logwarn('cannot persist distance field {0}: {1}'.format(file_path, e))
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        return distance
+
+    def get_stats(self):
+        """
+        Gets the disk cache hit/miss statistics
+
+        :return dict
+        """
+        with self.__lock:
+            return {'hits': self.__hits, 'misses': self.__misses, 'cache_dir': self.__cache_dir}
+
+# cache used by pojo.Map
+_cache = DistanceFieldCache()
+
+def set_cache(cache):
+    """
+    Sets the cache used by pojo.Map.get_distance_field()
+
+    :param DistanceFieldCache cache: cache (DistanceFieldCache(cache_dir = None) disables persisting)
+    """
+    global _cache
+    _cache = cache
+
+def get_cache():
+    """
+    Gets the cache used by pojo.Map.get_distance_field()
+
+    :return DistanceFieldCache
+    """
+    return _cache
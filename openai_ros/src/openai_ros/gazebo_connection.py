@@ -15,17 +15,22 @@ from std_srvs.srv import Empty
 from gazebo_msgs.msg import ModelState, ModelStates
 from gazebo_msgs.srv import *
 from geometry_msgs.msg import Pose
+from openai_ros.srv import StepWorld, StepWorldRequest
 import rospkg
 from openai_ros import pojo, utils
+from openai_ros.model_cache import ModelDescriptionCache, UrdfCache, get_package_path
+from openai_ros.layout_arena import LayoutArena
 import time
 import os
+import threading
 
 class GazeboConnection():
     """
         GazeboConnection class handles all the interactions with the gazebo api
     """
 
-    def __init__(self, reset_type: str):
+    def __init__(self, reset_type: str, init_models: list = None, preload_models: list = None,
+                 layouts: list = None, layout_spacing: float = 100.0, robot_namespaces: list = None):
         """
         Initialize GazeboConnection class
 
@@ -34,9 +39,39 @@ class GazeboConnection():
         reset_type: str
             This paremeter is used within the reset_sim()
             Possible values are: ['SIMULATION', 'WORLD']
+        init_models: list
+            Models which are never removed by clear_all_spawned_models(),
+            default is ['ground_plane', 'turtlebot3']
+        preload_models: list
+            Models (of indoor_layouts) whose descriptions are cached at construction,
+            default is ['sample']
+        layouts: list
+            Layouts (of indoor_layouts) spawned once at their offsets within the world,
+            switched through get_arena().activate() instead of spawn/delete,
+            default is None (no arena)
+        layout_spacing: float
+            Distance (in meters) between the offsets of adjacent layouts
+        robot_namespaces: list
+            Namespace of each robot the map of the active layout is published to,
+            default is ['']
 
         """
 
+        # preprocessed model descriptions, spawning does not touch the filesystem
+        if preload_models is None:
+            preload_models = ['sample']
+        if layouts is not None:
+            preload_models = list(preload_models) + [layout for layout in layouts
+                                                     if layout not in preload_models]
+        self._model_cache = ModelDescriptionCache(preload = preload_models)
+        # expanded xacro files (in memory and on disk), respawning does not run xacro
+        self._urdf_cache = UrdfCache()
+
+        # persistent service proxies reused by all gazebo service calls
+        self._service_pool = utils.ServiceProxyPool()
+        self.__is_paused = False
+        self.__time_step = None
+
         # HACK: unpause the simulation
         self.unpause_sim()
 
@@ -45,12 +80,29 @@ class GazeboConnection():
         self.reset_sim()
 
         # assuming by default we have ground_plane
-        self.__init_models = ['ground_plane', 'turtlebot3']
+        if init_models is None:
+            init_models = ['ground_plane', 'turtlebot3']
+        self.__init_models = list(init_models)
+        # tracked models are updated from robot environment threads (MultiRobotEnv)
+        self.__models_lock = threading.Lock()
+        # model name => start position (x, y) claimed by the robot for the episode
+        self.__claims_lock = threading.Lock()
+        self.__claimed_positions = {}
+        # models managed elsewhere (eg. pooled obstacles), never deleted or teleported by reset
+        self.__unmanaged_models = set()
         self.__current_models = []
         data = self.get_all_model_states()
         if data is not None:
             self.__current_models.extend(data.name)
 
+        # all layouts are spawned once, layout switch only teleports the robot
+        self._arena = None
+        if layouts is not None:
+            self._arena = LayoutArena(layouts, spacing = layout_spacing, robot_namespaces = robot_namespaces)
+            for layout, pose in self._arena.get_world_models().items():
+                if layout not in self.__current_models:
+                    self.spawn_sdf_model(layout, pose)
+
         # HACK: pause the simulation
         self.pause_sim()
 
@@ -75,7 +127,7 @@ class GazeboConnection():
         else:
             # do nothing
             return
-        utils.call_service(service_name, service_class)
+        utils.call_service(service_name, service_class, pool = self._service_pool)
 
 
     def pause_sim(self):
@@ -86,7 +138,9 @@ class GazeboConnection():
 
         service_name = '/gazebo/pause_physics'
         service_class = Empty
-        utils.call_service(service_name, service_class)
+        _, is_successful = utils.call_service(service_name, service_class, pool = self._service_pool)
+        if is_successful:
+            self.__is_paused = True
 
 
     def unpause_sim(self):
@@ -97,10 +151,65 @@ class GazeboConnection():
 
         service_name = '/gazebo/unpause_physics'
         service_class = Empty
-        utils.call_service(service_name, service_class)
+        _, is_successful = utils.call_service(service_name, service_class, pool = self._service_pool)
+        if is_successful:
+            self.__is_paused = False
+
+    def is_paused(self):
+        """
+        Whether the physics updates of gazebo are paused (as last requested through this connection)
+
+        :return bool
+        """
+        return self.__is_paused
+
+    def get_physics_time_step(self):
+        """
+        Gets the simulation time (in seconds) advanced by one physics iteration,
+        value is queried once through service call and cached
+
+        :return float or None if physics properties are not available
+        """
 
+        if self.__time_step is None:
+            service_name = '/gazebo/get_physics_properties'
+            service_class = GetPhysicsProperties
+            response, is_successful = utils.call_service(service_name, service_class, pool = self._service_pool)
+            if is_successful:
+                self.__time_step = response.time_step
+        return self.__time_step
 
-    def spawn_sdf_model(self, model_name: str, initial_pose, robot_namespace: str = '', reference_frame: int = 'world'):
+    def step_sim(self, iterations: int, cmd_vel = None, cmd_vel_topic: str = ''):
+        """
+        Advance the paused world by exact number of physics iterations through
+        world control service call, the world remains paused afterwards
+
+        :param int iterations: number of physics iterations
+               geometry_msgs.msg._Twist.Twist cmd_vel: velocity command delivered by the
+                    world control before the world is advanced (part of the same request)
+               str cmd_vel_topic: resolved velocity command topic of the robot
+        :return bool (whether the world is advanced)
+        """
+
+        service_name = '/gazebo/step_world'
+        service_class = StepWorld
+        service_req = StepWorldRequest()
+        service_req.iterations = iterations
+        if cmd_vel is not None:
+            service_req.cmd_vel_topic = cmd_vel_topic
+            service_req.cmd_vel = cmd_vel
+
+        response, is_successful = utils.call_service(service_name, service_class, service_req, pool = self._service_pool)
+        if is_successful and response.success:
+            self.__is_paused = True
+            return True
+        if response is not None:
+            rospy.logwarn(response.status_message)
+        return False
+
+
+    def spawn_sdf_model(self, model_name: str, initial_pose, robot_namespace: str = '', reference_frame: int = 'world',
+                        model_xml: str = None):
         """
         Spawns a model (*.sdf) to gazebo through service call
 
@@ -109,16 +218,18 @@ class GazeboConnection():
                str robot_namespace: spawn model under this namespace
                str reference_frame: initial_pose is defined relative to the frame of this model,
                     default is gazebo world frame
+               str model_xml: sdf description of the model, default is the cached
+                    description of the model (of indoor_layouts)
         """
 
-        if model_name in self.__current_models :
+        with self.__models_lock:
+            is_spawned = model_name in self.__current_models
+        if is_spawned:
             rospy.logwarn('model: %s already exists in gazebo so will be respawned', model_name)
             self.delete_model(model_name)
 
-        model_path = rospkg.RosPack().get_path('indoor_layouts') + '/models/'
-        file_xml = open(model_path + model_name + '/model.sdf')
-        # this should be an urdf or gazebo xml
-        model_xml = file_xml.read().replace('\n', '')
+        if model_xml is None:
+            model_xml = self._model_cache.get_sdf(model_name)
 
         service_name = '/gazebo/spawn_sdf_model'
         service_class = SpawnModel
@@ -129,10 +240,12 @@ class GazeboConnection():
         service_req.robot_namespace = robot_namespace
         service_req.reference_frame = reference_frame
 
-        response, is_successful = utils.call_service(service_name, service_class, service_req)
+        response, is_successful = utils.call_service(service_name, service_class, service_req, pool = self._service_pool)
         if is_successful and response.success:
             # add model from tracking list
-            self.__current_models.append(model_name)
+            with self.__models_lock:
+                if model_name not in self.__current_models:
+                    self.__current_models.append(model_name)
         else:
             rospy.logwarn(response.status_message)
 
@@ -147,11 +260,10 @@ class GazeboConnection():
                     default is gazebo world frame
         """
 
-        model_path = rospkg.RosPack().get_path('turtlebot3_description') + '/urdf/'
-        p = os.popen("rosrun xacro xacro " + model_path + model_name + '_waffle.urdf.xacro')
+        xacro_file = os.path.join(get_package_path('turtlebot3_description'), 'urdf',
+                                  model_name + '_waffle.urdf.xacro')
         # this should be an urdf or gazebo xml
-        model_xml = p.read().replace('\n', '')
-        p.close()
+        model_xml = self._urdf_cache.get_urdf(xacro_file)
 
         service_name = '/gazebo/spawn_urdf_model'
         service_class = SpawnModel
@@ -162,10 +274,12 @@ class GazeboConnection():
         service_req.robot_namespace = robot_namespace
         service_req.reference_frame = reference_frame
 
-        response, is_successful = utils.call_service(service_name, service_class, service_req)
+        response, is_successful = utils.call_service(service_name, service_class, service_req, pool = self._service_pool)
         if is_successful and response.success:
             # add model from tracking list
-            self.__current_models.append(model_name)
+            with self.__models_lock:
+                if model_name not in self.__current_models:
+                    self.__current_models.append(model_name)
         else:
             rospy.logwarn(response.status_message)
 
@@ -181,14 +295,21 @@ class GazeboConnection():
         service_req = DeleteModelRequest()
         service_req.model_name = model_name
 
-        response, is_successful = utils.call_service(service_name, service_class, service_req)
+        response, is_successful = utils.call_service(service_name, service_class, service_req, pool = self._service_pool)
         if is_successful and response.success:
             # remove model from tracking list
-            if model_name in self.__current_models:
-                self.__current_models.remove(model_name)
+            with self.__models_lock:
+                if model_name in self.__current_models:
+                    self.__current_models.remove(model_name)
         else:
-            rospy.logwarn(response.status_message)
-        time.sleep(0.2) # wait for some time
+            # model is not being removed, nothing to wait for
+            rospy.logwarn(response.status_message if response is not None else
+                          'call to the service {0} failed'.format(service_name))
+            return
+
+        # wait until the model is removed from gazebo
+        utils.wait_for_condition(lambda: not self.model_exists(model_name),
+                                 time_out = 2.0, name = 'delete_model')
 
     def set_model_state(self, model_state):
         """
@@ -202,7 +323,7 @@ class GazeboConnection():
         service_req = SetModelStateRequest()
         service_req.model_state = model_state
 
-        response, is_successful = utils.call_service(service_name, service_class, service_req)
+        response, is_successful = utils.call_service(service_name, service_class, service_req, pool = self._service_pool)
         if is_successful and response.success:
             pass # do nothing
         else:
@@ -224,18 +345,125 @@ class GazeboConnection():
         service_req.model_name = model_name
         service_req.relative_entity_name = relative_entity_name
 
-        response, is_successful = utils.call_service(service_name, service_class, service_req)
+        response, is_successful = utils.call_service(service_name, service_class, service_req, pool = self._service_pool)
         return response
 
+    def model_exists(self, model_name: str):
+        """
+        Checks whether the model exists in gazebo through service call
+
+        :param str model_name: name of gazebo model
+        :return bool
+        """
+
+        response = self.get_model_state(model_name)
+        return response is not None and response.success
+
+    def get_spawned_models(self):
+        """
+        Gets the tracked models that are not in __init_models list
+
+        :return list
+        """
+
+        with self.__models_lock:
+            return [model_name for model_name in self.__current_models
+                    if model_name not in self.__init_models]
+
     def clear_all_spawned_models(self):
         """
         Clears all models that are not in __init_models list
         """
 
-        for model_name in self.__current_models:
-            # delete if not a initial model
-            if model_name not in self.__init_models:
-                self.delete_model(model_name)
+        # delete_model() updates the tracking list, iterate over a snapshot
+        for model_name in self.get_spawned_models():
+            self.delete_model(model_name)
+
+    def claim_start_position(self, model_name: str, sample_position):
+        """
+        Claim the start position of the robot for the episode, robots sharing the
+        world sample their start positions away from the ones claimed by the others
+
+        :param str model_name: gazebo model name of the robot
+               callable sample_position: function taking the list of world positions (x, y)
+                        claimed by the other robots, returns the world position (x, y)
+        :return tuple (claimed world position (x, y))
+        """
+
+        # claims are made concurrently from robot environment threads (MultiRobotEnv)
+        with self.__claims_lock:
+            claimed = [position for name, position in self.__claimed_positions.items()
+                       if name != model_name]
+            position = sample_position(claimed)
+            self.__claimed_positions[model_name] = position
+        return position
+
+    def get_claimed_positions(self):
+        """
+        Gets the start positions claimed by the robots sharing the world
+
+        :return list (claimed world positions (x, y))
+        """
+
+        with self.__claims_lock:
+            return list(self.__claimed_positions.values())
+
+    def add_unmanaged_models(self, model_names: list):
+        """
+        Exclude the models from the world reset of every robot sharing the world,
+        they are neither deleted nor teleported
+
+        :param list model_names: names of the models
+        """
+
+        with self.__claims_lock:
+            self.__unmanaged_models.update(model_names)
+
+    def get_unmanaged_models(self):
+        """
+        Gets the models excluded from the world reset
+
+        :return set (names of the models)
+        """
+
+        with self.__claims_lock:
+            return set(self.__unmanaged_models)
+
+    def get_arena(self):
+        """
+        Layout arena Getter
+
+        :return LayoutArena or None if layouts are not preloaded
+        """
+
+        return self._arena
+
+    def get_service_stats(self):
+        """
+        Gets the per service call count and latency of gazebo services
+
+        :return dict
+        """
+
+        return self._service_pool.get_stats()
+
+    def get_model_cache_stats(self):
+        """
+        Gets the hit/miss statistics of the model description cache
+
+        :return dict
+        """
+
+        return self._model_cache.get_stats()
+
+    def get_urdf_cache_stats(self):
+        """
+        Gets the hit/miss statistics of the expanded urdf cache
+
+        :return dict
+        """
+
+        return self._urdf_cache.get_stats()
 
     def get_all_model_states(self):
         """
@@ -0,0 +1,1359 @@
+#!/usr/bin/env python3
+
+import rospy
+import rospkg
+from openai_ros import msg_decoder, pojo, utils
+from openai_ros.raycast import Raycaster
+from sensor_msgs.msg import LaserScan, Imu
+from nav_msgs.msg import Odometry, OccupancyGrid, MapMetaData
+from nav_msgs.srv import GetMapResponse
+from geometry_msgs.msg import Twist, PoseWithCovarianceStamped, Pose
+from gazebo_msgs.msg import ModelState, ModelStates
+from gazebo_msgs.srv import GetModelStateResponse
+from std_srvs.srv import EmptyResponse
+import numpy as np
+import threading
+import yaml
+import os
+import xml.etree.ElementTree as ET
+
+# (ros package, relative path) of default occupancy map
+DEFAULT_MAP_FILE = ('indoor_layouts', 'map/sample/sample_layout.yaml')
+
+def load_map(yaml_file: str):
+    """
+    Load the occupancy map saved by map_server (*.yaml + *.pgm), cells are
+    converted the same way map_server does (trinary mode)
+
+    :param str yaml_file: path of map yaml file
+    :return dict with keys: cells (int8 (height, width) array, row 0 at origin),
+            resolution, origin ([x, y, yaw])
+    """
+
+    with open(yaml_file, 'r') as f:
+        data = yaml.load(f, Loader = yaml.FullLoader)
+
+    image_file = data['image']
+    if not os.path.isabs(image_file):
+        image_file = os.path.join(os.path.dirname(yaml_file), image_file)
+    image = _read_pgm(image_file)
+
+    # occupancy probability of each pixel
+    occupancy = image.astype(np.float32) / 255.0
+    if not data.get('negate', 0):
+        occupancy = 1.0 - occupancy
+
+    cells = np.full(image.shape, -1, dtype=np.int8)
+    cells[occupancy > data['occupied_thresh']] = 100
+    cells[occupancy < data['free_thresh']] = 0
+
+    return {
+        # image row 0 is the top of the map, grid row 0 is at the map origin
+        'cells': np.ascontiguousarray(np.flipud(cells)),
+        'resolution': float(data['resolution']),
+        'origin': [float(value) for value in data['origin']],
+    }
+
+def _read_pgm(pgm_file: str):
+    """
+    Read the binary (P5) pgm image
+
+    :param str pgm_file: path of pgm file
+    :return numpy.ndarray (uint8 (height, width) array)
+    """
+
+    with open(pgm_file, 'rb') as f:
+        buff = f.read()
+
+    # header fields: magic, width, height, max value (comments start with '#')
+    fields = []
+    offset = 0
+    while len(fields) < 4:
+        while buff[offset:offset + 1].isspace():
+            offset += 1
+        if buff[offset:offset + 1] == b'#':
+            offset = buff.index(b'\n', offset) + 1
+            continue
+        end = offset
+        while not buff[end:end + 1].isspace():
+            end += 1
+        fields.append(buff[offset:end])
+        offset = end
+    # single whitespace separates the header from the pixels
+    offset += 1
+
+    if fields[0] != b'P5' or int(fields[3]) > 255:
+        raise ValueError('unsupported pgm image: {0}'.format(pgm_file))
+    width, height = int(fields[1]), int(fields[2])
+    return np.frombuffer(buff, dtype=np.uint8, count=width * height, offset=offset).reshape(height, width)
+
+def _set_sim_time(sim_time: float):
+    """
+    Set the rospy clock to the simulation time (same as receiving /clock)
+
+    :param float sim_time: simulation time in seconds
+    """
+    rospy.rostime.set_rostime_initialized(True)
+    rospy.rostime._set_rostime(rospy.Time.from_sec(sim_time))
+
+def _parse_footprint(model_xml: str):
+    """
+    Parse the footprint of the model from the first collision geometry of its sdf description
+
+    :param str model_xml: sdf description of the model
+    :return tuple (('box', half size x, half size y) or ('cylinder', radius)) or None if the
+            geometry has no primitive footprint (eg. mesh of layouts, given by the map)
+    """
+    if not model_xml:
+        return None
+    try:
+        root = ET.fromstring(model_xml)
+    except ET.ParseError:
+        return None
+    geometry = root.find('.//collision/geometry')
+    if geometry is None:
+        return None
+    size = geometry.find('box/size')
+    if size is not None:
+        size_x, size_y = [float(value) for value in size.text.split()][:2]
+        return ('box', 0.5 * size_x, 0.5 * size_y)
+    radius = geometry.find('cylinder/radius')
+    if radius is not None:
+        return ('cylinder', float(radius.text))
+    return None
+
+def _wrap_angle(angle):
+    """
+    Wrap the angle(s) to [-pi, pi)
+    """
+    return np.mod(angle + np.pi, 2 * np.pi) - np.pi
+
+class KinematicRobot():
+    """
+        KinematicRobot class is an implementation to store the state of
+        differential drive robot within the kinematic simulation
+    """
+
+    def __init__(self, robot_ns: str = ''):
+        """
+        Initialize KinematicRobot class
+
+        :param str robot_ns: namespace of the robot topics (also model name, 'turtlebot3' if empty)
+        """
+        super(KinematicRobot, self).__init__()
+
+        self._robot_ns = robot_ns.strip('/')
+        self._model_name = self._robot_ns or 'turtlebot3'
+
+        # ground truth pose [x, y, yaw], body velocity and commanded velocity
+        self.pose = np.zeros(3, dtype=np.float64)
+        self.linear_vel = 0.0
+        self.angular_vel = 0.0
+        self.cmd_linear_vel = 0.0
+        self.cmd_angular_vel = 0.0
+        self.is_bumped = False
+
+    def get_model_name(self):
+        """
+        Gazebo model name Getter
+        """
+        return self._model_name
+
+    def resolve_name(self, name: str):
+        """
+        Resolve the topic/service name within the robot namespace
+        """
+        return utils.resolve_name(self._robot_ns, name)
+
+    def resolve_frame_id(self, frame_id: str):
+        """
+        Resolve the tf frame id within the robot namespace
+        """
+        return utils.resolve_frame_id(self._robot_ns, frame_id)
+
+    def teleport(self, x: float, y: float, yaw: float):
+        """
+        Move the robot to the pose and stop it
+
+        :param float x: position x (world frame)
+               float y: position y (world frame)
+               float yaw: heading (world frame)
+        """
+        self.pose[:] = (x, y, _wrap_angle(yaw))
+        self.linear_vel = self.angular_vel = 0.0
+        self.cmd_linear_vel = self.cmd_angular_vel = 0.0
+        self.is_bumped = False
+
+class StandInLocalizer():
+    """
+        StandInLocalizer class emulates the amcl topics (/particlecloud and /amcl_pose)
+        from the ground truth pose, particles follow the odometry and their spread
+        around the true pose shrinks with every update (once per step) while the robot moves
+
+        It is a stand-in providing the amcl interface at simulation speed, it does not
+        evaluate the laser scan against the map
+    """
+
+    def __init__(self, num_particles: int = 2000, convergence: float = 0.9,
+                 motion_noise: tuple = (0.02, 0.02), seed: int = None):
+        """
+        Initialize StandInLocalizer class
+
+        :param int num_particles: number of particles
+               float convergence: factor the particle offsets (from true pose) shrink by per update
+               tuple motion_noise: standard deviation of (translation, rotation) noise per
+                     meter/radian travelled
+               int seed: random seed
+        """
+        super(StandInLocalizer, self).__init__()
+
+        self._num_particles = num_particles
+        self._convergence = convergence
+        self._motion_noise = motion_noise
+        self._rng = np.random.default_rng(seed)
+        self._particles = np.zeros((num_particles, 3), dtype=np.float64)
+
+    def get_particles(self):
+        """
+        Particles ([x, y, yaw] rows) Getter
+        """
+        return self._particles
+
+    def set_initial_pose(self, pose, covariance):
+        """
+        Sample particles from gaussian around the initial pose
+
+        :param sequence pose: [x, y, yaw]
+               numpy.ndarray covariance: 6x6 covariance
+        """
+        covariance = np.asarray(covariance, dtype=np.float64).reshape(6, 6)
+        std = np.sqrt(np.maximum([covariance[0, 0], covariance[1, 1], covariance[5, 5]], 0.0))
+        self._particles[:] = self._rng.normal(pose, std, size=self._particles.shape)
+        self._particles[:, 2] = _wrap_angle(self._particles[:, 2])
+
+    def set_uniform(self, free_positions):
+        """
+        Sample particles uniformly over the free space (global localization)
+
+        :param numpy.ndarray free_positions: (N, 2) world positions of free cells
+        """
+        indices = self._rng.integers(0, free_positions.shape[0], size=self._num_particles)
+        self._particles[:, 0:2] = free_positions[indices]
+        self._particles[:, 2] = self._rng.uniform(-np.pi, np.pi, size=self._num_particles)
+
+    def update(self, true_pose, delta):
+        """
+        Move the particles by the odometry delta and shrink their spread around the true pose
+
+        :param numpy.ndarray true_pose: ground truth [x, y, yaw] after the motion
+               numpy.ndarray delta: motion [dx, dy, dyaw] in the robot frame
+        """
+        distance = np.hypot(delta[0], delta[1])
+        rotation = abs(delta[2])
+        if distance < 1e-6 and rotation < 1e-6:
+            return
+
+        particles = self._particles
+        cos_yaw = np.cos(particles[:, 2])
+        sin_yaw = np.sin(particles[:, 2])
+        trans_std = self._motion_noise[0] * distance
+        rot_std = self._motion_noise[1] * rotation + self._motion_noise[0] * distance
+        noise = self._rng.normal(0.0, 1.0, size=particles.shape)
+        particles[:, 0] += delta[0] * cos_yaw - delta[1] * sin_yaw + trans_std * noise[:, 0]
+        particles[:, 1] += delta[0] * sin_yaw + delta[1] * cos_yaw + trans_std * noise[:, 1]
+        particles[:, 2] += delta[2] + rot_std * noise[:, 2]
+
+        # pull towards the true pose
+        offsets = particles - true_pose
+        offsets[:, 2] = _wrap_angle(offsets[:, 2])
+        particles[:] = true_pose + self._convergence * offsets
+        particles[:, 2] = _wrap_angle(particles[:, 2])
+
+    def get_estimate(self):
+        """
+        Gets the mean pose and covariance of the particles
+
+        :return numpy.ndarray ([x, y, yaw]), numpy.ndarray (6x6 covariance)
+        """
+        particles = self._particles
+        mean = np.empty(3, dtype=np.float64)
+        mean[0:2] = particles[:, 0:2].mean(axis=0)
+        mean[2] = np.arctan2(np.sin(particles[:, 2]).mean(), np.cos(particles[:, 2]).mean())
+
+        offsets = particles - mean
+        offsets[:, 2] = _wrap_angle(offsets[:, 2])
+        covariance = np.zeros((6, 6), dtype=np.float64)
+        covariance[0:2, 0:2] = np.dot(offsets[:, 0:2].T, offsets[:, 0:2]) / particles.shape[0]
+        covariance[5, 5] = np.dot(offsets[:, 2], offsets[:, 2]) / particles.shape[0]
+        return mean, covariance
+
+class KinematicSim():
+    """
+        KinematicSim class is an implementation of headless 2D simulation of differential
+        drive robots on the occupancy map, topics and services are served in-process
+        through utils.LocalTransport so the environments skip TCPROS entirely,
+        env loop runs at about 250-440 steps/sec per robot (laser raycasting dominates)
+
+        Served Topics (per robot namespace):
+        * /odom, /imu, /scan : sensor readings (odom at odom_rate, others once per step)
+        * /cmd_vel           : velocity commands (first-order velocity lag)
+        * /initialpose       : initial pose of the stand-in localizer
+        * /particlecloud, /amcl_pose : stand-in localizer output (serialized)
+        * /map, /map_metadata : latched occupancy map
+        * /gazebo/model_states, /gazebo/set_model_state (not namespaced)
+
+        Served Services (per robot namespace):
+        * /static_map, /global_localization
+    """
+
+    def __init__(self, map_file: str = None, robot_namespaces: list = None, time_step: float = 0.001,
+                 odom_rate: float = 30.0, robot_radius: float = 0.2, velocity_time_constant: float = 0.05,
+                 range_min: float = 0.12, range_max: float = 3.5, num_beams: int = 360,
+                 scan_noise: float = 0.01, num_particles: int = 500, seed: int = None):
+        """
+        Initialize KinematicSim class
+
+        :param str map_file: path of map yaml file, default is sample layout of indoor_layouts
+               list robot_namespaces: namespace of each robot, default is [''] (single robot 'turtlebot3')
+               float time_step: simulation time (in seconds) of one physics iteration
+               float odom_rate: rate (in simulation time) at which odometry is integrated and published
+               float robot_radius: radius of the robot footprint used for collision checking
+               float velocity_time_constant: time constant of first-order lag from command to velocity
+               float range_min: minimum range of laser scan
+               float range_max: maximum range of laser scan
+               int num_beams: number of laser beams over 360 degrees
+               float scan_noise: standard deviation of gaussian laser range noise
+               int num_particles: number of particles of stand-in localizer (0 disables it)
+               int seed: random seed
+        """
+        super(KinematicSim, self).__init__()
+
+        if map_file is None:
+            package, relative_path = DEFAULT_MAP_FILE
+            map_file = os.path.join(rospkg.RosPack().get_path(package), relative_path)
+        if robot_namespaces is None:
+            robot_namespaces = ['']
+
+        self._time_step = time_step
+        self._odom_period = 1.0 / odom_rate
+        self._robot_radius = robot_radius
+        self._velocity_time_constant = velocity_time_constant
+        self._range_min = range_min
+        self._range_max = range_max
+        self._scan_noise = scan_noise
+        self._rng = np.random.default_rng(seed)
+
+        self.__lock = threading.RLock()
+        self.__iterations = 0
+        self.__sim_time = 0.0
+        self.__last_odom_time = 0.0
+
+        self.__load_map(map_file)
+
+        # laser beams traced through the occupancy grid
+        self._num_beams = num_beams
+        self._static_raycaster = self._raycaster = Raycaster(self._map, num_beams = num_beams,
+                                                             min_range = range_min, max_range = range_max)
+        self._beam_angles = self._raycaster.get_beam_angles()
+
+        # robots, their localizers and spawned (non-robot) models with their pose
+        self._robots = {}
+        self._localizers = {}
+        for robot_ns in robot_namespaces:
+            robot = KinematicRobot(robot_ns)
+            self._robots[robot.get_model_name()] = robot
+            if num_particles > 0:
+                self._localizers[robot.get_model_name()] = StandInLocalizer(
+                            num_particles = num_particles, seed = self._rng.integers(1 << 31))
+        self._localizer_poses = {}
+        self._models = {'ground_plane': np.zeros(3, dtype=np.float64)}
+        # model name => primitive footprint, drawn into the collision and laser grids
+        self._footprints = {}
+        self.__is_obstacles_stale = False
+        self._init_poses = {}
+        for idx, robot in enumerate(self._robots.values()):
+            x, y = self.__free_positions[(idx * 7919) % self.__free_positions.shape[0]]
+            robot.teleport(x, y, 0.0)
+            self._init_poses[robot.get_model_name()] = robot.pose.copy()
+
+        # serve topics and services in-process
+        self._transport = utils.LocalTransport()
+        self.__setup_transport()
+        utils.set_local_transport(self._transport)
+        rospy.on_shutdown(self.close)
+
+        _set_sim_time(self.__sim_time)
+        rospy.loginfo('status: kinematic simulation with %d robots is ready', len(self._robots))
+
+    #### public methods ####
+
+    def get_time_step(self):
+        """
+        Physics iteration time step Getter
+        """
+        return self._time_step
+
+    def get_sim_time(self):
+        """
+        Simulation time (in seconds) Getter
+        """
+        with self.__lock:
+            return self.__sim_time
+
+    def get_robot(self, model_name: str):
+        """
+        Robot Getter
+
+        :param str model_name: model name of the robot
+        :return KinematicRobot or None
+        """
+        return self._robots.get(model_name)
+
+    def get_localizer(self, model_name: str):
+        """
+        Stand-in localizer Getter
+
+        :param str model_name: model name of the robot
+        :return StandInLocalizer or None
+        """
+        return self._localizers.get(model_name)
+
+    def get_map(self):
+        """
+        Occupancy map Getter
+        """
+        return self._map
+
+    def step(self, iterations: int):
+        """
+        Advance the simulation by number of physics iterations, odometry is
+        published at odom_rate and other sensors once at the end
+
+        :param int iterations: number of physics iterations
+        """
+
+        with self.__lock:
+            self.__update_obstacles()
+            end_iterations = self.__iterations + iterations
+            end_time = end_iterations * self._time_step
+            while self.__sim_time < end_time - 1e-9:
+                sim_time = min(self.__last_odom_time + self._odom_period, end_time)
+                self.__integrate(sim_time - self.__sim_time)
+                self.__sim_time = sim_time
+                _set_sim_time(sim_time)
+                if sim_time >= self.__last_odom_time + self._odom_period - 1e-9:
+                    self.__last_odom_time = sim_time
+                    for robot in self._robots.values():
+                        self.__publish_odom(robot)
+            self.__iterations = end_iterations
+        self.publish_sensors()
+
+    def set_cmd_vel(self, topic_name: str, cmd_vel):
+        """
+        Apply the velocity command to the robot subscribed to the topic, same as if
+        the command was received on the topic
+
+        :param str topic_name: resolved velocity command topic
+               geometry_msgs.msg._Twist.Twist cmd_vel: velocity command
+        :return bool (whether the robot exists)
+        """
+        for robot in self._robots.values():
+            if robot.resolve_name('/cmd_vel') == topic_name:
+                self.__cmd_vel_callback(cmd_vel, robot)
+                return True
+        return False
+
+    def publish_sensors(self):
+        """
+        Publish the latest readings of all sensors of all robots
+        """
+
+        with self.__lock:
+            self.__update_obstacles()
+            for model_name, robot in self._robots.items():
+                self.__update_localizer(robot, self._localizers.get(model_name))
+                self.__publish_odom(robot)
+                self.__publish_imu(robot)
+                self.__publish_scan(robot)
+                self.__publish_localizer(robot, self._localizers.get(model_name))
+            self.__publish_model_states()
+
+    def reset(self):
+        """
+        Reset the simulation time and move the robots to their initial pose
+        """
+
+        with self.__lock:
+            self.__iterations = 0
+            self.__sim_time = 0.0
+            self.__last_odom_time = 0.0
+            _set_sim_time(self.__sim_time)
+            for model_name, robot in self._robots.items():
+                robot.teleport(*self._init_poses[model_name])
+            self._localizer_poses.clear()
+
+    def model_exists(self, model_name: str):
+        """
+        Whether the model exists in the simulation
+        """
+        with self.__lock:
+            return model_name in self._robots or model_name in self._models
+
+    def get_model_names(self):
+        """
+        Gets the names of all models in the simulation
+
+        :return list
+        """
+        with self.__lock:
+            return list(self._models.keys()) + list(self._robots.keys())
+
+    def get_model_pose(self, model_name: str):
+        """
+        Gets the ground truth pose of the model
+
+        :param str model_name: name of the model
+        :return numpy.ndarray ([x, y, yaw]) or None if model doesn't exist
+        """
+        with self.__lock:
+            if model_name in self._robots:
+                return self._robots[model_name].pose.copy()
+            if model_name in self._models:
+                return self._models[model_name].copy()
+        return None
+
+    def get_model_twist(self, model_name: str):
+        """
+        Gets the world frame velocity of the model
+
+        :param str model_name: name of the model
+        :return numpy.ndarray ([vx, vy, wz])
+        """
+        with self.__lock:
+            robot = self._robots.get(model_name)
+            if robot is None:
+                return np.zeros(3, dtype=np.float64)
+            return np.array([robot.linear_vel * np.cos(robot.pose[2]),
+                             robot.linear_vel * np.sin(robot.pose[2]),
+                             robot.angular_vel])
+
+    def set_model_pose(self, model_name: str, x: float, y: float, yaw: float):
+        """
+        Sets the ground truth pose of the model (robots are stopped)
+
+        :param str model_name: name of the model
+               float x: position x (world frame)
+               float y: position y (world frame)
+               float yaw: heading (world frame)
+        :return bool (whether model exists)
+        """
+        with self.__lock:
+            if model_name in self._robots:
+                self._robots[model_name].teleport(x, y, yaw)
+                # teleport is not a motion of the robot
+                self._localizer_poses.pop(model_name, None)
+                return True
+            if model_name in self._models:
+                self._models[model_name][:] = (x, y, yaw)
+                if model_name in self._footprints:
+                    self.__is_obstacles_stale = True
+                return True
+        return False
+
+    def spawn_model(self, model_name: str, x: float = 0.0, y: float = 0.0, yaw: float = 0.0,
+                    footprint: tuple = None):
+        """
+        Add the model, models are tracked by name and pose, occupancy is given by the map
+        unless the model has a primitive footprint (eg. obstacles)
+
+        :param str model_name: name of the model
+               float x: position x (world frame)
+               float y: position y (world frame)
+               float yaw: heading (world frame)
+               tuple footprint: ('box', half size x, half size y) or ('cylinder', radius),
+                     blocks the robots and the laser beams
+        """
+        with self.__lock:
+            if model_name in self._robots:
+                self._robots[model_name].teleport(x, y, yaw)
+                self._localizer_poses.pop(model_name, None)
+            else:
+                self._models[model_name] = np.array([x, y, yaw], dtype=np.float64)
+                if footprint is not None or model_name in self._footprints:
+                    self._footprints.pop(model_name, None)
+                    if footprint is not None:
+                        self._footprints[model_name] = footprint
+                    self.__is_obstacles_stale = True
+
+    def delete_model(self, model_name: str):
+        """
+        Remove the model (robots are never removed)
+
+        :param str model_name: name of the model
+        :return bool (whether model is removed)
+        """
+        with self.__lock:
+            if self._footprints.pop(model_name, None) is not None:
+                self.__is_obstacles_stale = True
+            return self._models.pop(model_name, None) is not None
+
+    def is_free(self, x, y):
+        """
+        Whether the robot footprint centered at the world position(s) is collision free
+
+        :param x: position(s) x (world frame)
+               y: position(s) y (world frame)
+        :return bool or numpy.ndarray
+        """
+        with self.__lock:
+            self.__update_obstacles()
+            inflated = self._inflated
+        rows, cols, inside = self.__world_to_cell(np.asarray(x), np.asarray(y))
+        # outside of the map is free
+        return ~(inside & inflated[np.where(inside, rows, 0), np.where(inside, cols, 0)])
+
+    def raycast(self, x: float, y: float, yaw: float):
+        """
+        Compute the laser ranges from the pose, inf for beams without obstacle within range
+
+        :param float x: sensor position x (world frame)
+               float y: sensor position y (world frame)
+               float yaw: sensor heading (world frame)
+        :return numpy.ndarray (float32 ranges)
+        """
+
+        with self.__lock:
+            self.__update_obstacles()
+            raycaster = self._raycaster
+        return raycaster.cast([x, y, yaw])
+
+    def close(self):
+        """
+        Stop serving topics and services in-process
+        """
+        if utils.get_local_transport() is self._transport:
+            utils.set_local_transport(None)
+        self._transport.close()
+
+    #### private methods ####
+
+    def __load_map(self, map_file: str):
+        """
+        Load the occupancy map and precompute collision lookups
+
+        :param str map_file: path of map yaml file
+        """
+
+        map_data = load_map(map_file)
+        self._cells = map_data['cells']
+        self._resolution = map_data['resolution']
+        self._origin = map_data['origin']
+        self._height, self._width = self._cells.shape
+
+        # map with origin at its center (as received by the environments)
+        center = pojo.Pose()
+        center.set_position(self._origin[0] + (self._width / 2) * self._resolution,
+                            self._origin[1] + (self._height / 2) * self._resolution, 0.0)
+        self._map = pojo.Map()
+        self._map.set_scale(self._resolution)
+        self._map.set_size(self._width, self._height)
+        self._map.set_origin(center)
+        self._map.set_cells(self._cells)
+
+        # occupied cells and occupied cells dilated by the robot radius (disk)
+        self._occupied = self._map.get_occupied_mask()
+        radius = np.ceil(self._robot_radius / self._resolution) * self._resolution
+        self._static_inflated = self._inflated = self._map.get_distance_field() <= radius + 1e-4
+        self._inflation_radius = radius
+
+        # world positions of collision free known cells (global localization)
+        rows, cols = np.nonzero((self._cells == 0) & ~self._static_inflated)
+        self.__free_positions = np.stack([
+            self._origin[0] + (cols + 0.5) * self._resolution,
+            self._origin[1] + (rows + 0.5) * self._resolution], axis=1)
+
+        # latched map as serialized nav_msgs/OccupancyGrid
+        origin = (self._origin[0], self._origin[1], 0.0) + \
+                    tuple(msg_decoder.yaw_to_quaternion(self._origin[2]))
+        self._map_info = msg_decoder.MapMetaData((0, 0), self._resolution,
+                                                 self._width, self._height, origin)
+        self._map_buff = msg_decoder.encode_occupancy_grid(
+                    msg_decoder.Header(0, 0, 0, 'map'), self._map_info, self._cells)
+
+    def __update_obstacles(self):
+        """
+        Draw the footprints of the models within the map into the collision grid (dilated
+        by the robot radius) and the laser grid, only if they changed (caller holds the lock)
+        """
+
+        if not self.__is_obstacles_stale:
+            return
+        self.__is_obstacles_stale = False
+
+        inflated = self._static_inflated
+        cells = None
+        for model_name, footprint in self._footprints.items():
+            x, y, yaw = self._models[model_name]
+            # bounding radius of the footprint dilated by the robot radius
+            extent = np.hypot(footprint[1], footprint[2]) if footprint[0] == 'box' else footprint[1]
+            extent += self._inflation_radius
+
+            # cells of the window around the model (parked models are outside of the map)
+            row_min, col_min, _ = self.__world_to_cell(x - extent, y - extent)
+            row_max, col_max, _ = self.__world_to_cell(x + extent, y + extent)
+            row_min, col_min = max(int(row_min), 0), max(int(col_min), 0)
+            row_max, col_max = min(int(row_max), self._height - 1), min(int(col_max), self._width - 1)
+            if col_min > col_max or row_min > row_max:
+                continue
+            rows, cols = np.mgrid[row_min:row_max + 1, col_min:col_max + 1]
+            dx = self._origin[0] + (cols + 0.5) * self._resolution - x
+            dy = self._origin[1] + (rows + 0.5) * self._resolution - y
+
+            # distance of cell centers to the footprint (in its frame)
+            if footprint[0] == 'box':
+                local_x = np.cos(yaw) * dx + np.sin(yaw) * dy
+                local_y = -np.sin(yaw) * dx + np.cos(yaw) * dy
+                distance = np.hypot(np.maximum(np.abs(local_x) - footprint[1], 0.0),
+                                    np.maximum(np.abs(local_y) - footprint[2], 0.0))
+            else:
+                distance = np.maximum(np.hypot(dx, dy) - footprint[1], 0.0)
+
+            if cells is None:
+                inflated = inflated.copy()
+                cells = self._cells.copy()
+            window = (slice(row_min, row_max + 1), slice(col_min, col_max + 1))
+            inflated[window] |= distance <= self._inflation_radius + 1e-4
+            cells[window][distance <= 0.0] = 100
+
+        self._inflated = inflated
+        if cells is None:
+            self._raycaster = self._static_raycaster
+        else:
+            # laser grid with the obstacles, the published map stays static
+            world_map = pojo.Map()
+            world_map.set_scale(self._resolution)
+            world_map.set_size(self._width, self._height)
+            world_map.set_origin(self._map.get_origin())
+            world_map.set_cells(cells)
+            self._raycaster = Raycaster(world_map, num_beams = self._num_beams,
+                                        min_range = self._range_min, max_range = self._range_max)
+
+    def __world_to_cell(self, xs, ys):
+        """
+        Convert the world positions to grid cell indices
+
+        :return numpy.ndarray (rows), numpy.ndarray (cols), numpy.ndarray (inside map)
+        """
+        cols = np.floor((xs - self._origin[0]) / self._resolution).astype(np.intp)
+        rows = np.floor((ys - self._origin[1]) / self._resolution).astype(np.intp)
+        inside = (rows >= 0) & (rows < self._height) & (cols >= 0) & (cols < self._width)
+        return rows, cols, inside
+
+    def __integrate(self, duration: float):
+        """
+        Integrate the differential drive kinematics of all robots, robots stop
+        instead of entering collision
+
+        :param float duration: simulation time (in seconds)
+        """
+
+        if duration <= 0.0:
+            return
+        alpha = 1.0 - np.exp(-duration / self._velocity_time_constant)
+        for model_name, robot in self._robots.items():
+            robot.linear_vel += alpha * (robot.cmd_linear_vel - robot.linear_vel)
+            robot.angular_vel += alpha * (robot.cmd_angular_vel - robot.angular_vel)
+
+            # exact integration of unicycle with constant velocity
+            x, y, yaw = robot.pose
+            d_yaw = robot.angular_vel * duration
+            if abs(d_yaw) < 1e-9:
+                dx = robot.linear_vel * duration
+                dy = 0.0
+            else:
+                radius = robot.linear_vel / robot.angular_vel
+                dx = radius * np.sin(d_yaw)
+                dy = radius * (1.0 - np.cos(d_yaw))
+            new_x = x + dx * np.cos(yaw) - dy * np.sin(yaw)
+            new_y = y + dx * np.sin(yaw) + dy * np.cos(yaw)
+
+            if self.is_free(new_x, new_y):
+                robot.is_bumped = False
+            else:
+                # blocked by obstacle, only rotate in place
+                robot.is_bumped = True
+                dx = dy = 0.0
+                new_x, new_y = x, y
+                robot.linear_vel = 0.0
+            robot.pose[:] = (new_x, new_y, _wrap_angle(yaw + d_yaw))
+
+    def __setup_transport(self):
+        """
+        Advertise the topics and register the services of all robots
+        """
+
+        transport = self._transport
+        self._publishers = {}
+        for model_name, robot in self._robots.items():
+            self._publishers[model_name] = {
+                'odom': transport.advertise(robot.resolve_name('/odom'), Odometry),
+                'imu': transport.advertise(robot.resolve_name('/imu'), Imu),
+                'scan': transport.advertise(robot.resolve_name('/scan'), LaserScan),
+                'particlecloud': transport.advertise(robot.resolve_name('/particlecloud'), rospy.AnyMsg),
+                'amcl_pose': transport.advertise(robot.resolve_name('/amcl_pose'), rospy.AnyMsg),
+            }
+            map_msg = rospy.AnyMsg()
+            map_msg._buff = self._map_buff
+            transport.advertise(robot.resolve_name('/map'), rospy.AnyMsg, latch = True).publish(map_msg)
+            transport.advertise(robot.resolve_name('/map_metadata'), MapMetaData, latch = True) \
+                        .publish(self.__map_metadata_msg())
+
+            transport.subscribe(robot.resolve_name('/cmd_vel'), Twist,
+                                self.__cmd_vel_callback, robot)
+            transport.subscribe(robot.resolve_name('/initialpose'), PoseWithCovarianceStamped,
+                                self.__init_pose_callback, model_name)
+            transport.register_service(robot.resolve_name('/global_localization'),
+                                       lambda request, model_name=model_name:
+                                            self.__global_localization(model_name))
+            transport.register_service(robot.resolve_name('/static_map'), self.__static_map)
+
+        # gazebo topics belong to the world, they are not namespaced
+        self._model_states_pub = transport.advertise('/gazebo/model_states', ModelStates)
+        transport.subscribe('/gazebo/set_model_state', ModelState, self.__set_model_state_callback)
+
+    def __map_metadata_msg(self):
+        """
+        Create the map metadata message
+        """
+        info = MapMetaData()
+        info.resolution = self._map_info.resolution
+        info.width = self._map_info.width
+        info.height = self._map_info.height
+        (info.origin.position.x, info.origin.position.y, info.origin.position.z,
+         info.origin.orientation.x, info.origin.orientation.y,
+         info.origin.orientation.z, info.origin.orientation.w) = self._map_info.origin
+        return info
+
+    def __stamp(self):
+        """
+        Current simulation time as rospy.Time
+        """
+        return rospy.Time.from_sec(self.__sim_time)
+
+    def __publish_odom(self, robot):
+        """
+        Publish the odometry (ground truth pose in odom frame) of the robot
+        """
+        odom_msg = Odometry()
+        odom_msg.header.stamp = self.__stamp()
+        odom_msg.header.frame_id = robot.resolve_frame_id('odom')
+        odom_msg.child_frame_id = robot.resolve_frame_id('base_footprint')
+        odom_msg.pose.pose = self.__pose_msg(robot.pose)
+        odom_msg.twist.twist.linear.x = robot.linear_vel
+        odom_msg.twist.twist.angular.z = robot.angular_vel
+        self._publishers[robot.get_model_name()]['odom'].publish(odom_msg)
+
+    def __publish_imu(self, robot):
+        """
+        Publish the imu readings of the robot
+        """
+        imu_msg = Imu()
+        imu_msg.header.stamp = self.__stamp()
+        imu_msg.header.frame_id = robot.resolve_frame_id('imu_link')
+        imu_msg.orientation = self.__pose_msg(robot.pose).orientation
+        imu_msg.angular_velocity.z = robot.angular_vel
+        imu_msg.linear_acceleration.z = 9.81
+        self._publishers[robot.get_model_name()]['imu'].publish(imu_msg)
+
+    def __publish_scan(self, robot):
+        """
+        Publish the laser scan of the robot
+        """
+        ranges = self.raycast(*robot.pose)
+        if self._scan_noise > 0.0:
+            ranges += self._rng.normal(0.0, self._scan_noise, size=ranges.shape).astype(np.float32)
+            np.maximum(ranges, self._range_min, out=ranges)
+
+        scan_msg = LaserScan()
+        scan_msg.header.stamp = self.__stamp()
+        scan_msg.header.frame_id = robot.resolve_frame_id('base_scan')
+        scan_msg.angle_min = 0.0
+        scan_msg.angle_max = float(self._beam_angles[-1])
+        scan_msg.angle_increment = float(self._beam_angles[1] - self._beam_angles[0])
+        scan_msg.range_min = self._range_min
+        scan_msg.range_max = self._range_max
+        scan_msg.ranges = ranges.tolist()
+        self._publishers[robot.get_model_name()]['scan'].publish(scan_msg)
+
+    def __update_localizer(self, robot, localizer):
+        """
+        Move the particles of the localizer by the robot motion since the last update
+        """
+        if localizer is None:
+            return
+        last_pose = self._localizer_poses.get(robot.get_model_name())
+        self._localizer_poses[robot.get_model_name()] = robot.pose.copy()
+        if last_pose is None:
+            return
+
+        # motion in the robot frame at the last update
+        cos_yaw, sin_yaw = np.cos(last_pose[2]), np.sin(last_pose[2])
+        dx, dy = robot.pose[0:2] - last_pose[0:2]
+        delta = np.array([cos_yaw * dx + sin_yaw * dy, -sin_yaw * dx + cos_yaw * dy,
+                          _wrap_angle(robot.pose[2] - last_pose[2])])
+        localizer.update(robot.pose, delta)
+
+    def __publish_localizer(self, robot, localizer):
+        """
+        Publish the particle cloud and pose estimate of the stand-in localizer (serialized)
+        """
+        if localizer is None:
+            return
+        stamp = self.__stamp()
+        header = msg_decoder.Header(0, stamp.secs, stamp.nsecs, 'map')
+        publishers = self._publishers[robot.get_model_name()]
+
+        particle_msg = rospy.AnyMsg()
+        particle_msg._buff = msg_decoder.encode_particle_cloud(header, localizer.get_particles())
+        publishers['particlecloud'].publish(particle_msg)
+
+        mean, covariance = localizer.get_estimate()
+        pose = (mean[0], mean[1], 0.0) + tuple(msg_decoder.yaw_to_quaternion(mean[2]))
+        pose_msg = rospy.AnyMsg()
+        pose_msg._buff = msg_decoder.encode_pose_with_covariance_stamped(header, pose, covariance)
+        publishers['amcl_pose'].publish(pose_msg)
+
+    def __publish_model_states(self):
+        """
+        Publish the states of all models
+        """
+        model_states_msg = ModelStates()
+        for model_name in self.get_model_names():
+            model_states_msg.name.append(model_name)
+            model_states_msg.pose.append(self.__pose_msg(self.get_model_pose(model_name)))
+            twist = Twist()
+            twist.linear.x, twist.linear.y, twist.angular.z = self.get_model_twist(model_name)
+            model_states_msg.twist.append(twist)
+        self._model_states_pub.publish(model_states_msg)
+
+    def __pose_msg(self, pose):
+        """
+        Create the pose message from [x, y, yaw]
+        """
+        pose_msg = Pose()
+        pose_msg.position.x = pose[0]
+        pose_msg.position.y = pose[1]
+        pose_msg.orientation.z = np.sin(0.5 * pose[2])
+        pose_msg.orientation.w = np.cos(0.5 * pose[2])
+        return pose_msg
+
+    def __cmd_vel_callback(self, data, robot):
+        """
+        This function is called when velocity command of the robot is received
+        """
+        with self.__lock:
+            robot.cmd_linear_vel = data.linear.x
+            robot.cmd_angular_vel = data.angular.z
+
+    def __init_pose_callback(self, data, model_name: str):
+        """
+        This function is called when initial pose for the localizer is received
+        """
+        quaternion = np.array([data.pose.pose.orientation.x, data.pose.pose.orientation.y,
+                               data.pose.pose.orientation.z, data.pose.pose.orientation.w])
+        pose = [data.pose.pose.position.x, data.pose.pose.position.y,
+                msg_decoder.quaternion_to_yaw(quaternion)]
+        with self.__lock:
+            localizer = self._localizers.get(model_name)
+            if localizer is not None:
+                localizer.set_initial_pose(pose, data.pose.covariance)
+                self.__publish_localizer(self._robots[model_name], localizer)
+
+    def __global_localization(self, model_name: str):
+        """
+        This function is called when /global_localization service is requested
+        """
+        with self.__lock:
+            localizer = self._localizers.get(model_name)
+            if localizer is not None:
+                localizer.set_uniform(self.__free_positions)
+                self.__publish_localizer(self._robots[model_name], localizer)
+        return EmptyResponse()
+
+    def __static_map(self, request):
+        """
+        This function is called when /static_map service is requested
+        """
+        response = GetMapResponse()
+        response.map = OccupancyGrid().deserialize(self._map_buff)
+        return response
+
+    def __set_model_state_callback(self, data):
+        """
+        This function is called when model state is received on /gazebo/set_model_state
+        """
+        quaternion = np.array([data.pose.orientation.x, data.pose.orientation.y,
+                               data.pose.orientation.z, data.pose.orientation.w])
+        self.set_model_pose(data.model_name, data.pose.position.x, data.pose.position.y,
+                            msg_decoder.quaternion_to_yaw(quaternion))
+
+class KinematicConnection():
+    """
+        KinematicConnection class implements the GazeboConnection interface on top of
+        KinematicSim, so the environments run unchanged without gazebo
+
+        The world is advanced only through step_sim() (LOCKSTEP mode), it is always
+        reported as paused and unpause_sim() republishes the latest sensor readings
+    """
+
+    def __init__(self, reset_type: str = 'SIMULATION', init_models: list = None, sim: KinematicSim = None):
+        """
+        Initialize KinematicConnection class
+
+        Parameters
+        ----------
+        reset_type: str
+            This paremeter is used within the reset_sim()
+            Possible values are: ['SIMULATION', 'WORLD']
+        init_models: list
+            Models which are never removed by clear_all_spawned_models(),
+            default is ['ground_plane', 'turtlebot3']
+        sim: KinematicSim
+            Simulation shared by robots within the same world, new one is created if not given
+
+        """
+
+        if sim is None:
+            sim = KinematicSim()
+        self.sim = sim
+        self._reset_type = reset_type
+        self.__stats = {}
+
+        self.reset_sim()
+
+        if init_models is None:
+            init_models = ['ground_plane', 'turtlebot3']
+        self.__init_models = list(init_models)
+        self.__current_models = self.sim.get_model_names()
+        # model name => start position (x, y) claimed by the robot for the episode
+        self.__claims_lock = threading.Lock()
+        self.__claimed_positions = {}
+        # models managed elsewhere (eg. pooled obstacles), never deleted or teleported by reset
+        self.__unmanaged_models = set()
+
+        rospy.loginfo('status: kinematic connection establised')
+
+    def reset_sim(self):
+        """
+        Reset the simulation (including the time) or only the model poses
+        """
+        self.__record('reset_sim')
+        if self._reset_type in ['SIMULATION', 'WORLD']:
+            self.sim.reset()
+
+    def pause_sim(self):
+        """
+        Pause the simulation, world is only advanced through step_sim() so nothing is done
+        """
+        self.__record('pause_sim')
+
+    def unpause_sim(self):
+        """
+        Republish the latest sensor readings, as the unpaused world would keep publishing them
+        """
+        self.__record('unpause_sim')
+        self.sim.publish_sensors()
+
+    def is_paused(self):
+        """
+        Whether the simulation is paused, always True
+
+        :return bool
+        """
+        return True
+
+    def get_physics_time_step(self):
+        """
+        Gets the simulation time (in seconds) advanced by one physics iteration
+
+        :return float
+        """
+        return self.sim.get_time_step()
+
+    def step_sim(self, iterations: int, cmd_vel = None, cmd_vel_topic: str = ''):
+        """
+        Advance the world by exact number of physics iterations
+
+        :param int iterations: number of physics iterations
+               geometry_msgs.msg._Twist.Twist cmd_vel: velocity command applied before the world is advanced
+               str cmd_vel_topic: resolved velocity command topic of the robot
+        :return bool (whether the world is advanced)
+        """
+        self.__record('step_sim')
+        if cmd_vel is not None and not self.sim.set_cmd_vel(cmd_vel_topic, cmd_vel):
+            rospy.logwarn('no robot subscribes to %s', cmd_vel_topic)
+            self.__stats['step_sim']['failures'] += 1
+            return False
+        self.sim.step(iterations)
+        return True
+
+    def spawn_sdf_model(self, model_name: str, initial_pose, robot_namespace: str = '', reference_frame: int = 'world',
+                        model_xml: str = None):
+        """
+        Spawns a model to the simulation
+
+        :param str model_name: name of the model to be spawn
+               geometry_msgs.msg._Pose.Pose initial_pose: initial pose of model
+               str robot_namespace: unused
+               str reference_frame: unused, initial_pose is in world frame
+               str model_xml: sdf description of the model, primitive (box or cylinder) collision
+                    geometry blocks the robots and the laser, otherwise occupancy is given by the map
+        """
+        self.__record('spawn_sdf_model')
+        self.__spawn_model(model_name, initial_pose, _parse_footprint(model_xml))
+
+    def spawn_urdf_model(self, model_name: str, initial_pose, robot_namespace: str = '', reference_frame: str = 'world'):
+        """
+        Spawns a model to the simulation
+
+        :param str model_name: name of the model to be spawn
+               geometry_msgs.msg._Pose.Pose initial_pose: initial pose of model
+               str robot_namespace: unused
+               str reference_frame: unused, initial_pose is in world frame
+        """
+        self.__record('spawn_urdf_model')
+        self.__spawn_model(model_name, initial_pose)
+
+    def delete_model(self, model_name: str):
+        """
+        Delete a model from the simulation
+
+        :param str model_name: name of the model to be deleted
+        """
+        self.__record('delete_model')
+        if self.sim.delete_model(model_name):
+            if model_name in self.__current_models:
+                self.__current_models.remove(model_name)
+        else:
+            rospy.logwarn('DeleteModel: model [%s] does not exist', model_name)
+
+    def set_model_state(self, model_state):
+        """
+        Sets the model state in the simulation
+
+        :param gazebo_msgs.msg._ModelState.ModelState model_state: model pose (twist is ignored)
+        """
+        self.__record('set_model_state')
+        pose = model_state.pose
+        quaternion = np.array([pose.orientation.x, pose.orientation.y,
+                               pose.orientation.z, pose.orientation.w])
+        if not self.sim.set_model_pose(model_state.model_name, pose.position.x, pose.position.y,
+                                       msg_decoder.quaternion_to_yaw(quaternion)):
+            rospy.logwarn('SetModelState: model [%s] does not exist', model_state.model_name)
+
+    def get_model_state(self, model_name: str, relative_entity_name: str = 'world'):
+        """
+        Gets the model state from the simulation
+
+        :param str model_name: name of the model
+               str relative_entity_name: unused, state is in world frame
+        :return gazebo_msgs.srv.GetModelStateResponse
+        """
+        self.__record('get_model_state')
+        response = GetModelStateResponse()
+        pose = self.sim.get_model_pose(model_name)
+        if pose is None:
+            response.success = False
+            response.status_message = 'GetModelState: model does not exist'
+            return response
+
+        response.header.stamp = rospy.Time.from_sec(self.sim.get_sim_time())
+        response.pose.position.x = pose[0]
+        response.pose.position.y = pose[1]
+        response.pose.orientation.z = np.sin(0.5 * pose[2])
+        response.pose.orientation.w = np.cos(0.5 * pose[2])
+        response.twist.linear.x, response.twist.linear.y, response.twist.angular.z = \
+                    self.sim.get_model_twist(model_name)
+        response.success = True
+        return response
+
+    def model_exists(self, model_name: str):
+        """
+        Checks whether the model exists in the simulation
+
+        :param str model_name: name of the model
+        :return bool
+        """
+        return self.sim.model_exists(model_name)
+
+    def get_spawned_models(self):
+        """
+        Gets the tracked models that are not in __init_models list
+
+        :return list
+        """
+        return [model_name for model_name in self.__current_models
+                if model_name not in self.__init_models]
+
+    def clear_all_spawned_models(self):
+        """
+        Clears all models that are not in __init_models list
+        """
+        for model_name in list(self.__current_models):
+            # delete if not a initial model
+            if model_name not in self.__init_models:
+                self.delete_model(model_name)
+
+    def claim_start_position(self, model_name: str, sample_position):
+        """
+        Claim the start position of the robot for the episode, robots sharing the
+        world sample their start positions away from the ones claimed by the others
+
+        :param str model_name: gazebo model name of the robot
+               callable sample_position: function taking the list of world positions (x, y)
+                        claimed by the other robots, returns the world position (x, y)
+        :return tuple (claimed world position (x, y))
+        """
+
+        # claims are made concurrently from robot environment threads (MultiRobotEnv)
+        with self.__claims_lock:
+            claimed = [position for name, position in self.__claimed_positions.items()
+                       if name != model_name]
+            position = sample_position(claimed)
+            self.__claimed_positions[model_name] = position
+        return position
+
+    def get_claimed_positions(self):
+        """
+        Gets the start positions claimed by the robots sharing the world
+
+        :return list (claimed world positions (x, y))
+        """
+
+        with self.__claims_lock:
+            return list(self.__claimed_positions.values())
+
+    def add_unmanaged_models(self, model_names: list):
+        """
+        Exclude the models from the world reset of every robot sharing the world,
+        they are neither deleted nor teleported
+
+        :param list model_names: names of the models
+        """
+
+        with self.__claims_lock:
+            self.__unmanaged_models.update(model_names)
+
+    def get_unmanaged_models(self):
+        """
+        Gets the models excluded from the world reset
+
+        :return set (names of the models)
+        """
+
+        with self.__claims_lock:
+            return set(self.__unmanaged_models)
+
+    def get_arena(self):
+        """
+        Layout arena Getter, simulation holds a single layout
+
+        :return None
+        """
+        return None
+
+    def get_service_stats(self):
+        """
+        Gets the per call count of the connection methods (latency is negligible)
+
+        :return dict
+        """
+        return {name: dict(stat) for name, stat in self.__stats.items()}
+
+    def get_model_cache_stats(self):
+        """
+        Gets the statistics of the model description cache (models are not read from disk)
+
+        :return dict
+        """
+        return {'hits': 0, 'misses': 0, 'invalidations': 0, 'models': []}
+
+    def get_urdf_cache_stats(self):
+        """
+        Gets the statistics of the expanded urdf cache (xacro files are not expanded)
+
+        :return dict
+        """
+        return {'hits': 0, 'disk_hits': 0, 'misses': 0, 'expand_time': 0.0}
+
+    def get_all_model_states(self):
+        """
+        Gets the all model states from the simulation
+
+        :return gazebo_msgs.msg.ModelStates
+        """
+        model_states_msg = ModelStates()
+        for model_name in self.sim.get_model_names():
+            response = self.get_model_state(model_name)
+            model_states_msg.name.append(model_name)
+            model_states_msg.pose.append(response.pose)
+            model_states_msg.twist.append(response.twist)
+        return model_states_msg
+
+    def close(self):
+        """
+        Close the simulation
+        """
+        self.sim.close()
+
+    def __spawn_model(self, model_name: str, initial_pose, footprint: tuple = None):
+        """
+        Add the model to the simulation and track it
+        """
+        quaternion = np.array([initial_pose.orientation.x, initial_pose.orientation.y,
+                               initial_pose.orientation.z, initial_pose.orientation.w])
+        if not np.any(quaternion):
+            quaternion[3] = 1.0
+        self.sim.spawn_model(model_name, initial_pose.position.x, initial_pose.position.y,
+                             msg_decoder.quaternion_to_yaw(quaternion), footprint)
+        if model_name not in self.__current_models:
+            self.__current_models.append(model_name)
+
+    def __record(self, name: str):
+        """
+        Count the call of the connection method
+        """
+        stat = self.__stats.setdefault(name, {'calls': 0, 'failures': 0})
+        stat['calls'] += 1
+
+def make_localize_env(map_file: str = None, step_iterations: int = 200, profile: bool = False,
+                      metrics_file: str = None, localizer: str = 'AMCL', num_obstacles: int = 0, **kwargs):
+    """
+    Create TurtleBot3LocalizeEnv running on the kinematic simulation (LOCKSTEP mode)
+
+    :param str map_file: path of map yaml file, default is sample layout of indoor_layouts
+           int step_iterations: number of physics iterations per action
+           bool profile: whether to time the phases of step() and reset()
+           str metrics_file: path of prometheus text format file for phase latencies
+           str localizer: 'AMCL' (stand-in localizer of simulation) or 'PARTICLE_FILTER'
+               (in-process particle filter of environment)
+           int num_obstacles: number of pooled obstacles randomized on reset (0 disables them),
+               obstacles block the robot and the laser like the walls of the map
+           kwargs: additional keyword arguments of KinematicSim
+    :return TurtleBot3LocalizeEnv
+    """
+    from openai_ros.task_envs.turtlebot3.turtlebot3_localize import TurtleBot3LocalizeEnv
+    from openai_ros.obstacle_pool import ObstaclePool
+
+    if localizer == 'PARTICLE_FILTER':
+        # amcl topics are not consumed, skip the stand-in localizer
+        kwargs.setdefault('num_particles', 0)
+    # simulation must serve the topics before environment subscribes to them
+    gazebo = KinematicConnection(reset_type = 'SIMULATION',
+                                 sim = KinematicSim(map_file = map_file, **kwargs))
+    obstacle_pool = None
+    if num_obstacles > 0:
+        obstacle_pool = ObstaclePool(gazebo, num_obstacles = num_obstacles, seed = kwargs.get('seed'))
+    return TurtleBot3LocalizeEnv(profile = profile, metrics_file = metrics_file,
+                                 step_mode = 'LOCKSTEP', step_iterations = step_iterations,
+                                 gazebo = gazebo, localizer = localizer, obstacle_pool = obstacle_pool)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+import rospy
+from openai_ros import msg_decoder, utils
+from openai_ros.kinematic_sim import load_map
+from openai_ros.model_cache import get_package_path
+from geometry_msgs.msg import Pose
+from nav_msgs.msg import OccupancyGrid, MapMetaData
+from nav_msgs.srv import GetMap, GetMapResponse
+from collections import OrderedDict
+import glob
+import os
+import threading
+import time
+
+def get_layout_map_file(layout: str, package: str = 'indoor_layouts'):
+    """
+    Gets the map yaml file of the layout (<package>/map/<layout>/<layout>_layout.yaml,
+    otherwise the only yaml file within <package>/map/<layout>)
+
+    :param str layout: name of the layout (model of <package>/models)
+           str package: ros package containing the layouts
+    :return str
+    """
+    map_dir = os.path.join(get_package_path(package), 'map', layout)
+    yaml_file = os.path.join(map_dir, layout + '_layout.yaml')
+    if os.path.isfile(yaml_file):
+        return yaml_file
+    yaml_files = sorted(glob.glob(os.path.join(map_dir, '*.yaml')))
+    if len(yaml_files) != 1:
+        raise FileNotFoundError('cannot find map yaml file of layout {0} in {1}'.format(layout, map_dir))
+    return yaml_files[0]
+
+class LayoutArena():
+    """
+        LayoutArena class is an implementation to keep several layouts within one
+        gazebo world, each at its own far-apart offset along x axis, so switching
+        the layout only requires teleporting the robot
+
+        The map of the active layout is re-originated by the layout offset (map frame
+        stays the gazebo world frame) and served in place of map_server, amcl must be
+        launched with use_map_topic:=true to receive the map of every switch
+
+        Published Topics (per robot namespace, latched):
+        * /map, /map_metadata : map of the active layout
+
+        Served Services (per robot namespace):
+        * /static_map
+    """
+
+    def __init__(self, layouts: list, spacing: float = 100.0, robot_namespaces: list = None,
+                 package: str = 'indoor_layouts', frame_id: str = 'map'):
+        """
+        Initialize LayoutArena class
+
+        :param list layouts: names of the layouts (models of <package>/models with
+                    map in <package>/map/<layout>), first layout is at the world origin
+               float spacing: distance (in meters) between the offsets of adjacent layouts
+               list robot_namespaces: namespace of each robot, default is ['']
+               str package: ros package containing the layouts
+               str frame_id: global frame of the published map
+        """
+        super(LayoutArena, self).__init__()
+
+        if robot_namespaces is None:
+            robot_namespaces = ['']
+
+        self.__lock = threading.Lock()
+        # layout => {'offset': (x, y), 'grid': nav_msgs.msg.OccupancyGrid}
+        self.__layouts = OrderedDict()
+        for idx, layout in enumerate(layouts):
+            offset = (idx * spacing, 0.0)
+            map_data = load_map(get_layout_map_file(layout, package))
+            height, width = map_data['cells'].shape
+            if max(width, height) * map_data['resolution'] > spacing:
+                rospy.logwarn('layout {0} is larger than spacing {1} m, it overlaps adjacent layout'.format(
+                                layout, spacing))
+            self.__layouts[layout] = {
+                'offset': offset,
+                'grid': self.__grid_msg(map_data, offset, frame_id),
+            }
+
+        self.__active = None
+        self.__switches = 0
+        self.__switch_time = 0.0
+        self.__last_switch_time = 0.0
+
+        self.__map_pubs = []
+        self.__map_metadata_pubs = []
+        self.__services = []
+        for robot_ns in robot_namespaces:
+            self.__map_pubs.append(utils.create_publisher(utils.resolve_name(robot_ns, '/map'),
+                                   OccupancyGrid, queue_size = 1, latch = True))
+            self.__map_metadata_pubs.append(utils.create_publisher(utils.resolve_name(robot_ns, '/map_metadata'),
+                                            MapMetaData, queue_size = 1, latch = True))
+            self.__services.append(rospy.Service(utils.resolve_name(robot_ns, '/static_map'),
+                                                 GetMap, self.__static_map))
+
+    def get_layouts(self):
+        """
+        Gets the names of the layouts
+
+        :return list
+        """
+        return list(self.__layouts.keys())
+
+    def get_offset(self, layout: str = None):
+        """
+        Gets the world position (in meters) of the layout origin
+
+        :param str layout: name of the layout, default is the active layout
+        :return tuple (x, y), (0.0, 0.0) if no layout is active
+        """
+        if layout is None:
+            layout = self.__active
+        if layout is None:
+            return (0.0, 0.0)
+        return self.__layouts[layout]['offset']
+
+    def get_active_layout(self):
+        """
+        Active layout Getter
+
+        :return str or None if no layout is activated yet
+        """
+        return self.__active
+
+    def get_map_info(self, layout: str = None):
+        """
+        Gets the metadata of the re-originated map of the layout
+
+        :param str layout: name of the layout, default is the active layout
+        :return nav_msgs.msg._MapMetaData.MapMetaData
+        """
+        if layout is None:
+            layout = self.__active
+        return self.__layouts[layout]['grid'].info
+
+    def get_world_models(self):
+        """
+        Gets the layout models at their offsets
+
+        :return dict (model name => geometry_msgs.msg._Pose.Pose)
+        """
+        models = OrderedDict()
+        for layout, data in self.__layouts.items():
+            pose = Pose()
+            pose.position.x, pose.position.y = data['offset']
+            pose.orientation.w = 1.0
+            models[layout] = pose
+        return models
+
+    def activate(self, layout: str):
+        """
+        Make the layout active, its re-originated map is published
+        (nothing is done if layout is already active)
+
+        :param str layout: name of the layout
+        :return float (duration of the switch in seconds)
+        """
+        if layout not in self.__layouts:
+            raise KeyError('unknown layout {0}, available layouts are {1}'.format(
+                            layout, self.get_layouts()))
+        if layout == self.__active:
+            return 0.0
+
+        start = time.perf_counter()
+        grid = self.__layouts[layout]['grid']
+        for map_pub, map_metadata_pub in zip(self.__map_pubs, self.__map_metadata_pubs):
+            map_pub.publish(grid)
+            map_metadata_pub.publish(grid.info)
+        duration = time.perf_counter() - start
+
+        with self.__lock:
+            self.__active = layout
+            self.__switches += 1
+            self.__switch_time += duration
+            self.__last_switch_time = duration
+        rospy.logdebug('active layout: {0} at offset {1} ({2:.3f} sec)'.format(
+                        layout, self.__layouts[layout]['offset'], duration))
+        return duration
+
+    def get_stats(self):
+        """
+        Gets the layout switch statistics
+
+        :return dict
+        """
+        with self.__lock:
+            return {
+                'active': self.__active,
+                'switches': self.__switches,
+                'total_switch_time': self.__switch_time,
+                'last_switch_time': self.__last_switch_time,
+            }
+
+    def close(self):
+        """
+        Unregister the map publishers and services
+        """
+        for publisher in self.__map_pubs + self.__map_metadata_pubs:
+            publisher.unregister()
+        for service in self.__services:
+            service.shutdown()
+
+    @staticmethod
+    def __grid_msg(map_data: dict, offset: tuple, frame_id: str):
+        """
+        Create the map message of the layout, its origin is shifted by the layout offset
+
+        :param dict map_data: map loaded through kinematic_sim.load_map()
+               tuple offset: world position (x, y) of the layout origin
+               str frame_id: global frame of the map
+        :return nav_msgs.msg._OccupancyGrid.OccupancyGrid
+        """
+        cells = map_data['cells']
+        grid = OccupancyGrid()
+        grid.header.frame_id = frame_id
+        grid.info.map_load_time = rospy.Time.now()
+        grid.info.resolution = map_data['resolution']
+        grid.info.height, grid.info.width = cells.shape
+        grid.info.origin.position.x = map_data['origin'][0] + offset[0]
+        grid.info.origin.position.y = map_data['origin'][1] + offset[1]
+        (grid.info.origin.orientation.x, grid.info.origin.orientation.y,
+         grid.info.origin.orientation.z, grid.info.origin.orientation.w) = \
+                    msg_decoder.yaw_to_quaternion(map_data['origin'][2])
+        grid.data = cells.reshape(-1).tolist()
+        return grid
+
+    def __static_map(self, request):
+        """
+        This function is called when /static_map service is requested
+        """
+        response = GetMapResponse()
+        if self.__active is not None:
+            response.map = self.__layouts[self.__active]['grid']
+        return response
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+import rospy
+from openai_ros import utils
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from nav_msgs.msg import MapMetaData
+
+class MapCache():
+    """
+        MapCache class is an implementation to cache received maps keyed by map metadata,
+        latest metadata is tracked through latched /map_metadata topic
+    """
+
+    def __init__(self, topic_name: str = '/map_metadata', max_entries: int = 8):
+        """
+        Initialize MapCache class
+
+        :param str topic_name: name of the map metadata topic
+               int max_entries: maximum number of maps kept in cache
+        """
+        super(MapCache, self).__init__()
+
+        self.__lock = threading.Lock()
+        self.__max_entries = max_entries
+        # metadata key => (content hash, pojo.Map) in least recently used order
+        self.__entries = OrderedDict()
+        self.__latest_key = None
+        self.__hits = 0
+        self.__misses = 0
+
+        utils.create_subscriber(topic_name, MapMetaData, self.__map_metadata_callback)
+
+    @staticmethod
+    def metadata_key(resolution: float, width: int, height: int, origin, map_load_time):
+        """
+        Create the cache key from map metadata
+
+        :param float resolution: map resolution
+               int width: map width
+               int height: map height
+               sequence origin: map origin as (x, y, z, qx, qy, qz, qw)
+               tuple map_load_time: map load time as (secs, nsecs)
+        :return tuple
+        """
+        return (float(resolution), int(width), int(height),
+                tuple(float(value) for value in origin),
+                (int(map_load_time[0]), int(map_load_time[1])))
+
+    @staticmethod
+    def metadata_key_from_msg(info):
+        """
+        Create the cache key from map metadata message
+
+        :param nav_msgs.msg._MapMetaData.MapMetaData info: map metadata message
+        :return tuple
+        """
+        origin = info.origin
+        return MapCache.metadata_key(info.resolution, info.width, info.height,
+                    (origin.position.x, origin.position.y, origin.position.z,
+                     origin.orientation.x, origin.orientation.y,
+                     origin.orientation.z, origin.orientation.w),
+                    (info.map_load_time.secs, info.map_load_time.nsecs))
+
+    @staticmethod
+    def metadata_key_from_decoded(info):
+        """
+        Create the cache key from decoded map metadata
+
+        :param msg_decoder.MapMetaData info: decoded map metadata
+        :return tuple
+        """
+        return MapCache.metadata_key(info.resolution, info.width, info.height,
+                    tuple(info.origin['position']) + tuple(info.origin['orientation']),
+                    info.map_load_time)
+
+    def get(self):
+        """
+        Gets the cached map matching the latest map metadata
+
+        :return pojo.Map or None if the map need to be requested
+        """
+        with self.__lock:
+            key = self.__latest_key
+            if key is not None and key in self.__entries:
+                self.__hits += 1
+                self.__entries.move_to_end(key)
+                return self.__entries[key][1]
+            self.__misses += 1
+            return None
+
+    def put(self, key: tuple, map, cells):
+        """
+        Store the received map in cache, map with same content and geometry (size,
+        resolution and origin) as already cached map reuses the cached pojo.Map
+        (with its derived data)
+
+        :param tuple key: map metadata key
+               pojo.Map map: received map
+               numpy.ndarray cells: map grid cells used to compute content hash
+        :return pojo.Map
+        """
+        content_hash = hashlib.sha1(memoryview(cells).cast('B')).hexdigest()
+        with self.__lock:
+            for cached_hash, cached_map in self.__entries.values():
+                if cached_hash == content_hash and self.__is_same_geometry(cached_map, map):
+                    map = cached_map
+                    break
+
+            self.__entries[key] = (content_hash, map)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+            # map received through service/topic is newer than any metadata seen
+            self.__latest_key = key
+        return map
+
+    @staticmethod
+    def __is_same_geometry(map_a, map_b):
+        """
+        Checks whether both maps place their cells at the same world positions, maps of
+        identical cells but different resolution or origin must not share derived data
+
+        :param pojo.Map map_a: map
+               pojo.Map map_b: map
+        :return bool
+        """
+        origin_a = map_a.get_origin()
+        origin_b = map_b.get_origin()
+        return map_a.get_size() == map_b.get_size() and \
+                map_a.get_scale() == map_b.get_scale() and \
+                np.array_equal(origin_a.get_position(), origin_b.get_position()) and \
+                np.array_equal(origin_a.get_quaternion(), origin_b.get_quaternion())
+
+    def get_latest_key(self):
+        """
+        Gets the key of the latest map metadata
+
+        :return tuple or None if no metadata is received yet
+        """
+        with self.__lock:
+            return self.__latest_key
+
+    def get_content_hash(self, key: tuple):
+        """
+        Gets the content hash of the cached map
+
+        :param tuple key: map metadata key
+        :return str or None
+        """
+        with self.__lock:
+            if key in self.__entries:
+                return self.__entries[key][0]
+            return None
+
+    def get_stats(self):
+        """
+        Gets the cache hit and miss counters
+
+        :return dict
+        """
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'entries': len(self.__entries),
+            }
+
+    def __map_metadata_callback(self, data):
+        """
+        This function is called when map metadata is received
+
+        :param nav_msgs.msg._MapMetaData.MapMetaData data: map metadata message
+        """
+        key = self.metadata_key_from_msg(data)
+        with self.__lock:
+            self.__latest_key = key
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+
+import rospy
+import rospkg
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+try:
+    import xacro
+except ImportError:
+    # expanded through xacro command line instead
+    xacro = None
+
+# persisted expanded urdf: <cache dir>/<key hash>.json
+DEFAULT_URDF_CACHE_DIR = os.path.join(os.environ.get('ROS_HOME', os.path.join(os.path.expanduser('~'), '.ros')),
+                                      'openai_ros', 'urdf')
+
+# package name => package path, resolved once per process (rospkg crawls the ROS_PACKAGE_PATH)
+_package_paths = {}
+_package_lock = threading.Lock()
+
+def get_package_path(package: str):
+    """
+    Gets the path of the ros package, resolved through rospkg only once per process
+
+    :param str package: name of ros package
+    :return str
+    """
+    with _package_lock:
+        if package not in _package_paths:
+            _package_paths[package] = rospkg.RosPack().get_path(package)
+        return _package_paths[package]
+
+class ModelDescriptionCache():
+    """
+        ModelDescriptionCache class is an implementation to cache the preprocessed
+        model descriptions (model.sdf of <package>/<models_dir>/<model_name>) keyed by
+        model name, cached description is reloaded once its file modification time changes
+    """
+
+    def __init__(self, package: str = 'indoor_layouts', models_dir: str = 'models',
+                 preload: list = None, revalidate_interval: float = 1.0):
+        """
+        Initialize ModelDescriptionCache class
+
+        :param str package: ros package containing the models
+               str models_dir: directory of the models within the package
+               list preload: model names loaded at construction
+               float revalidate_interval: minimum time (in seconds) between file modification
+                     time checks of a cached model (0.0 => check on every access)
+        """
+        super(ModelDescriptionCache, self).__init__()
+
+        self.__lock = threading.Lock()
+        self.__package = package
+        self.__models_dir = models_dir
+        self.__revalidate_interval = revalidate_interval
+        # model name => [description, file path, modification time, last validation time]
+        self.__entries = {}
+        self.__hits = 0
+        self.__misses = 0
+        self.__invalidations = 0
+
+        for model_name in preload or []:
+            try:
+                self.get_sdf(model_name)
+            except (OSError, rospkg.ResourceNotFound) as e:
+                rospy.logwarn('cannot preload model {0}: {1}'.format(model_name, e))
+
+    def get_model_path(self, model_name: str):
+        """
+        Gets the path of model.sdf of the model
+
+        :param str model_name: name of the model (directory within models_dir)
+        :return str
+        """
+        return os.path.join(get_package_path(self.__package), self.__models_dir, model_name, 'model.sdf')
+
+    def get_sdf(self, model_name: str):
+        """
+        Gets the model description (newlines stripped) of the model
+
+        :param str model_name: name of the model (directory within models_dir)
+        :return str
+        """
+        now = time.monotonic()
+        with self.__lock:
+            entry = self.__entries.get(model_name)
+            if entry is not None and now - entry[3] < self.__revalidate_interval:
+                self.__hits += 1
+                return entry[0]
+            if entry is not None:
+                # claim the check, concurrent callers (eg. robots resetting together)
+                # skip the stat within the interval instead of repeating it
+                entry[3] = now
+
+        file_path = entry[1] if entry is not None else self.get_model_path(model_name)
+        mtime = os.stat(file_path).st_mtime_ns
+        with self.__lock:
+            if entry is not None and entry[2] == mtime:
+                self.__hits += 1
+                return entry[0]
+            if entry is not None:
+                self.__invalidations += 1
+            self.__misses += 1
+
+        with open(file_path, 'r') as f:
+            # this should be an urdf or gazebo xml
+            description = f.read().replace('\n', '')
+        with self.__lock:
+            self.__entries[model_name] = [description, file_path, mtime, time.monotonic()]
+        return description
+
+    def invalidate(self, model_name: str = None):
+        """
+        Drop the cached description of the model (all models if None)
+
+        :param str model_name: name of the model
+        """
+        with self.__lock:
+            if model_name is None:
+                self.__invalidations += len(self.__entries)
+                self.__entries.clear()
+            elif self.__entries.pop(model_name, None) is not None:
+                self.__invalidations += 1
+
+    def get_stats(self):
+        """
+        Gets the cache statistics
+
+        :return dict
+        """
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'invalidations': self.__invalidations,
+                'models': sorted(self.__entries.keys()),
+            }
+
+class UrdfCache():
+    """
+        UrdfCache class is an implementation to cache the expanded urdf of xacro files
+        in memory and on disk keyed by the xacro file and its arguments, cached urdf
+        is expanded again once modification time of any file of its include tree changes
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_URDF_CACHE_DIR, revalidate_interval: float = 1.0):
+        """
+        Initialize UrdfCache class
+
+        :param str cache_dir: directory of persisted expanded urdf (None => memory only)
+               float revalidate_interval: minimum time (in seconds) between modification
+                     time checks of the include tree of a cached urdf (0.0 => check on every access)
+        """
+        super(UrdfCache, self).__init__()
+
+        self.__lock = threading.Lock()
+        self.__cache_dir = cache_dir
+        self.__revalidate_interval = revalidate_interval
+        # key => [urdf, {file path: modification time}, last validation time]
+        self.__entries = {}
+        self.__hits = 0
+        self.__disk_hits = 0
+        self.__misses = 0
+        self.__expand_time = 0.0
+
+    def get_urdf(self, xacro_file: str, mappings: dict = None):
+        """
+        Gets the expanded urdf (newlines stripped) of the xacro file
+
+        :param str xacro_file: path of xacro file
+               dict mappings: xacro arguments (name => value)
+        :return str
+        """
+        mappings = {str(name): str(value) for name, value in (mappings or {}).items()}
+        key = json.dumps([os.path.abspath(xacro_file), sorted(mappings.items())])
+        now = time.monotonic()
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            is_recent = entry is not None and now - entry[2] < self.__revalidate_interval
+            if entry is not None and not is_recent:
+                # claim the check, concurrent callers skip the stat within the interval
+                entry[2] = now
+        if entry is not None and (is_recent or self.__is_valid(entry[1])):
+            with self.__lock:
+                self.__hits += 1
+            return entry[0]
+
+        entry = self.__load(key)
+        if entry is not None:
+            with self.__lock:
+                self.__disk_hits += 1
+        else:
+            start = time.perf_counter()
+            urdf, dependencies = self.__expand(xacro_file, mappings)
+            entry = [urdf.replace('\n', ''), self.__mtimes(dependencies), now]
+            with self.__lock:
+                self.__misses += 1
+                self.__expand_time += time.perf_counter() - start
+            self.__save(key, entry)
+
+        # expansion may take longer than the interval, time the check from its end
+        entry[2] = time.monotonic()
+        with self.__lock:
+            self.__entries[key] = entry
+        return entry[0]
+
+    def get_stats(self):
+        """
+        Gets the cache statistics
+
+        :return dict
+        """
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'disk_hits': self.__disk_hits,
+                'misses': self.__misses,
+                'expand_time': self.__expand_time,
+            }
+
+    @staticmethod
+    def __mtimes(file_paths):
+        """
+        Gets the modification time of the files (None for missing file)
+
+        :return dict (file path => modification time)
+        """
+        mtimes = {}
+        for file_path in file_paths:
+            try:
+                mtimes[file_path] = os.stat(file_path).st_mtime_ns
+            except OSError:
+                mtimes[file_path] = None
+        return mtimes
+
+    def __is_valid(self, mtimes: dict):
+        """
+        Checks whether none of the files of the include tree has changed
+        """
+        return self.__mtimes(mtimes.keys()) == mtimes
+
+    def __expand(self, xacro_file: str, mappings: dict):
+        """
+        Expand the xacro file, in-process if xacro module is available
+
+        :return str (urdf), list (files of include tree)
+        """
+        if xacro is not None:
+            # included files are collected by xacro while processing
+            xacro.all_includes = []
+            doc = xacro.process_file(xacro_file, mappings = mappings)
+            dependencies = [os.path.abspath(xacro_file)] + \
+                           [os.path.abspath(file_path) for file_path in xacro.all_includes]
+            return doc.toprettyxml(indent = '  '), dependencies
+
+        # include tree is unknown, only the xacro file itself is tracked
+        args = ['{0}:={1}'.format(name, value) for name, value in sorted(mappings.items())]
+        urdf = subprocess.run(['rosrun', 'xacro', 'xacro', xacro_file] + args, check = True,
+                              stdout = subprocess.PIPE, universal_newlines = True).stdout
+        return urdf, [os.path.abspath(xacro_file)]
+
+    def __file_path(self, key: str):
+        """
+        Gets the path of persisted entry of the key
+        """
+        return os.path.join(self.__cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def __load(self, key: str):
+        """
+        Load the persisted entry of the key if its include tree is unchanged
+
+        :return list or None
+        """
+        if self.__cache_dir is None:
+            return None
+        try:
+            with open(self.__file_path(key), 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('key') != key or not self.__is_valid(data['mtimes']):
+            return None
+        return [data['urdf'], data['mtimes'], 0.0]
+
+    def __save(self, key: str, entry: list):
+        """
+        Persist the entry of the key
+        """
+        if self.__cache_dir is None:
+            return
+        file_path = self.__file_path(key)
+        try:
+            os.makedirs(self.__cache_dir, exist_ok=True)
+            # write to temporary file first, concurrent readers never see partial file
+            tmp_path = '{0}.{1}.tmp'.format(file_path, os.getpid())
+            with open(tmp_path, 'w') as f:
+                json.dump({'key': key, 'urdf': entry[0], 'mtimes': entry[1]}, f)
+            os.replace(tmp_path, file_path)
+        except OSError as e:
+            rospy.logwarn('cannot persist expanded urdf {0}: {1}'.format(file_path, e))
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+
+import struct
+import numpy as np
+from collections import namedtuple
+
+# ros1 serialization is little-endian, geometry_msgs/Pose => position (x, y, z) + orientation (x, y, z, w)
+POSE_DTYPE = np.dtype([('position', '<f8', (3,)), ('orientation', '<f8', (4,))])
+COVARIANCE_DTYPE = np.dtype(('<f8', (6, 6)))
+
+Header = namedtuple('Header', ['seq', 'secs', 'nsecs', 'frame_id'])
+
+_uint32 = struct.Struct('<I')
+_header = struct.Struct('<3I')
+
+def decode_header(buff, offset: int = 0):
+    """
+    Decode the std_msgs/Header from the serialized message buffer
+
+    :param bytes buff: serialized message buffer
+           int offset: position of the header within the buffer
+    :return Header, int (offset after the header)
+    """
+
+    seq, secs, nsecs = _header.unpack_from(buff, offset)
+    offset += _header.size
+    length, = _uint32.unpack_from(buff, offset)
+    offset += _uint32.size
+    frame_id = bytes(buff[offset:offset + length]).decode('utf-8')
+    offset += length
+
+    return Header(seq, secs, nsecs, frame_id), offset
+
+def decode_poses(buff, offset: int = 0):
+    """
+    Map the geometry_msgs/Pose[] array from the serialized message buffer onto
+    a numpy structured array without copying
+
+    :param bytes buff: serialized message buffer
+           int offset: position of the pose array within the buffer
+    :return numpy.ndarray (read-only view with POSE_DTYPE), int (offset after the array)
+    """
+
+    count, = _uint32.unpack_from(buff, offset)
+    offset += _uint32.size
+    poses = np.frombuffer(buff, dtype=POSE_DTYPE, count=count, offset=offset)
+    offset += count * POSE_DTYPE.itemsize
+
+    return poses, offset
+
+def quaternion_to_yaw(quaternions, out=None):
+    """
+    Compute the yaw (rotation about z-axis) for an array of quaternions,
+    quaternions need not be normalized
+
+    :param numpy.ndarray quaternions: (N, 4) quaternions as (x, y, z, w)
+           numpy.ndarray out: optional output array of shape (N,)
+    :return numpy.ndarray
+    """
+
+    qx = quaternions[..., 0]
+    qy = quaternions[..., 1]
+    qz = quaternions[..., 2]
+    qw = quaternions[..., 3]
+
+    siny_cosp = 2.0 * (qw * qz + qx * qy)
+    cosy_cosp = qw * qw + qx * qx - qy * qy - qz * qz
+    return np.arctan2(siny_cosp, cosy_cosp, out=out)
+
+def decode_pose_array(buff):
+    """
+    Decode the serialized geometry_msgs/PoseArray message
+
+    :param bytes buff: serialized message buffer
+    :return Header, numpy.ndarray (read-only view with POSE_DTYPE)
+    """
+
+    header, offset = decode_header(buff)
+    poses, _ = decode_poses(buff, offset)
+
+    return header, poses
+
+def decode_particle_cloud(buff, out=None):
+    """
+    Decode the serialized geometry_msgs/PoseArray message (amcl particle cloud)
+    into a (N, 3) array of [x, y, yaw] rows
+
+    :param bytes buff: serialized message buffer
+           numpy.ndarray out: preallocated float32 (max_particles, 3) array, a new one
+                is allocated if it is missing or too small
+    :return Header, numpy.ndarray (view of first N rows of out)
+    """
+
+    header, poses = decode_pose_array(buff)
+    count = poses.shape[0]
+
+    if out is None or out.shape[0] < count:
+        out = np.empty((count, 3), dtype=np.float32)
+    particles = out[:count]
+    particles[:, 0] = poses['position'][:, 0]
+    particles[:, 1] = poses['position'][:, 1]
+    particles[:, 2] = quaternion_to_yaw(poses['orientation'])
+
+    return header, particles
+
+def decode_pose_with_covariance_stamped(buff):
+    """
+    Decode the serialized geometry_msgs/PoseWithCovarianceStamped message (amcl pose)
+
+    :param bytes buff: serialized message buffer
+    :return Header, numpy.ndarray (pose with POSE_DTYPE), numpy.ndarray (6x6 covariance)
+    """
+
+    header, offset = decode_header(buff)
+    pose = np.frombuffer(buff, dtype=POSE_DTYPE, count=1, offset=offset)[0]
+    offset += POSE_DTYPE.itemsize
+    covariance = np.frombuffer(buff, dtype=COVARIANCE_DTYPE, count=1, offset=offset)[0]
+
+    return header, pose, covariance
+
+MapMetaData = namedtuple('MapMetaData', ['map_load_time', 'resolution', 'width', 'height', 'origin'])
+
+_map_meta_data = struct.Struct('<2IfII')
+
+def decode_map_meta_data(buff, offset: int = 0):
+    """
+    Decode the nav_msgs/MapMetaData from the serialized message buffer
+
+    :param bytes buff: serialized message buffer
+           int offset: position of the map meta data within the buffer
+    :return MapMetaData, int (offset after the map meta data)
+    """
+
+    secs, nsecs, resolution, width, height = _map_meta_data.unpack_from(buff, offset)
+    offset += _map_meta_data.size
+    origin = np.frombuffer(buff, dtype=POSE_DTYPE, count=1, offset=offset)[0]
+    offset += POSE_DTYPE.itemsize
+
+    return MapMetaData((secs, nsecs), resolution, width, height, origin), offset
+
+def decode_occupancy_grid(buff):
+    """
+    Decode the serialized nav_msgs/OccupancyGrid message, grid cells are
+    mapped onto a read-only int8 array without copying
+
+    :param bytes buff: serialized message buffer
+    :return Header, MapMetaData, numpy.ndarray (int8 cells)
+    """
+
+    header, offset = decode_header(buff)
+    info, offset = decode_map_meta_data(buff, offset)
+    count, = _uint32.unpack_from(buff, offset)
+    offset += _uint32.size
+    cells = np.frombuffer(buff, dtype=np.int8, count=count, offset=offset)
+
+    return header, info, cells
+
+def encode_header(header: Header):
+    """
+    Encode the std_msgs/Header into serialized message buffer
+
+    :param Header header: message header
+    :return bytes
+    """
+
+    frame_id = header.frame_id.encode('utf-8')
+    return _header.pack(header.seq, header.secs, header.nsecs) + \
+                _uint32.pack(len(frame_id)) + frame_id
+
+def yaw_to_quaternion(yaws, out=None):
+    """
+    Compute the quaternions (rotation about z-axis) for an array of yaws
+
+    :param numpy.ndarray yaws: (N,) yaw angles
+           numpy.ndarray out: optional output array of shape (N, 4)
+    :return numpy.ndarray (N, 4) quaternions as (x, y, z, w)
+    """
+
+    yaws = np.asarray(yaws, dtype=np.float64)
+    if out is None:
+        out = np.zeros(yaws.shape + (4,), dtype=np.float64)
+    else:
+        out[..., 0:2] = 0.0
+    half_yaws = 0.5 * yaws
+    np.sin(half_yaws, out=out[..., 2])
+    np.cos(half_yaws, out=out[..., 3])
+    return out
+
+def encode_particle_cloud(header: Header, particles):
+    """
+    Encode the (N, 3) array of [x, y, yaw] rows into serialized
+    geometry_msgs/PoseArray message (amcl particle cloud)
+
+    :param Header header: message header
+           numpy.ndarray particles: (N, 3) array of [x, y, yaw] rows
+    :return bytes
+    """
+
+    count = particles.shape[0]
+    poses = np.zeros(count, dtype=POSE_DTYPE)
+    poses['position'][:, 0] = particles[:, 0]
+    poses['position'][:, 1] = particles[:, 1]
+    yaw_to_quaternion(particles[:, 2], out=poses['orientation'])
+
+    return encode_header(header) + _uint32.pack(count) + poses.tobytes()
+
+def encode_pose_with_covariance_stamped(header: Header, pose, covariance):
+    """
+    Encode the serialized geometry_msgs/PoseWithCovarianceStamped message (amcl pose)
+
+    :param Header header: message header
+           sequence pose: pose as (x, y, z, qx, qy, qz, qw)
+           sequence covariance: 6x6 covariance (row-major)
+    :return bytes
+    """
+
+    pose = np.asarray(pose, dtype='<f8').reshape(7)
+    covariance = np.asarray(covariance, dtype='<f8').reshape(36)
+
+    return encode_header(header) + pose.tobytes() + covariance.tobytes()
+
+def encode_occupancy_grid(header: Header, info: MapMetaData, cells):
+    """
+    Encode the serialized nav_msgs/OccupancyGrid message
+
+    :param Header header: message header
+           MapMetaData info: map meta data, origin as (x, y, z, qx, qy, qz, qw)
+           numpy.ndarray cells: int8 grid cells (row-major, starting at origin)
+    :return bytes
+    """
+
+    origin = np.asarray(info.origin, dtype='<f8').reshape(7)
+    cells = np.ascontiguousarray(cells, dtype=np.int8).reshape(-1)
+
+    return encode_header(header) + \
+                _map_meta_data.pack(info.map_load_time[0], info.map_load_time[1],
+                                    info.resolution, info.width, info.height) + \
+                origin.tobytes() + _uint32.pack(cells.shape[0]) + cells.tobytes()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+import rospy
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from openai_ros.gazebo_connection import GazeboConnection
+from openai_ros.profiler import StepProfiler
+from openai_ros.task_envs.turtlebot3.turtlebot3_localize import TurtleBot3LocalizeEnv
+
+class MultiRobotEnv():
+    """
+        MultiRobotEnv class is an implementation to drive K namespaced robots within
+        a single gazebo world, with one pause/unpause cycle per batched step
+    """
+
+    def __init__(self, robot_namespaces: list, env_class = TurtleBot3LocalizeEnv, env_kwargs: dict = None,
+                 reset_type: str = 'SIMULATION', profile: bool = False, metrics_file: str = None):
+        """
+        Initialize MultiRobotEnv class
+
+        :param list robot_namespaces: namespace (also gazebo model name) of each robot, eg. ['tb3_0', 'tb3_1']
+               class env_class: robot environment class accepting robot_ns and gazebo arguments
+               dict env_kwargs: additional keyword arguments for each robot environment
+               str reset_type: possible values are: ['SIMULATION', 'WORLD']
+               bool profile: whether to time the phases of batched step() and reset()
+               str metrics_file: path of prometheus text format file for phase latencies
+        """
+        super(MultiRobotEnv, self).__init__()
+
+        env_kwargs = env_kwargs or {}
+        self.profiler = StepProfiler(enabled = profile, metrics_file = metrics_file)
+
+        # single connection to the shared world, robots are never removed on reset
+        self.gazebo = GazeboConnection(reset_type = reset_type,
+                                       init_models = ['ground_plane'] + list(robot_namespaces))
+        self._agents = [env_class(robot_ns = robot_ns, gazebo = self.gazebo, **env_kwargs)
+                        for robot_ns in robot_namespaces]
+        self._num_agents = len(self._agents)
+        self.observation_space = self._agents[0].observation_space
+        self.action_space = self._agents[0].action_space
+
+        self.__executor = ThreadPoolExecutor(max_workers = self._num_agents)
+        self.__total_steps = 0
+        self.__step_time = 0.0
+
+        rospy.loginfo('status: MultiRobotEnv with %d robots is ready', self._num_agents)
+
+    def get_agents(self):
+        """
+        Robot environments Getter
+        """
+        return self._agents
+
+    def get_num_agents(self):
+        """
+        Number of robots Getter
+        """
+        return self._num_agents
+
+    def reset(self):
+        """
+        Reset the shared world once and all robot environments
+
+        :return list (observation per robot)
+        """
+
+        profiler = self.profiler
+        with profiler.section('reset'):
+            # pre-reset tasks
+            with profiler.phase('reset', 'unpause_sim'):
+                self.gazebo.unpause_sim()
+            with profiler.phase('reset', 'set_init_pose'):
+                self.__run_agents(lambda agent, _: (agent._check_all_systems_are_ready(),
+                                                    agent._set_init_pose()))
+            with profiler.phase('reset', 'pause_sim'):
+                self.gazebo.pause_sim()
+
+            # world models are shared so they are reset only once
+            self._agents[0]._reset_world()
+
+            # set environment variables each time we reset
+            with profiler.phase('reset', 'init_env_variables'):
+                for agent in self._agents:
+                    agent._init_env_variables()
+
+            # check if everything working fine after reset
+            with profiler.phase('reset', 'unpause_sim'):
+                self.gazebo.unpause_sim()
+            with profiler.phase('reset', 'check_all_systems'):
+                self.__run_agents(lambda agent, _: agent._check_all_systems_are_ready())
+            with profiler.phase('reset', 'pause_sim'):
+                self.gazebo.pause_sim()
+
+            with profiler.phase('reset', 'get_obs'):
+                obs = [agent._get_obs() for agent in self._agents]
+
+        rospy.loginfo('status: environment is reset')
+        return obs
+
+    def step(self, actions):
+        """
+        Execute one action per robot concurrently within a single pause/unpause cycle
+
+        :param sequence actions: one action per robot
+        :return list (observations), numpy.ndarray (rewards), numpy.ndarray (dones), list (infos)
+        """
+
+        start_time = time.monotonic()
+        profiler = self.profiler
+        with profiler.section('step'):
+            with profiler.phase('step', 'unpause_sim'):
+                self.gazebo.unpause_sim()
+            with profiler.phase('step', 'set_action'):
+                self.__run_agents(lambda agent, action: (agent._set_action(action),
+                                                         agent._check_all_systems_are_ready()),
+                                  actions)
+            with profiler.phase('step', 'pause_sim'):
+                self.gazebo.pause_sim()
+
+            # compute the required fields
+            obs = []
+            rewards = np.zeros(self._num_agents, dtype=np.float64)
+            dones = np.zeros(self._num_agents, dtype=bool)
+            infos = []
+            with profiler.phase('step', 'compute_reward'):
+                for idx, agent in enumerate(self._agents):
+                    agent_obs = agent._get_obs()
+                    dones[idx] = agent._is_done()
+                    rewards[idx] = agent._compute_reward(agent_obs, dones[idx])
+                    obs.append(agent_obs)
+                    infos.append(agent._get_info())
+
+        if profiler.is_enabled():
+            for info in infos:
+                info['profile'] = profiler.get_last('step')
+
+        self.__total_steps += self._num_agents
+        self.__step_time += time.monotonic() - start_time
+        return obs, rewards, dones, infos
+
+    def get_stats(self):
+        """
+        Gets the aggregate throughput over all robots
+
+        :return dict
+        """
+        return {
+            'agent_steps': self.__total_steps,
+            'agent_steps_per_sec': self.__total_steps / max(self.__step_time, 1e-9),
+        }
+
+    def render(self, mode='human'):
+        """
+        Render all robot environments
+        """
+        for agent in self._agents:
+            agent.render(mode)
+
+    def close(self):
+        """
+        Close all robot environments
+        """
+        try:
+            self.profiler.flush()
+        finally:
+            self.__executor.shutdown()
+            self.__close_agents(self._agents)
+
+    def __close_agents(self, agents: list):
+        """
+        Close the robot environments, remaining ones are closed even if one fails
+
+        :param list agents: robot environments
+        """
+        if not agents:
+            return
+        try:
+            agents[0].close()
+        finally:
+            self.__close_agents(agents[1:])
+
+    def __run_agents(self, func, actions = None):
+        """
+        Run the function for every robot concurrently and wait for all of them
+
+        :param callable func: function taking (robot environment, action)
+               sequence actions: one action per robot
+        """
+        if actions is None:
+            actions = [None] * self._num_agents
+        futures = [self.__executor.submit(func, agent, action)
+                   for agent, action in zip(self._agents, actions)]
+        for future in futures:
+            # re-raise exception of the robot environment
+            future.result()
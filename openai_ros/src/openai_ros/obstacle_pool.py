@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+
+import rospy
+from gazebo_msgs.msg import ModelState
+from geometry_msgs.msg import Pose
+import threading
+import time
+import numpy as np
+
+# static primitive obstacle, geometry is placed on the ground
+OBSTACLE_SDF = '<?xml version="1.0"?>' \
+               '<sdf version="1.6"><model name="{name}"><static>true</static>' \
+               '<link name="link"><pose>0 0 {half_height} 0 0 0</pose>' \
+               '<collision name="collision"><geometry>{geometry}</geometry></collision>' \
+               '<visual name="visual"><geometry>{geometry}</geometry></visual>' \
+               '</link></model></sdf>'
+
+def sample_free_positions(map, radii, rng = None, keep_out: list = None, keep_out_radius: float = 0.5,
+                          margin: float = 0.05):
+    """
+    Sample random non-overlapping positions of circular objects in free space of the map
+
+    :param pojo.Map map: map (positions are sampled from its free cells)
+           radii: radius (in meters) of each object
+           numpy.random.Generator rng: random generator
+           list keep_out: world positions (x, y) objects must stay away from
+           float keep_out_radius: minimum distance (in meters) between keep out position and object
+           float margin: minimum distance (in meters) between object and walls or other objects
+    :return numpy.ndarray ((num objects, 2) world positions, nan if not placed)
+    """
+    radii = np.asarray(radii, dtype=np.float64).reshape(-1)
+    if rng is None:
+        rng = np.random.default_rng()
+    max_radius = float(np.max(radii)) if radii.shape[0] > 0 else 0.0
+    rows, cols = np.nonzero(map.get_free_mask() & (map.get_distance_field() >= max_radius + margin))
+    return _sample_positions(map, rows, cols, radii, rng, keep_out, keep_out_radius, margin)
+
+def _sample_positions(map, rows, cols, radii, rng, keep_out, keep_out_radius: float, margin: float):
+    """
+    Sample positions among the candidate cells, rejecting the ones overlapping
+    keep out positions or already placed objects
+
+    :return numpy.ndarray ((num objects, 2) world positions, nan if not placed)
+    """
+    positions = np.full((radii.shape[0], 2), np.nan)
+    if rows.shape[0] == 0:
+        return positions
+
+    blocked = np.asarray(keep_out if keep_out is not None else [], dtype=np.float64).reshape(-1, 2)
+    blocked_radii = np.full(blocked.shape[0], keep_out_radius - margin)
+    # oversampled candidates, rejected if overlapping already placed objects
+    samples = rng.integers(rows.shape[0], size = 8 * max(radii.shape[0], 1))
+    xs, ys = map.grid_to_world(cols[samples] + 0.5, rows[samples] + 0.5)
+    sample_idx = 0
+    for idx, radius in enumerate(radii):
+        while sample_idx < xs.shape[0]:
+            x, y = xs[sample_idx], ys[sample_idx]
+            sample_idx += 1
+            distances = np.hypot(blocked[:, 0] - x, blocked[:, 1] - y)
+            if np.all(distances >= blocked_radii + radius + margin):
+                positions[idx] = (x, y)
+                blocked = np.vstack([blocked, [[x, y]]])
+                blocked_radii = np.append(blocked_radii, radius)
+                break
+    return positions
+
+class ObstaclePool():
+    """
+        ObstaclePool class is an implementation to randomize obstacles without spawn/delete,
+        a fixed set of obstacle models is spawned once and parked outside of the arena,
+        active obstacles are teleported (set_model_state) to free space of the map
+    """
+
+    SHAPES = ('box', 'cylinder')
+
+    def __init__(self, gazebo, num_obstacles: int = 8, shapes: tuple = SHAPES, size: float = 0.3,
+                 height: float = 0.5, park_position: tuple = (-100.0, -100.0), park_spacing: float = 1.0,
+                 prefix: str = 'obstacle', seed: int = None):
+        """
+        Initialize ObstaclePool class, obstacles are spawned parked
+
+        :param GazeboConnection gazebo: connection (or KinematicConnection) of the world
+               int num_obstacles: number of pooled obstacles
+               tuple shapes: shapes ('box' or 'cylinder') assigned to the obstacles in turn
+               float size: side of box / diameter of cylinder (in meters)
+               float height: height of obstacles (in meters)
+               tuple park_position: world position (x, y) of the first parked obstacle,
+                     must be outside of the arena
+               float park_spacing: distance (in meters) between parked obstacles
+               str prefix: prefix of the obstacle model names (<prefix>_<idx>)
+               int seed: random seed
+        """
+        super(ObstaclePool, self).__init__()
+
+        self.__lock = threading.Lock()
+        self.__gazebo = gazebo
+        self.__rng = np.random.default_rng(seed)
+        self.__model_names = ['{0}_{1}'.format(prefix, idx) for idx in range(num_obstacles)]
+        # radius of bounding circle of each obstacle
+        self.__radii = np.empty(num_obstacles, dtype=np.float64)
+        self.__park_positions = np.stack([
+            park_position[0] + park_spacing * np.arange(num_obstacles),
+            np.full(num_obstacles, park_position[1])], axis=1)
+        # world positions of active obstacles (nan if parked)
+        self.__positions = np.full((num_obstacles, 2), np.nan)
+        # map, clearance and (rows, cols) of the cells positions are sampled from
+        self.__candidates = (None, None, None)
+        self.__last_report = None
+        self.__episodes = 0
+        self.__total_duration = 0.0
+
+        for idx, model_name in enumerate(self.__model_names):
+            shape = shapes[idx % len(shapes)]
+            if shape == 'box':
+                geometry = '<box><size>{0} {0} {1}</size></box>'.format(size, height)
+                self.__radii[idx] = size * np.sqrt(0.5)
+            elif shape == 'cylinder':
+                geometry = '<cylinder><radius>{0}</radius><length>{1}</length></cylinder>'.format(
+                                0.5 * size, height)
+                self.__radii[idx] = 0.5 * size
+            else:
+                raise ValueError('unknown obstacle shape {0}, possible values are {1}'.format(
+                                  shape, self.SHAPES))
+            model_xml = OBSTACLE_SDF.format(name = model_name, half_height = 0.5 * height,
+                                            geometry = geometry)
+            gazebo.spawn_sdf_model(model_name, self.__pose(*self.__park_positions[idx]),
+                                   model_xml = model_xml)
+
+    def get_model_names(self):
+        """
+        Gets the model names of the pooled obstacles
+
+        :return list
+        """
+        return list(self.__model_names)
+
+    def get_active(self):
+        """
+        Gets the active (not parked) obstacles
+
+        :return dict (model name => world position (x, y))
+        """
+        with self.__lock:
+            return {self.__model_names[idx]: (float(self.__positions[idx, 0]), float(self.__positions[idx, 1]))
+                    for idx in np.nonzero(~np.isnan(self.__positions[:, 0]))[0]}
+
+    def randomize(self, map, num_active: int = None, keep_out: list = None,
+                  keep_out_radius: float = 0.5, margin: float = 0.05):
+        """
+        Place randomly chosen obstacles at random collision free positions of the map,
+        remaining obstacles are parked, only moved obstacles are teleported
+
+        :param pojo.Map map: map of the arena (positions are sampled from its free cells)
+               int num_active: number of obstacles to place, default is all obstacles
+               list keep_out: world positions (x, y) obstacles must stay away from (eg. robots)
+               float keep_out_radius: minimum distance (in meters) between keep out position
+                     and obstacle surface
+               float margin: minimum distance (in meters) between obstacle and walls or
+                     other obstacles
+        :return dict (report: 'active', 'parked' model name lists, 'sample_time', 'teleport_time', 'duration')
+        """
+
+        rospy.logdebug('ObstaclePool.randomize() start')
+        start = time.perf_counter()
+        num_obstacles = len(self.__model_names)
+        if num_active is None:
+            num_active = num_obstacles
+        num_active = min(num_active, num_obstacles)
+
+        # candidate cells are free and far enough from walls for the largest obstacle
+        max_radius = float(np.max(self.__radii)) if num_obstacles > 0 else 0.0
+        rows, cols = self.__get_candidates(map, max_radius + margin)
+        chosen = self.__rng.permutation(num_obstacles)[:num_active]
+        positions = np.full((num_obstacles, 2), np.nan)
+        positions[chosen] = _sample_positions(map, rows, cols, self.__radii[chosen], self.__rng,
+                                              keep_out, keep_out_radius, margin)
+        num_placed = int(np.count_nonzero(~np.isnan(positions[:, 0])))
+        if num_placed < num_active:
+            rospy.logwarn('only {0} of {1} obstacles are placed, not enough free space'.format(
+                            num_placed, num_active))
+        sample_time = time.perf_counter() - start
+
+        # teleport placed obstacles and park the previously active ones
+        active = []
+        parked = []
+        with self.__lock:
+            previous = self.__positions.copy()
+        for idx, model_name in enumerate(self.__model_names):
+            if not np.isnan(positions[idx, 0]):
+                self.__gazebo.set_model_state(self.__model_state(model_name, *positions[idx]))
+                active.append(model_name)
+            elif not np.isnan(previous[idx, 0]):
+                self.__gazebo.set_model_state(self.__model_state(model_name, *self.__park_positions[idx]))
+                parked.append(model_name)
+        duration = time.perf_counter() - start
+
+        report = {
+            'active': active,
+            'parked': parked,
+            'sample_time': sample_time,
+            'teleport_time': duration - sample_time,
+            'duration': duration,
+        }
+        with self.__lock:
+            self.__positions = positions
+            self.__last_report = report
+            self.__episodes += 1
+            self.__total_duration += duration
+        rospy.logdebug('obstacles randomized ({0:.3f} sec) active: {1} parked: {2}'.format(
+                        duration, active, parked))
+        return report
+
+    def park_all(self):
+        """
+        Park all active obstacles
+        """
+        with self.__lock:
+            previous = self.__positions.copy()
+            self.__positions[:] = np.nan
+        for idx in np.nonzero(~np.isnan(previous[:, 0]))[0]:
+            self.__gazebo.set_model_state(self.__model_state(self.__model_names[idx],
+                                                             *self.__park_positions[idx]))
+
+    def get_clearance(self, x, y):
+        """
+        Gets the distance to the nearest active obstacle (bounding circle) for the world positions
+
+        :param x: position(s) x in world frame (meters)
+               y: position(s) y in world frame (meters)
+        :return numpy.ndarray (meters, inf if no obstacle is active)
+        """
+        with self.__lock:
+            is_active = ~np.isnan(self.__positions[:, 0])
+            positions = self.__positions[is_active]
+            radii = self.__radii[is_active]
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        clearance = np.full(np.broadcast(x, y).shape, np.inf)
+        for (obstacle_x, obstacle_y), radius in zip(positions, radii):
+            np.minimum(clearance, np.hypot(x - obstacle_x, y - obstacle_y) - radius, out=clearance)
+        return clearance
+
+    def get_last_report(self):
+        """
+        Gets the report of the last randomization
+
+        :return dict or None if not yet randomized
+        """
+        with self.__lock:
+            return None if self.__last_report is None else dict(self.__last_report)
+
+    def get_stats(self):
+        """
+        Gets the per episode randomization statistics
+
+        :return dict
+        """
+        with self.__lock:
+            return {
+                'episodes': self.__episodes,
+                'total_duration': self.__total_duration,
+                'mean_duration': self.__total_duration / self.__episodes if self.__episodes > 0 else 0.0,
+            }
+
+    def __get_candidates(self, map, clearance: float):
+        """
+        Gets the cells (free and at least clearance away from occupied cells) positions
+        are sampled from, reused while the map and clearance are unchanged
+
+        :return numpy.ndarray (rows), numpy.ndarray (cols)
+        """
+        cached_map, cached_clearance, candidates = self.__candidates
+        if cached_map is not map or cached_clearance != clearance:
+            mask = map.get_free_mask() & (map.get_distance_field() >= clearance)
+            candidates = np.nonzero(mask)
+            self.__candidates = (map, clearance, candidates)
+        return candidates
+
+    @staticmethod
+    def __pose(x: float, y: float):
+        """
+        Create the pose at world position
+        """
+        pose = Pose()
+        pose.position.x = x
+        pose.position.y = y
+        pose.orientation.w = 1.0
+        return pose
+
+    def __model_state(self, model_name: str, x: float, y: float):
+        """
+        Create the model state at world position
+        """
+        model_state = ModelState()
+        model_state.model_name = model_name
+        model_state.pose = self.__pose(x, y)
+        return model_state
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from openai_ros import pojo
+
+def _wrap_angle(angle):
+    """
+    Wrap the angle(s) to [-pi, pi)
+    """
+    return np.mod(angle + np.pi, 2 * np.pi) - np.pi
+
+class ParticleFilter():
+    """
+        ParticleFilter class is an implementation of Monte Carlo localization (as amcl)
+        on pojo.Map, vectorized over all particles: odometry motion model, likelihood
+        field sensor model, low variance resampling and KLD adaptive number of particles
+
+        Default parameters are the ones of turtlebot3 amcl.launch
+    """
+
+    def __init__(self, map, min_particles: int = 500, max_particles: int = 3000,
+                 odom_alphas: tuple = (0.1, 0.1, 0.1, 0.1), z_hit: float = 0.5, z_rand: float = 0.5,
+                 sigma_hit: float = 0.2, likelihood_max_dist: float = 2.0, max_beams: int = 180,
+                 min_range: float = None, max_range: float = None, laser_pose: tuple = (0.0, 0.0, 0.0),
+                 update_min_d: float = 0.2, update_min_a: float = 0.2, resample_interval: int = 1,
+                 kld_err: float = 0.02, kld_z: float = 0.99, kld_bin_size: tuple = (0.5, 0.5, np.pi / 18),
+                 max_points: int = 1 << 20, seed: int = None):
+        """
+        Initialize ParticleFilter class
+
+        :param pojo.Map map: occupancy map
+               int min_particles: minimum number of particles
+               int max_particles: maximum number of particles
+               tuple odom_alphas: (alpha1, alpha2, alpha3, alpha4) noise of odometry motion model
+                     (rotation from rotation, rotation from translation,
+                      translation from translation, translation from rotation)
+               float z_hit: mixture weight of the hit component of the sensor model
+               float z_rand: mixture weight of the random component of the sensor model
+               float sigma_hit: standard deviation (in meters) of the hit component
+               float likelihood_max_dist: maximum distance (in meters) to obstacles in likelihood field
+               int max_beams: number of (evenly spaced) beams used per scan
+               float min_range: shorter beams are ignored, default is pojo.LaserScan._min_laser_value
+               float max_range: longer beams are ignored, default is pojo.LaserScan._max_laser_value
+               tuple laser_pose: [x, y, yaw] of laser in robot frame
+               float update_min_d: translation (in meters) required before filter update
+               float update_min_a: rotation (in radians) required before filter update
+               int resample_interval: number of filter updates between resampling
+               float kld_err: maximum error between true and estimated distribution
+               float kld_z: upper standard normal quantile for (1 - p) where p is the
+                     probability that error on estimated distribution is less than kld_err
+               tuple kld_bin_size: (x, y, yaw) size of histogram bins
+               int max_points: maximum number of beam endpoints evaluated at once (bounds the memory)
+               int seed: random seed
+        """
+        super(ParticleFilter, self).__init__()
+
+        laser_scan = pojo.LaserScan()
+        if min_range is None:
+            min_range = laser_scan._min_laser_value
+        if max_range is None:
+            max_range = laser_scan._max_laser_value
+
+        self._min_particles = min(min_particles, max_particles)
+        self._max_particles = max_particles
+        self._odom_alphas = odom_alphas
+        self._z_hit = z_hit
+        self._z_rand = z_rand
+        self._sigma_hit = sigma_hit
+        self._likelihood_max_dist = likelihood_max_dist
+        self._max_beams = max_beams
+        self._min_range = min_range
+        self._max_range = max_range
+        self._laser_pose = np.asarray(laser_pose, dtype=np.float64)
+        self._update_min_d = update_min_d
+        self._update_min_a = update_min_a
+        self._resample_interval = resample_interval
+        self._kld_err = kld_err
+        self._kld_z = kld_z
+        self._kld_bin_size = np.asarray(kld_bin_size, dtype=np.float64)
+        self._max_points = max_points
+        self._rng = np.random.default_rng(seed)
+
+        self._particles = np.zeros((max_particles, 3), dtype=np.float64)
+        self._weights = np.full(max_particles, 1.0 / max_particles, dtype=np.float64)
+        self._num_particles = max_particles
+
+        # odometry pose at the last filter update (None until first odometry is received)
+        self._update_odom = None
+        self._force_update = True
+        self._num_updates = 0
+
+        self._map = None
+        self.set_map(map)
+
+    def set_map(self, map):
+        """
+        Sets the map and precomputes its likelihood field, nothing is done if map is unchanged
+
+        :param pojo.Map map: occupancy map
+        """
+        if map is self._map:
+            return
+
+        self._map = map
+        self._scale = map.get_scale()
+        self._width, self._height = map.get_size()
+
+        # likelihood of beam endpoint per cell: amcl combines the beams as p = 1 + sum(pz^3)
+        distance = np.minimum(map.get_distance_field(), self._likelihood_max_dist)
+        pz = self._z_hit * np.exp(-(distance ** 2) / (2 * self._sigma_hit ** 2)) + \
+                self._z_rand / self._max_range
+        # one cell border for endpoints outside of the map (at maximum distance)
+        outside = self._z_hit * np.exp(-(self._likelihood_max_dist ** 2) / (2 * self._sigma_hit ** 2)) + \
+                self._z_rand / self._max_range
+        self._likelihood = np.pad(pz ** 3, 1, mode='constant', constant_values=outside ** 3) \
+                                .astype(np.float32).reshape(-1)
+
+        # free cells (grid coordinates) for global localization
+        rows, cols = np.nonzero(map.get_free_mask())
+        self._free_cells = np.column_stack([cols, rows]).astype(np.float64)
+
+    def get_map(self):
+        """
+        Occupancy map Getter
+        """
+        return self._map
+
+    def get_num_particles(self):
+        """
+        Number of (active) particles Getter
+        """
+        return self._num_particles
+
+    def get_num_updates(self):
+        """
+        Number of filter updates Getter
+        """
+        return self._num_updates
+
+    def get_weights(self):
+        """
+        Normalized particle weights Getter
+        """
+        return self._weights[:self._num_particles]
+
+    def get_particles(self, out=None):
+        """
+        Gets the particles as [x, y, yaw] rows (layout of decoded amcl particle cloud)
+
+        :param numpy.ndarray out: preallocated float32 (M, 3) buffer, particles are
+               copied into it if it is large enough
+        :return numpy.ndarray (float32 (N, 3))
+        """
+        particles = self._particles[:self._num_particles]
+        if out is None or out.shape[0] < particles.shape[0]:
+            return particles.astype(np.float32)
+        out[:particles.shape[0]] = particles
+        return out[:particles.shape[0]]
+
+    def set_initial_pose(self, pose, covariance):
+        """
+        Sample particles from gaussian around the initial pose (as /initialpose of amcl)
+
+        :param sequence pose: [x, y, yaw] in world frame
+               numpy.ndarray covariance: 6x6 covariance
+        """
+        covariance = np.asarray(covariance, dtype=np.float64).reshape(6, 6)
+        mean = np.asarray(pose, dtype=np.float64)
+        planar_covariance = covariance[np.ix_([0, 1, 5], [0, 1, 5])]
+        self._num_particles = self._max_particles
+        self._particles[:] = self._rng.multivariate_normal(mean, planar_covariance,
+                                                           size=self._num_particles)
+        self._particles[:, 2] = _wrap_angle(self._particles[:, 2])
+        self.__reinitialize()
+
+    def global_localization(self):
+        """
+        Sample particles uniformly over the free space (as /global_localization of amcl)
+        """
+        self._num_particles = self._max_particles
+        indices = self._rng.integers(0, self._free_cells.shape[0], size=self._num_particles)
+        cols, rows = (self._free_cells[indices] + self._rng.random((self._num_particles, 2))).T
+        self._particles[:, 0], self._particles[:, 1] = self._map.grid_to_world(cols, rows)
+        self._particles[:, 2] = self._rng.uniform(-np.pi, np.pi, size=self._num_particles)
+        self.__reinitialize()
+
+    def update(self, odom_pose, ranges=None, angle_min: float = 0.0, angle_increment: float = None):
+        """
+        Update the filter with the odometry pose and laser scan, as amcl the filter is
+        only updated once the robot moved at least update_min_d or update_min_a since
+        the last update (or after the initial pose is set)
+
+        :param sequence odom_pose: [x, y, yaw] of robot in odometry frame
+               ranges: laser scan ranges (None to only apply the motion)
+               float angle_min: angle of the first beam w.r.t laser heading
+               float angle_increment: angle between beams, default covers 360 degrees
+        :return bool (whether filter is updated)
+        """
+        odom_pose = np.asarray(odom_pose, dtype=np.float64)
+        if self._update_odom is None:
+            self._update_odom = odom_pose.copy()
+
+        delta = odom_pose - self._update_odom
+        delta[2] = _wrap_angle(delta[2])
+        if not self._force_update and abs(delta[0]) < self._update_min_d and \
+                abs(delta[1]) < self._update_min_d and abs(delta[2]) < self._update_min_a:
+            return False
+
+        self.__apply_motion(self._update_odom, odom_pose)
+        self._update_odom = odom_pose.copy()
+        self._force_update = False
+
+        if ranges is not None:
+            self.__apply_scan(np.asarray(ranges, dtype=np.float64), angle_min, angle_increment)
+            self._num_updates += 1
+            if self._num_updates % self._resample_interval == 0:
+                self.__resample()
+        return True
+
+    def get_estimate(self):
+        """
+        Gets the weighted mean pose and covariance of the particles
+
+        :return numpy.ndarray ([x, y, yaw]), numpy.ndarray (6x6 covariance)
+        """
+        particles = self._particles[:self._num_particles]
+        weights = self._weights[:self._num_particles]
+
+        mean = np.empty(3, dtype=np.float64)
+        mean[0:2] = np.dot(weights, particles[:, 0:2])
+        mean_cos = np.dot(weights, np.cos(particles[:, 2]))
+        mean_sin = np.dot(weights, np.sin(particles[:, 2]))
+        mean[2] = np.arctan2(mean_sin, mean_cos)
+
+        offsets = particles[:, 0:2] - mean[0:2]
+        covariance = np.zeros((6, 6), dtype=np.float64)
+        covariance[0:2, 0:2] = np.dot(offsets.T * weights, offsets)
+        # circular variance of yaw (as amcl)
+        covariance[5, 5] = -2 * np.log(max(np.hypot(mean_cos, mean_sin), 1e-12))
+        return mean, covariance
+
+    def __reinitialize(self):
+        """
+        Reset the weights to uniform and force the next update, odometry received
+        next becomes the reference of the motion (robot may have been teleported)
+        """
+        self._weights[:self._num_particles] = 1.0 / self._num_particles
+        self._update_odom = None
+        self._force_update = True
+
+    def __apply_motion(self, old_pose, new_pose):
+        """
+        Sample the odometry motion model (diff drive model of amcl) for all particles
+        """
+        num_particles = self._num_particles
+        particles = self._particles[:num_particles]
+        alpha1, alpha2, alpha3, alpha4 = self._odom_alphas
+
+        dx, dy = new_pose[0:2] - old_pose[0:2]
+        trans = np.hypot(dx, dy)
+        # avoid computing a bearing from two poses that are extremely near each other
+        rot1 = 0.0 if trans < 0.01 else _wrap_angle(np.arctan2(dy, dx) - old_pose[2])
+        rot2 = _wrap_angle(new_pose[2] - old_pose[2] - rot1)
+        # moving backward is as noisy as moving forward
+        rot1_noise = min(abs(rot1), abs(_wrap_angle(rot1 - np.pi)))
+        rot2_noise = min(abs(rot2), abs(_wrap_angle(rot2 - np.pi)))
+
+        noise = self._rng.standard_normal((3, num_particles))
+        rot1_hat = rot1 - np.sqrt(alpha1 * rot1_noise ** 2 + alpha2 * trans ** 2) * noise[0]
+        trans_hat = trans - np.sqrt(alpha3 * trans ** 2 + alpha4 * rot1_noise ** 2 +
+                                    alpha4 * rot2_noise ** 2) * noise[1]
+        rot2_hat = rot2 - np.sqrt(alpha1 * rot2_noise ** 2 + alpha2 * trans ** 2) * noise[2]
+
+        heading = particles[:, 2] + rot1_hat
+        particles[:, 0] += trans_hat * np.cos(heading)
+        particles[:, 1] += trans_hat * np.sin(heading)
+        particles[:, 2] = _wrap_angle(heading + rot2_hat)
+
+    def __apply_scan(self, ranges, angle_min: float, angle_increment: float):
+        """
+        Weight the particles with the likelihood field model of the laser scan
+        """
+        num_ranges = ranges.shape[0]
+        if angle_increment is None:
+            angle_increment = 2 * np.pi / num_ranges
+        # evenly spaced subset of beams within the valid range
+        indices = np.unique(np.linspace(0, num_ranges - 1, min(self._max_beams, num_ranges)).astype(np.intp))
+        beam_ranges = ranges[indices]
+        is_valid = np.isfinite(beam_ranges) & (beam_ranges >= self._min_range) & (beam_ranges < self._max_range)
+        if not np.any(is_valid):
+            return
+        beam_ranges = beam_ranges[is_valid] / self._scale
+        beam_angles = angle_min + angle_increment * indices[is_valid] + self._laser_pose[2]
+        # beam endpoints in laser frame (in cells)
+        end_x = (beam_ranges * np.cos(beam_angles)).astype(np.float32)
+        end_y = (beam_ranges * np.sin(beam_angles)).astype(np.float32)
+
+        num_particles = self._num_particles
+        particles = self._particles[:num_particles]
+        log_weights = np.empty(num_particles, dtype=np.float64)
+        chunk = max(1, self._max_points // beam_ranges.shape[0])
+        for start in range(0, num_particles, chunk):
+            poses = particles[start:start + chunk]
+            cos_yaw, sin_yaw = np.cos(poses[:, 2]), np.sin(poses[:, 2])
+            # laser position in grid coordinates
+            laser_x = poses[:, 0] + cos_yaw * self._laser_pose[0] - sin_yaw * self._laser_pose[1]
+            laser_y = poses[:, 1] + sin_yaw * self._laser_pose[0] + cos_yaw * self._laser_pose[1]
+            laser_cols, laser_rows = self._map.world_to_grid(laser_x, laser_y)
+            cos_yaw, sin_yaw = cos_yaw.astype(np.float32), sin_yaw.astype(np.float32)
+
+            # cells of endpoints outside of the map are clamped to the border
+            cols = laser_cols.astype(np.float32)[:, None] + np.outer(cos_yaw, end_x)
+            cols -= np.outer(sin_yaw, end_y)
+            rows = laser_rows.astype(np.float32)[:, None] + np.outer(sin_yaw, end_x)
+            rows += np.outer(cos_yaw, end_y)
+            np.clip(np.floor(cols, out=cols), -1, self._width, out=cols)
+            np.clip(np.floor(rows, out=rows), -1, self._height, out=rows)
+            rows += 1
+            rows *= self._width + 2
+            rows += cols
+            rows += 1
+            cells = rows.astype(np.intp)
+            log_weights[start:start + chunk] = np.log1p(self._likelihood[cells].sum(axis=1, dtype=np.float64))
+
+        weights = self._weights[:num_particles]
+        log_weights += np.log(np.maximum(weights, 1e-300))
+        weights[:] = np.exp(log_weights - log_weights.max())
+        weights /= weights.sum()
+
+    def __resample(self):
+        """
+        Low variance resampling, number of particles is adapted with KLD sampling
+        """
+        num_particles = self._num_particles
+        max_particles = self._max_particles
+        cumulative = np.cumsum(self._weights[:num_particles])
+        cumulative /= cumulative[-1]
+        positions = (self._rng.random() + np.arange(max_particles)) / max_particles
+        indices = np.minimum(np.searchsorted(cumulative, positions), num_particles - 1)
+        # shuffled so that any prefix of the samples is a representative subset
+        self._rng.shuffle(indices)
+        samples = self._particles[indices]
+
+        num_samples = max_particles
+        if self._min_particles < max_particles:
+            # number of distinct histogram bins within each prefix of the samples
+            bins = np.floor(samples / self._kld_bin_size).astype(np.int64)
+            bins -= bins.min(axis=0)
+            extents = bins.max(axis=0) + 1
+            keys = (bins[:, 0] * extents[1] + bins[:, 1]) * extents[2] + bins[:, 2]
+            _, first = np.unique(keys, return_index=True)
+            is_first = np.zeros(max_particles, dtype=bool)
+            is_first[first] = True
+            num_bins = np.cumsum(is_first)
+
+            counts = np.arange(1, max_particles + 1)
+            is_enough = (counts >= self.__kld_limit(num_bins)) & (counts >= self._min_particles)
+            if np.any(is_enough):
+                num_samples = int(np.argmax(is_enough)) + 1
+
+        self._particles[:num_samples] = samples[:num_samples]
+        self._num_particles = num_samples
+        self._weights[:num_samples] = 1.0 / num_samples
+
+    def __kld_limit(self, num_bins):
+        """
+        Compute the number of particles required for the number of occupied bins (KLD sampling)
+        """
+        num_bins = np.asarray(num_bins, dtype=np.float64)
+        limit = np.full(num_bins.shape, float(self._max_particles))
+        is_valid = num_bins > 1
+        k = num_bins[is_valid] - 1
+        b = 2 / (9 * k)
+        x = 1 - b + np.sqrt(b) * self._kld_z
+        limit[is_valid] = np.minimum(np.ceil(k / (2 * self._kld_err) * x ** 3), self._max_particles)
+        return limit
@@ -2,6 +2,7 @@
 
 import numpy as np
 from tf.transformations import euler_from_quaternion
+from openai_ros import msg_decoder, distance_field
 
 class Map():
     """
@@ -21,6 +22,11 @@ class Map():
         self.__height = 0
 
         self.__grid_cells = None
+        # thresholds (in occupancy probability) as in map yaml
+        self.__occupied_thresh = 0.65
+        self.__free_thresh = 0.196
+        # derived views of grid cells, computed lazily
+        self.__derived = {}
 
     def set_origin(self, pose):
         """
@@ -72,22 +78,158 @@ class Map():
         """
         return self.__width, self.__height
 
-    def set_cells(self, cells: tuple):
+    def set_thresholds(self, occupied_thresh: float, free_thresh: float):
         """
-        Sets the map cells
+        Sets the occupied and free thresholds of map
 
-        :param tuple cells: map grid cells
+        :param float occupied_thresh: cells with occupancy probability greater than this are occupied
+               float free_thresh: cells with occupancy probability less than this are free
         """
-        self.__grid_cells = np.array(cells).reshape(self.__height, self.__width)
+        self.__occupied_thresh = occupied_thresh
+        self.__free_thresh = free_thresh
+        self.__derived.clear()
+
+    def set_cells(self, cells):
+        """
+        Sets the map cells, buffer (bytes, memoryview) or int8 array is viewed without copy
+
+        :param cells: map grid cells (occupancy values in [0, 100], -1 for unknown)
+        """
+        if isinstance(cells, (bytes, bytearray, memoryview)):
+            grid_cells = np.frombuffer(cells, dtype=np.int8)
+        else:
+            grid_cells = np.asarray(cells, dtype=np.int8)
+        # read-only view of our own, flags of the caller's array are left untouched
+        grid_cells = grid_cells.reshape(self.__height, self.__width).view()
+        grid_cells.flags.writeable = False
+
+        self.__grid_cells = grid_cells
+        self.__derived.clear()
 
     def get_cells(self):
         """
         Gets the map cells
 
-        :return numpy.ndarray
+        :return numpy.ndarray (read-only int8)
         """
         return self.__grid_cells
 
+    def get_occupied_mask(self):
+        """
+        Gets the mask of occupied cells
+
+        :return numpy.ndarray (read-only bool)
+        """
+        if 'occupied' not in self.__derived:
+            self.__derived['occupied'] = self.__read_only(self.__grid_cells > self.__occupied_thresh * 100)
+        return self.__derived['occupied']
+
+    def get_free_mask(self):
+        """
+        Gets the mask of free cells (unknown cells are neither free nor occupied)
+
+        :return numpy.ndarray (read-only bool)
+        """
+        if 'free' not in self.__derived:
+            cells = self.__grid_cells
+            self.__derived['free'] = self.__read_only((cells >= 0) & (cells < self.__free_thresh * 100))
+        return self.__derived['free']
+
+    def get_distance_field(self):
+        """
+        Gets the euclidean distance (in meters) from every cell to the nearest occupied
+        cell, computed once per map content (persisted by distance_field cache)
+
+        :return numpy.ndarray (read-only float32 (height, width))
+        """
+        if 'distance' not in self.__derived:
+            distance = distance_field.get_cache().get(self.get_occupied_mask()) * np.float32(self.__scale)
+            self.__derived['distance'] = self.__read_only(distance)
+        return self.__derived['distance']
+
+    def get_clearance(self, x, y):
+        """
+        Gets the distance to the nearest occupied cell for the world positions,
+        constant time lookup of the cell containing each position
+
+        :param x: position(s) x in world frame (meters)
+               y: position(s) y in world frame (meters)
+        :return numpy.ndarray (float32 meters, 0.0 outside of the map)
+        """
+        rows, cols, inside = self.world_to_cell(x, y)
+        distance = self.get_distance_field()
+        return np.where(inside, distance[np.where(inside, rows, 0), np.where(inside, cols, 0)],
+                        np.float32(0.0))
+
+    def world_to_grid(self, x, y):
+        """
+        Convert the world positions to continuous grid coordinates, cell (row, col)
+        spans [col, col + 1) x [row, row + 1), origin is the center of the map
+
+        :param x: position(s) x in world frame (meters)
+               y: position(s) y in world frame (meters)
+        :return numpy.ndarray (cols), numpy.ndarray (rows)
+        """
+        origin_x, origin_y, _ = self.__origin.get_position()
+        cols = (np.asarray(x) - origin_x) / self.__scale + self.__width / 2
+        rows = (np.asarray(y) - origin_y) / self.__scale + self.__height / 2
+        return cols, rows
+
+    def grid_to_world(self, cols, rows):
+        """
+        Convert the continuous grid coordinates to world positions (inverse of world_to_grid)
+
+        :param cols: grid coordinate(s) along width (cell centers are at col + 0.5)
+               rows: grid coordinate(s) along height (cell centers are at row + 0.5)
+        :return numpy.ndarray (x), numpy.ndarray (y)
+        """
+        origin_x, origin_y, _ = self.__origin.get_position()
+        x = (np.asarray(cols) - self.__width / 2) * self.__scale + origin_x
+        y = (np.asarray(rows) - self.__height / 2) * self.__scale + origin_y
+        return x, y
+
+    def world_to_cell(self, x, y):
+        """
+        Convert the world positions to grid cell indices
+
+        :param x: position(s) x in world frame (meters)
+               y: position(s) y in world frame (meters)
+        :return numpy.ndarray (rows), numpy.ndarray (cols), numpy.ndarray (bool, inside map)
+        """
+        cols, rows = self.world_to_grid(x, y)
+        cols = np.floor(cols).astype(np.intp)
+        rows = np.floor(rows).astype(np.intp)
+        inside = (rows >= 0) & (rows < self.__height) & (cols >= 0) & (cols < self.__width)
+        return rows, cols, inside
+
+    def get_image(self):
+        """
+        Gets the map as uint8 image (as saved by map_saver)
+            254: free, 0: occupied, 205: unknown
+
+        :return numpy.ndarray (read-only uint8)
+        """
+        if 'image' not in self.__derived:
+            # lookup table indexed by the cell value reinterpreted as uint8 (-1 => 255)
+            values = np.arange(256).astype(np.uint8).view(np.int8)
+            lut = np.full(256, 205, dtype=np.uint8)
+            lut[(values >= 0) & (values < self.__free_thresh * 100)] = 254
+            lut[values > self.__occupied_thresh * 100] = 0
+            self.__derived['image'] = self.__read_only(lut[self.__grid_cells.view(np.uint8)])
+        return self.__derived['image']
+
+    @staticmethod
+    def __read_only(array):
+        """
+        Gets the read-only view of the array, derived data is shared by all users of the map
+
+        :param numpy.ndarray array: array owned by the map
+        :return numpy.ndarray
+        """
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
     def __str__(self):
         """
         Override str method of Object
@@ -101,18 +243,27 @@ class Pose():
         Pose class is an implementation to store pose details
     """
 
+    # single float buffer => [ position(3) | quaternion(4) | euler(3) | covariance(6x6) ]
+    __slots__ = ('__buffer', '__is_euler_stale', '__entropy', '__planar_covariance',
+                 '__error', '_frame_id')
+    __position = slice(0, 3)
+    __quaternion = slice(3, 7)
+    __euler = slice(7, 10)
+    __covariance = slice(10, 46)
+    # indices of x, y, yaw in 6x6 covariance
+    __planar_idx = np.ix_([0, 1, 5], [0, 1, 5])
+
     def __init__(self):
         """
         Initialize Pose class (3D pose)
         """
         super(Pose, self).__init__()
 
-        self.__position = np.zeros(3, dtype=float)
-        self.__euler = np.zeros(3)
-        self.__quaternion = np.zeros(4)
-
-        self.__covariance = np.zeros((6, 6))
+        self.__buffer = np.zeros(46, dtype=float)
+        # derived quantities are computed on first access and cached
+        self.__is_euler_stale = False
         self.__entropy = 0.0
+        self.__planar_covariance = None
         self.__error = 0.0
         self._frame_id = 'world'
 
@@ -124,9 +275,9 @@ class Pose():
                float y: position in y-axis
                float z: position in z-axis
         """
-        self.__position[0] = x
-        self.__position[1] = y
-        self.__position[2] = z
+        self.__buffer[0] = x
+        self.__buffer[1] = y
+        self.__buffer[2] = z
 
     def get_position(self):
         """
@@ -134,7 +285,7 @@ class Pose():
 
         :return numpy.ndarray
         """
-        return self.__position
+        return self.__buffer[self.__position]
 
     def set_quaternion(self, x: float, y: float, z: float, w: float):
         """
@@ -145,13 +296,13 @@ class Pose():
                float z: orientation in z
                float w: orientation in w
         """
-        self.__quaternion[0] = x
-        self.__quaternion[1] = y
-        self.__quaternion[2] = z
-        self.__quaternion[3] = w
+        self.__buffer[3] = x
+        self.__buffer[4] = y
+        self.__buffer[5] = z
+        self.__buffer[6] = w
 
-        roll, pitch, yaw = euler_from_quaternion([x, y, z, w])
-        self.__set_euler(roll, pitch, yaw)
+        # euler angle is computed lazily in get_euler()
+        self.__is_euler_stale = True
 
     def get_quaternion(self):
         """
@@ -159,19 +310,7 @@ class Pose():
 
         :return numpy.ndarray
         """
-        return self.__quaternion
-
-    def __set_euler(self, roll: float, pitch: float, yaw: float):
-        """
-        Sets the euler angle
-
-        :param float roll: roll orientation
-               float pitch: pitch orientation
-               float yaw: yaw orientation
-        """
-        self.__euler[0] = roll
-        self.__euler[1] = pitch
-        self.__euler[2] = yaw
+        return self.__buffer[self.__quaternion]
 
     def get_euler(self):
         """
@@ -179,7 +318,10 @@ class Pose():
 
         :return numpy.ndarray
         """
-        return self.__euler
+        if self.__is_euler_stale:
+            self.__buffer[self.__euler] = euler_from_quaternion(self.__buffer[self.__quaternion])
+            self.__is_euler_stale = False
+        return self.__buffer[self.__euler]
 
     def set_covariance(self, covariance):
         """
@@ -187,8 +329,11 @@ class Pose():
 
         :param tuple covariance: pose covariance
         """
-        self.__covariance = np.array(covariance).reshape((6, 6))
-        self.__calculate_entropy()
+        self.__buffer[self.__covariance] = np.ravel(covariance)
+
+        # entropy and covariance blocks are computed lazily
+        self.__entropy = None
+        self.__planar_covariance = None
 
     def get_covariance(self):
         """
@@ -196,19 +341,24 @@ class Pose():
 
         :return numpy.ndarray
         """
-        return self.__covariance
+        return self.__buffer[self.__covariance].reshape((6, 6))
+
+    def get_planar_covariance(self):
+        """
+        Gets the (x, y, yaw) block of the pose covariance
+
+        :return numpy.ndarray
+        """
+        if self.__planar_covariance is None:
+            self.__planar_covariance = self.get_covariance()[self.__planar_idx]
+        return self.__planar_covariance
 
     def __calculate_entropy(self):
         """
         calculate entropy based on the pose covariance
         """
 
-        mean = np.array([self.__position[0], self.__position[1], self.__euler[2]])
-        cov = np.array([
-            [self.__covariance[0,0], self.__covariance[0,1], self.__covariance[0,5]],
-            [self.__covariance[1,0], self.__covariance[1,1], self.__covariance[1,5]],
-            [self.__covariance[5,0], self.__covariance[5,2], self.__covariance[5,5]]
-        ])
+        cov = self.get_planar_covariance()
 
         # reference https://en.wikipedia.org/wiki/Multivariate_normal_distribution
         entropy = 0.5 * np.log(np.linalg.det(2 * np.pi * np.e * cov))
@@ -223,6 +373,8 @@ class Pose():
 
         :return float
         """
+        if self.__entropy is None:
+            self.__calculate_entropy()
         return self.__entropy
 
     def set_estimate_error(self, error):
@@ -245,7 +397,317 @@ class Pose():
 
         :return str
         """
-        return ' position: {0},\n orientation: {1},\n covariance: {2}'.format(self.__position, self.__euler, self.__covariance)
+        return ' position: {0},\n orientation: {1},\n covariance: {2}'.format(self.get_position(), self.get_euler(), self.get_covariance())
+
+class PoseBatch():
+    """
+        PoseBatch class is an implementation to store many planar poses (x, y, yaw)
+        as contiguous columns, e.g. particle cloud or trajectory
+    """
+
+    def __init__(self, size: int = 0, dtype=float, weights: bool = False, covariance: bool = False):
+        """
+        Initialize PoseBatch class
+
+        :param int size: number of poses
+               numpy.dtype dtype: data type of the columns
+               bool weights: whether to store per pose weight (initialized uniform)
+               bool covariance: whether to store per pose 3x3 (x, y, yaw) covariance
+        """
+        super(PoseBatch, self).__init__()
+
+        columns = np.zeros((3, size), dtype=dtype)
+        self.__x = columns[0]
+        self.__y = columns[1]
+        self.__yaw = columns[2]
+        self.__weights = np.full(size, 1.0 / max(size, 1), dtype=dtype) if weights else None
+        self.__covariance = np.zeros((size, 3, 3), dtype=dtype) if covariance else None
+        # (N, 3) array the columns are views of, if any
+        self.__array = None
+
+    @classmethod
+    def from_columns(cls, x, y, yaw, weights=None, covariance=None):
+        """
+        Create pose batch viewing the given columns (no copy)
+
+        :param numpy.ndarray x: (N,) position in x-axis
+               numpy.ndarray y: (N,) position in y-axis
+               numpy.ndarray yaw: (N,) orientation
+               numpy.ndarray weights: optional (N,) weights
+               numpy.ndarray covariance: optional (N, 3, 3) covariance
+        :return pojo.PoseBatch
+        """
+        batch = cls()
+        batch.__x = np.asarray(x)
+        batch.__y = np.asarray(y)
+        batch.__yaw = np.asarray(yaw)
+        batch.__weights = None if weights is None else np.asarray(weights)
+        batch.__covariance = None if covariance is None else np.asarray(covariance)
+        return batch
+
+    @classmethod
+    def from_array(cls, poses, weights=None):
+        """
+        Create pose batch viewing the columns of (N, 3) [x, y, yaw] array (no copy)
+
+        :param numpy.ndarray poses: (N, 3) poses
+               numpy.ndarray weights: optional (N,) weights
+        :return pojo.PoseBatch
+        """
+        batch = cls.from_columns(poses[:, 0], poses[:, 1], poses[:, 2], weights)
+        batch.__array = poses
+        return batch
+
+    @classmethod
+    def from_poses(cls, poses: list):
+        """
+        Create pose batch from list of pojo.Pose
+
+        :param list[pojo.Pose] poses: poses
+        :return pojo.PoseBatch
+        """
+        batch = cls(len(poses), covariance=True)
+        for idx, pose in enumerate(poses):
+            batch.__x[idx], batch.__y[idx], _ = pose.get_position()
+            batch.__yaw[idx] = pose.get_euler()[2]
+            batch.__covariance[idx] = pose.get_planar_covariance()
+        return batch
+
+    @classmethod
+    def from_pose_array(cls, pose_array_msg):
+        """
+        Create pose batch from pose array message
+
+        :param geometry_msgs.msg._PoseArray.PoseArray pose_array_msg: pose array message
+        :return pojo.PoseBatch
+        """
+        poses = pose_array_msg.poses
+        quaternions = np.array([[p.orientation.x, p.orientation.y, p.orientation.z, p.orientation.w]
+                                    for p in poses], dtype=float).reshape(-1, 4)
+        batch = cls(len(poses))
+        batch.__x[:] = [p.position.x for p in poses]
+        batch.__y[:] = [p.position.y for p in poses]
+        msg_decoder.quaternion_to_yaw(quaternions, out=batch.__yaw)
+        return batch
+
+    def to_pose_array(self, frame_id: str = 'map'):
+        """
+        Convert pose batch to pose array message
+
+        :param str frame_id: frame of the poses
+        :return geometry_msgs.msg._PoseArray.PoseArray
+        """
+        from geometry_msgs.msg import PoseArray as PoseArrayMsg, Pose as PoseMsg
+
+        msg = PoseArrayMsg()
+        msg.header.frame_id = frame_id
+        half_yaw = 0.5 * self.__yaw
+        for x, y, qz, qw in zip(self.__x.tolist(), self.__y.tolist(),
+                                np.sin(half_yaw).tolist(), np.cos(half_yaw).tolist()):
+            pose_msg = PoseMsg()
+            pose_msg.position.x = x
+            pose_msg.position.y = y
+            pose_msg.orientation.z = qz
+            pose_msg.orientation.w = qw
+            msg.poses.append(pose_msg)
+        return msg
+
+    def get_pose(self, idx: int):
+        """
+        Gets the pose at given index
+
+        :param int idx: index of pose
+        :return pojo.Pose
+        """
+        half_yaw = 0.5 * self.__yaw[idx]
+        pose = Pose()
+        pose.set_position(self.__x[idx], self.__y[idx], 0.0)
+        pose.set_quaternion(0.0, 0.0, np.sin(half_yaw), np.cos(half_yaw))
+        if self.__covariance is not None:
+            covariance = np.zeros((6, 6))
+            covariance[np.ix_([0, 1, 5], [0, 1, 5])] = self.__covariance[idx]
+            pose.set_covariance(covariance)
+        return pose
+
+    def to_poses(self):
+        """
+        Convert pose batch to list of pojo.Pose
+
+        :return list[pojo.Pose]
+        """
+        return [self.get_pose(idx) for idx in range(len(self))]
+
+    def to_array(self):
+        """
+        Gets the poses as (N, 3) [x, y, yaw] array, no copy if the batch views such array
+
+        :return numpy.ndarray
+        """
+        if self.__array is not None:
+            return self.__array
+        return np.column_stack((self.__x, self.__y, self.__yaw))
+
+    def get_x(self):
+        """
+        Gets the positions in x-axis
+
+        :return numpy.ndarray
+        """
+        return self.__x
+
+    def get_y(self):
+        """
+        Gets the positions in y-axis
+
+        :return numpy.ndarray
+        """
+        return self.__y
+
+    def get_yaw(self):
+        """
+        Gets the orientations
+
+        :return numpy.ndarray
+        """
+        return self.__yaw
+
+    def get_weights(self):
+        """
+        Gets the normalized weights, uniform if batch has no weights
+
+        :return numpy.ndarray
+        """
+        if self.__weights is None:
+            return np.full(len(self), 1.0 / max(len(self), 1))
+        return self.__weights / np.sum(self.__weights)
+
+    def get_covariance(self):
+        """
+        Gets the per pose (x, y, yaw) covariance
+
+        :return numpy.ndarray or None
+        """
+        return self.__covariance
+
+    def distance_to(self, pose):
+        """
+        Calculate the euclidean distance of every pose position to given pose position
+
+        :param pojo.Pose pose: reference pose
+        :return numpy.ndarray
+        """
+        x, y, _ = pose.get_position()
+        return np.hypot(self.__x - x, self.__y - y)
+
+    def angular_difference(self, yaw: float):
+        """
+        Calculate the orientation difference of every pose to given orientation,
+        wrapped to [-pi, pi)
+
+        :param float yaw: reference orientation
+        :return numpy.ndarray
+        """
+        return wrap_angle(self.__yaw - yaw)
+
+    def squared_error(self, pose):
+        """
+        Calculate the squared euclidean error of every pose (+ covariance) w.r.t given pose
+
+        :param pojo.Pose pose: reference pose
+        :return numpy.ndarray
+        """
+        x, y, _ = pose.get_position()
+        error = (self.__x - x)**2 + (self.__y - y)**2 + \
+                self.angular_difference(pose.get_euler()[2])**2
+        if self.__covariance is not None:
+            error = error + np.sum((self.__covariance - pose.get_planar_covariance())**2, axis=(1, 2))
+        return error
+
+    def mean(self):
+        """
+        Calculate the weighted mean pose, orientation is averaged on the unit circle
+
+        :return numpy.ndarray [x, y, yaw]
+        """
+        weights = self.get_weights()
+        return np.array([
+            np.dot(weights, self.__x),
+            np.dot(weights, self.__y),
+            np.arctan2(np.dot(weights, np.sin(self.__yaw)), np.dot(weights, np.cos(self.__yaw))),
+        ])
+
+    def covariance(self, mean=None):
+        """
+        Calculate the weighted (x, y, yaw) covariance of poses
+
+        :param numpy.ndarray mean: [x, y, yaw] mean, computed if not given
+        :return numpy.ndarray (3x3)
+        """
+        if mean is None:
+            mean = self.mean()
+        weights = self.get_weights()
+        residuals = np.stack((self.__x - mean[0],
+                              self.__y - mean[1],
+                              wrap_angle(self.__yaw - mean[2])))
+        return (residuals * weights) @ residuals.T
+
+    def mean_pose(self):
+        """
+        Calculate the weighted mean pose with covariance
+
+        :return pojo.Pose
+        """
+        mean = self.mean()
+        half_yaw = 0.5 * mean[2]
+        covariance = np.zeros((6, 6))
+        covariance[np.ix_([0, 1, 5], [0, 1, 5])] = self.covariance(mean)
+
+        pose = Pose()
+        pose.set_position(mean[0], mean[1], 0.0)
+        pose.set_quaternion(0.0, 0.0, np.sin(half_yaw), np.cos(half_yaw))
+        pose.set_covariance(covariance)
+        return pose
+
+    def __len__(self):
+        """
+        Override len method of Object
+
+        :return int
+        """
+        return self.__x.shape[0]
+
+    def __getitem__(self, key):
+        """
+        Override indexing of Object, slices are views (no copy)
+
+        :param slice key: poses to select
+        :return pojo.PoseBatch
+        """
+        if isinstance(key, (int, np.integer)):
+            key = slice(key, key + 1 if key != -1 else None)
+        batch = PoseBatch.from_columns(self.__x[key], self.__y[key], self.__yaw[key],
+                    None if self.__weights is None else self.__weights[key],
+                    None if self.__covariance is None else self.__covariance[key])
+        if self.__array is not None:
+            batch.__array = self.__array[key]
+        return batch
+
+    def __str__(self):
+        """
+        Override str method of Object
+
+        :return str
+        """
+        return ' size: {0},\n mean: {1}'.format(len(self), self.mean() if len(self) else None)
+
+def wrap_angle(angle):
+    """
+    Wrap the angle to [-pi, pi)
+
+    :param angle: angle(s) in radians
+    :return wrapped angle(s)
+    """
+    return np.mod(angle + np.pi, 2 * np.pi) - np.pi
 
 #### Turtlebot3 ####
 
@@ -254,13 +716,18 @@ class Robot():
         Robot class is an implementation to store robot details
     """
 
-    def __init__(self):
+    # surrounding view regions, anti-clockwise starting from left
+    _regions = ('left', 'back', 'right', 'front')
+
+    def __init__(self, name: str = 'turtlebot3'):
         """
         Initialize Robot class
+
+        :param str name: name of the robot model in gazebo
         """
         super(Robot, self).__init__()
 
-        self._rosbot_name = 'turtlebot3'
+        self._rosbot_name = name
         # all sensor data, topic messages is assumed to be in same tf frame
         self._global_frame_id = 'map'
         self._scan_frame_id = 'base_scan'
@@ -268,72 +735,76 @@ class Robot():
         self._o_space_color = 'lightcoral'
         self.__pose = Pose()
         self.__safe_distance = 0.3
-        self.__left_details = {
-            'min_angle': 0.0,
-            'start_sector': 0,
-            'max_angle': 0.0,
-            'end_sector': 0,
-            'sector_color': self._f_space_color,
-            'threshold': self.__safe_distance + 0.1,
-            'view_field': 90, # degrees
-            'obstacle_sector': 0,
-        }
-        self.__back_details = {
-            'min_angle': 0.0,
-            'start_sector': 0,
-            'max_angle': 0.0,
-            'end_sector': 0,
-            'sector_color': self._f_space_color,
-            'threshold': self.__safe_distance,
-            'view_field': 90, # degrees
-            'obstacle_sector': 0,
-        }
-        self.__right_details = {
-            'min_angle': 0.0,
-            'start_sector': 0,
-            'max_angle': 0.0,
-            'end_sector': 0,
-            'sector_color': self._f_space_color,
-            'threshold': self.__safe_distance + 0.1,
-            'view_field': 90, # degrees
-            'obstacle_sector': 0,
-        }
-        self.__front_details = {
-            'min_angle': 0.0,
-            'start_sector': 0,
-            'max_angle': 0.0,
-            'end_sector': 0,
-            'sector_color': self._f_space_color,
-            'threshold': self.__safe_distance + 0.3,
-            'view_field': 90, # degrees
-            'obstacle_sector': 0,
-        }
 
         self._robot_radius = 3.0
+        self._footprint_radius = 0.22    # meters (turtlebot3 waffle)
         self._sector_angle = 15 # degrees
-        self.__scan_beams = None
         self.__map_scale = 1.0
         self.__too_close = False
-
-        self.__left_details['start_sector'] = (self.__front_details['view_field']/2) // self._sector_angle
-        self.__left_details['end_sector'] = (self.__front_details['view_field']/2 + \
-                    self.__left_details['view_field']) // self._sector_angle - 1
-        self.__back_details['start_sector'] = (self.__front_details['view_field']/2 + \
-                    self.__left_details['view_field']) //self._sector_angle
-        self.__back_details['end_sector'] = (360 - self.__front_details['view_field']/2 - \
-                    self.__right_details['view_field']) // self._sector_angle - 1
-        self.__right_details['start_sector'] = (360 - self.__front_details['view_field']/2 - \
-                    self.__right_details['view_field']) // self._sector_angle
-        self.__right_details['end_sector'] = (360 - self.__front_details['view_field']/2) // self._sector_angle - 1
-        self.__front_details['start_sector'] = (360 - self.__front_details['view_field']/2) // self._sector_angle
-        self.__front_details['end_sector'] = (self.__front_details['view_field']/2) // self._sector_angle - 1
-
-        self.__surroundings = {
-            'left': self.__left_details,
-            'back': self.__back_details,
-            'right': self.__right_details,
-            'front': self.__front_details,
-        }
+        self.__yaw = None
+
+        # per region details => [left, back, right, front]
+        num_regions = len(self._regions)
+        self.__view_field = np.array([90, 90, 90, 90], dtype=float) # degrees
+        self.__threshold = np.array([self.__safe_distance + 0.1,
+                                     self.__safe_distance,
+                                     self.__safe_distance + 0.1,
+                                     self.__safe_distance + 0.3], dtype=float)
+        # too close check is not performed for back region
+        self.__check_too_close = np.array([True, False, True, True])
+        self.__obstacle_region = np.zeros(num_regions, dtype=bool)
+
+        left_view, back_view, right_view, front_view = self.__view_field
+        self.__start_sector = np.array([
+            (front_view/2) // self._sector_angle,
+            (front_view/2 + left_view) // self._sector_angle,
+            (360 - front_view/2 - right_view) // self._sector_angle,
+            (360 - front_view/2) // self._sector_angle,
+        ], dtype=int)
+        self.__end_sector = np.array([
+            (front_view/2 + left_view) // self._sector_angle - 1,
+            (360 - front_view/2 - right_view) // self._sector_angle - 1,
+            (360 - front_view/2) // self._sector_angle - 1,
+            (front_view/2) // self._sector_angle - 1,   # front region wraps around
+        ], dtype=int)
+
+        # sector -> region lookup
+        num_sectors = 360 // self._sector_angle
+        sectors = np.arange(num_sectors)
+        self.__region_masks = np.zeros((num_regions, num_sectors), dtype=bool)
+        for region in range(num_regions):
+            start, end = self.__start_sector[region], self.__end_sector[region]
+            if start <= end:
+                self.__region_masks[region] = (sectors >= start) & (sectors <= end)
+            else:
+                self.__region_masks[region] = (sectors >= start) | (sectors <= end)
+        self.__sector_region = np.argmax(self.__region_masks, axis=0)
+        self.__sector_threshold = self.__threshold[self.__sector_region]
+        self.__sector_check_too_close = self.__check_too_close[self.__sector_region]
+
+        # preallocated work buffers
+        self.__near_sector = np.zeros(num_sectors, dtype=bool)
+        self.__close_sector = np.zeros(num_sectors, dtype=bool)
+        self.__near_region_sector = np.zeros((num_regions, num_sectors), dtype=bool)
+        self.__beam_range = np.zeros(num_sectors, dtype=float)
+        self.__beam_angle = np.zeros(num_sectors, dtype=float)
+        self.__beam_cos = np.zeros(num_sectors, dtype=float)
+        self.__scan_beams = np.zeros((num_sectors, 2, 2), dtype=float)
+
+        # dict view of surroundings, built lazily by get_surroundings()
+        self.__surroundings = {}
+        for region in range(num_regions):
+            self.__surroundings[self._regions[region]] = {
+                'min_angle': 0.0,
+                'start_sector': self.__start_sector[region],
+                'max_angle': 0.0,
+                'end_sector': self.__end_sector[region],
+                'sector_color': self._f_space_color,
+                'threshold': self.__threshold[region],
+                'view_field': self.__view_field[region],
+                'obstacle_sector': 0,
+            }
+        self.__is_surroundings_stale = False
 
     def set_pose(self, pose, scale=1.0):
         """
@@ -361,8 +832,18 @@ class Robot():
 
         :return dict
         """
+        if self.__is_surroundings_stale:
+            self.__update_surroundings_view()
         return self.__surroundings
 
+    def get_obstacle_regions(self):
+        """
+        Gets the obstacle flag per region ordered as Robot._regions
+
+        :return numpy.ndarray
+        """
+        return self.__obstacle_region
+
     def get_scan_beams(self):
         """
         Gets the scan beams
@@ -379,6 +860,14 @@ class Robot():
         """
         return self.__too_close
 
+    def get_footprint_radius(self):
+        """
+        Gets the radius (in meters) of the robot footprint
+
+        :return float
+        """
+        return self._footprint_radius
+
     def update_surroundings(self, sector_laser_scan):
         """
         Update the surroundings details of robot
@@ -386,82 +875,72 @@ class Robot():
         """
 
         x, y, _ = self.__pose.get_position()
-        _, _, yaw = self.__pose.get_euler()
+        _, _, self.__yaw = self.__pose.get_euler()
 
-        # calculate sector angles -> anti-clockwise direction
-        self.__left_details['min_angle'] = np.degrees(yaw) + self.__front_details['view_field']/2
-        self.__left_details['max_angle'] = np.degrees(yaw) + self.__front_details['view_field']/2 + \
-                    self.__left_details['view_field']
-        self.__left_details['sector_color'] = self._f_space_color
-        self.__left_details['obstacle_sector'] = 0
-
-        self.__back_details['min_angle'] = np.degrees(yaw) + self.__front_details['view_field']/2 + \
-                    self.__left_details['view_field']
-        self.__back_details['max_angle'] = np.degrees(yaw) - self.__front_details['view_field']/2 - \
-                    self.__right_details['view_field']
-        self.__back_details['sector_color'] = self._f_space_color
-        self.__back_details['obstacle_sector'] = 0
-
-        self.__right_details['min_angle'] = np.degrees(yaw) - self.__front_details['view_field']/2 - \
-                    self.__right_details['view_field']
-        self.__right_details['max_angle'] = np.degrees(yaw) - self.__front_details['view_field']/2
-        self.__right_details['sector_color'] = self._f_space_color
-        self.__right_details['obstacle_sector'] = 0
-
-        self.__front_details['min_angle'] = np.degrees(yaw) - self.__front_details['view_field']/2
-        self.__front_details['max_angle'] = np.degrees(yaw) + self.__front_details['view_field']/2
-        self.__front_details['sector_color'] = self._f_space_color
-        self.__front_details['obstacle_sector'] = 0
+        # sectors with nearest obstacle within the threshold of its region
+        # inf beams (no obstacle) never satisfy the threshold check
+        sector_range = sector_laser_scan[:, 0]
+        np.less(sector_range, self.__sector_threshold, out=self.__near_sector)
+        np.logical_and(self.__region_masks, self.__near_sector, out=self.__near_region_sector)
+        np.any(self.__near_region_sector, axis=1, out=self.__obstacle_region)
 
-        self.__too_close = False
-        scan_beams = []
-        # check for nearest obstacles in sectors
-        for idx in range(len(sector_laser_scan)):
-            beam = sector_laser_scan[idx]
-            is_nearest = False
-            if np.isinf(beam[0]):
-                scan_beams.append([[x, x], [y, y]])
-                continue
-
-            if idx >= self.__left_details['start_sector'] \
-                    and idx <= self.__left_details['end_sector'] \
-                    and beam[0] < self.__left_details['threshold']:
-                self.__left_details['sector_color'] = self._o_space_color
-                self.__left_details['obstacle_sector'] = 1
-                is_nearest = True
-                if beam[0] < self.__safe_distance:
-                    self.__too_close = True
-            elif idx >= self.__back_details['start_sector'] \
-                    and idx <= self.__back_details['end_sector'] \
-                    and beam[0] < self.__back_details['threshold']:
-                self.__back_details['sector_color'] = self._o_space_color
-                self.__back_details['obstacle_sector'] = 1
-                is_nearest = True
-            elif idx >= self.__right_details['start_sector'] \
-                    and idx <= self.__right_details['end_sector'] \
-                    and beam[0] < self.__right_details['threshold']:
-                self.__right_details['sector_color'] = self._o_space_color
-                self.__right_details['obstacle_sector'] = 1
-                is_nearest = True
-                if beam[0] < self.__safe_distance:
-                    self.__too_close = True
-            elif (idx >= self.__front_details['start_sector'] \
-                    or idx <= self.__front_details['end_sector']) \
-                    and beam[0] < self.__front_details['threshold']:
-                self.__front_details['sector_color'] = self._o_space_color   # for front sector logic is different
-                self.__front_details['obstacle_sector'] = 1
-                is_nearest = True
-                if beam[0] < self.__safe_distance:
-                    self.__too_close = True
-
-            if is_nearest:
-                xdata = [x, x + beam[0] * np.cos(beam[1]) / self.__map_scale]
-                ydata = [y, y + beam[0] * np.sin(beam[1]) / self.__map_scale]
-                scan_beams.append([xdata, ydata])
+        # too close check for near sectors
+        np.less(sector_range, self.__safe_distance, out=self.__close_sector)
+        np.logical_and(self.__close_sector, self.__near_sector, out=self.__close_sector)
+        np.logical_and(self.__close_sector, self.__sector_check_too_close, out=self.__close_sector)
+        self.__too_close = bool(self.__close_sector.any())
+
+        # beams of near sectors end at obstacle, others collapse at robot position
+        self.__beam_range.fill(0.0)
+        self.__beam_angle.fill(0.0)
+        np.copyto(self.__beam_range, sector_range, where=self.__near_sector)
+        np.copyto(self.__beam_angle, sector_laser_scan[:, 1], where=self.__near_sector)
+        np.divide(self.__beam_range, self.__map_scale, out=self.__beam_range)
+
+        self.__scan_beams[:, 0, 0] = x
+        self.__scan_beams[:, 1, 0] = y
+        np.cos(self.__beam_angle, out=self.__beam_cos)
+        np.multiply(self.__beam_range, self.__beam_cos, out=self.__scan_beams[:, 0, 1])
+        self.__scan_beams[:, 0, 1] += x
+        np.sin(self.__beam_angle, out=self.__beam_cos)
+        np.multiply(self.__beam_range, self.__beam_cos, out=self.__scan_beams[:, 1, 1])
+        self.__scan_beams[:, 1, 1] += y
+
+        self.__is_surroundings_stale = True
+
+    def __update_surroundings_view(self):
+        """
+        Update the dict view of surroundings from the latest region details
+        """
+
+        # calculate sector angles -> anti-clockwise direction
+        yaw = np.degrees(self.__yaw)
+        left_view, back_view, right_view, front_view = self.__view_field
+        min_angles = [
+            yaw + front_view/2,
+            yaw + front_view/2 + left_view,
+            yaw - front_view/2 - right_view,
+            yaw - front_view/2,
+        ]
+        max_angles = [
+            yaw + front_view/2 + left_view,
+            yaw - front_view/2 - right_view,
+            yaw - front_view/2,
+            yaw + front_view/2,
+        ]
+
+        for region in range(len(self._regions)):
+            details = self.__surroundings[self._regions[region]]
+            details['min_angle'] = min_angles[region]
+            details['max_angle'] = max_angles[region]
+            if self.__obstacle_region[region]:
+                details['sector_color'] = self._o_space_color
+                details['obstacle_sector'] = 1
             else:
-                scan_beams.append([[x, x], [y, y]])
+                details['sector_color'] = self._f_space_color
+                details['obstacle_sector'] = 0
 
-        self.__scan_beams = np.asarray(scan_beams)
+        self.__is_surroundings_stale = False
 
 class LaserScan():
     """
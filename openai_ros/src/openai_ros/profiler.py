@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+import rospy
+import os
+import time
+import tempfile
+import threading
+import contextlib
+import numpy as np
+from collections import OrderedDict, deque
+
+class StepProfiler():
+    """
+        StepProfiler class is an implementation to time the phases of environment step/reset
+        with rolling latency histograms, periodically flushed in prometheus text format
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, enabled: bool = False, window: int = 1000, metrics_file: str = None,
+                 flush_interval: float = 10.0, prefix: str = 'openai_ros'):
+        """
+        Initialize StepProfiler class
+
+        :param bool enabled: whether phases are timed, phase() is a no-op if disabled
+               int window: number of latest samples per phase kept for quantiles
+               str metrics_file: path of prometheus text format file, not written if not given
+               float flush_interval: minimum time (in seconds) between metrics file writes
+               str prefix: prefix of the metric names
+        """
+        super(StepProfiler, self).__init__()
+
+        self._enabled = enabled
+        self._window = window
+        self._metrics_file = metrics_file
+        self._flush_interval = flush_interval
+        self._prefix = prefix
+
+        self.__null_context = contextlib.nullcontext()
+        self.__lock = threading.Lock()
+        # (section, phase) => deque of wall durations, sum of wall and sim durations, count
+        self.__samples = OrderedDict()
+        self.__totals = {}
+        # section => {phase: {'wall': seconds, 'sim': seconds}} of the current/last run
+        self.__current = {}
+        self.__last = {}
+        self.__next_flush = time.monotonic() + flush_interval
+
+    def is_enabled(self):
+        """
+        Whether profiler is enabled
+        """
+        return self._enabled
+
+    def section(self, section: str):
+        """
+        Time a whole section (eg. step or reset), phases timed within are grouped under it
+
+        :param str section: name of the section
+        :return context manager
+        """
+        if not self._enabled:
+            return self.__null_context
+        return self.__timer(section, None)
+
+    def phase(self, section: str, phase: str):
+        """
+        Time a phase of the section, repeated phases within one section run are summed
+
+        :param str section: name of the section
+               str phase: name of the phase
+        :return context manager
+        """
+        if not self._enabled:
+            return self.__null_context
+        return self.__timer(section, phase)
+
+    def get_last(self, section: str):
+        """
+        Gets the per phase breakdown of the last completed section run
+
+        :param str section: name of the section
+        :return dict (phase => {'wall': seconds, 'sim': seconds}), empty if disabled
+        """
+        with self.__lock:
+            return dict(self.__last.get(section, {}))
+
+    def get_summary(self):
+        """
+        Gets the per phase count, mean and wall time quantiles over rolling window
+
+        :return dict ((section, phase) => dict)
+        """
+        summary = {}
+        with self.__lock:
+            items = [(key, np.array(samples), self.__totals[key]) for key, samples in self.__samples.items()]
+        for key, samples, (wall_sum, sim_sum, count) in items:
+            quantiles = np.quantile(samples, self.QUANTILES) if samples.size > 0 else [0.0] * len(self.QUANTILES)
+            stat = {
+                'count': count,
+                'mean_wall': wall_sum / max(count, 1),
+                'mean_sim': sim_sum / max(count, 1),
+            }
+            for quantile, value in zip(self.QUANTILES, quantiles):
+                stat['p{0:g}'.format(100 * quantile)] = float(value)
+            summary[key] = stat
+        return summary
+
+    def flush(self, metrics_file: str = None):
+        """
+        Write the aggregates to prometheus text format file, file is replaced atomically
+
+        :param str metrics_file: path of the file, configured metrics_file if not given
+        """
+        metrics_file = metrics_file or self._metrics_file
+        if metrics_file is None:
+            return
+
+        lines = []
+        summary = self.get_summary()
+        wall_name = '{0}_phase_wall_seconds'.format(self._prefix)
+        # counter is named with _total suffix in HELP, TYPE and samples alike
+        sim_name = '{0}_phase_sim_seconds_total'.format(self._prefix)
+
+        lines.append('# HELP {0} wall clock duration of environment phases'.format(wall_name))
+        lines.append('# TYPE {0} summary'.format(wall_name))
+        for (section, phase), stat in summary.items():
+            labels = 'section="{0}",phase="{1}"'.format(section, phase)
+            for quantile in self.QUANTILES:
+                lines.append('{0}{{{1},quantile="{2:g}"}} {3:.9f}'.format(
+                        wall_name, labels, quantile, stat['p{0:g}'.format(100 * quantile)]))
+            lines.append('{0}_sum{{{1}}} {2:.9f}'.format(wall_name, labels, stat['mean_wall'] * stat['count']))
+            lines.append('{0}_count{{{1}}} {2}'.format(wall_name, labels, stat['count']))
+
+        lines.append('# HELP {0} simulation clock duration of environment phases'.format(sim_name))
+        lines.append('# TYPE {0} counter'.format(sim_name))
+        for (section, phase), stat in summary.items():
+            labels = 'section="{0}",phase="{1}"'.format(section, phase)
+            lines.append('{0}{{{1}}} {2:.9f}'.format(sim_name, labels, stat['mean_sim'] * stat['count']))
+
+        directory = os.path.dirname(os.path.abspath(metrics_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            os.replace(tmp_path, metrics_file)
+        except OSError as e:
+            rospy.logwarn('writing metrics file %s failed due to %s', metrics_file, e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @contextlib.contextmanager
+    def __timer(self, section: str, phase: str):
+        """
+        Context manager timing the enclosed block with monotonic wall clock and simulation clock
+
+        :param str section: name of the section
+               str phase: name of the phase, None for the whole section
+        """
+        if phase is None:
+            self.__current[section] = OrderedDict()
+        wall_start = time.monotonic()
+        sim_start = rospy.get_time()
+        try:
+            yield
+        finally:
+            wall = time.monotonic() - wall_start
+            sim = rospy.get_time() - sim_start
+            self.__record(section, phase, wall, sim)
+
+    def __record(self, section: str, phase: str, wall: float, sim: float):
+        """
+        Record the phase duration, end of a section run publishes its breakdown
+
+        :param str section: name of the section
+               str phase: name of the phase, None for the whole section
+               float wall: wall clock duration (in seconds)
+               float sim: simulation clock duration (in seconds)
+        """
+        breakdown = self.__current.setdefault(section, OrderedDict())
+        if phase is not None:
+            timing = breakdown.setdefault(phase, {'wall': 0.0, 'sim': 0.0})
+            timing['wall'] += wall
+            timing['sim'] += sim
+            return
+
+        breakdown['total'] = {'wall': wall, 'sim': sim}
+        with self.__lock:
+            for name, timing in breakdown.items():
+                key = (section, name)
+                if key not in self.__samples:
+                    self.__samples[key] = deque(maxlen=self._window)
+                    self.__totals[key] = (0.0, 0.0, 0)
+                self.__samples[key].append(timing['wall'])
+                wall_sum, sim_sum, count = self.__totals[key]
+                self.__totals[key] = (wall_sum + timing['wall'], sim_sum + timing['sim'], count + 1)
+            self.__last[section] = breakdown
+        self.__current[section] = OrderedDict()
+
+        if self._metrics_file is not None and time.monotonic() >= self.__next_flush:
+            self.__next_flush = time.monotonic() + self._flush_interval
+            self.flush()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from openai_ros import pojo
+
+def build_skip_field(occupied, max_distance: int = 16):
+    """
+    Compute the chessboard distance (in cells) from every cell to the nearest
+    occupied cell, capped at max_distance
+
+    A beam within a cell of distance d can safely advance d - 1 cells without
+    entering any occupied cell (empty space skipping)
+
+    :param numpy.ndarray occupied: (height, width) bool mask of occupied cells
+           int max_distance: cap of the distance (cells farther away get this value)
+    :return numpy.ndarray (uint8 (height, width) distances)
+    """
+
+    max_distance = min(int(max_distance), 255)
+    distance = np.full(occupied.shape, max_distance, dtype=np.uint8)
+    frontier = occupied.copy()
+    dilated = np.empty_like(frontier)
+    for d in range(max_distance):
+        distance[frontier & (distance == max_distance)] = d
+        # 3x3 dilation (separable) grows the frontier by one cell in chessboard metric
+        dilated[...] = frontier
+        dilated[1:, :] |= frontier[:-1, :]
+        dilated[:-1, :] |= frontier[1:, :]
+        frontier[...] = dilated
+        frontier[:, 1:] |= dilated[:, :-1]
+        frontier[:, :-1] |= dilated[:, 1:]
+    return distance
+
+class Raycaster():
+    """
+        Raycaster class is an implementation to cast laser beams for a batch of
+        poses on the occupancy grid of pojo.Map, beams are traced cell by cell
+        (vectorized over all beams of all poses) with optional empty space skipping
+    """
+
+    def __init__(self, map, num_beams: int = 360, angle_min: float = 0.0, angle_increment: float = None,
+                 min_range: float = None, max_range: float = None, no_hit_value: float = np.inf,
+                 use_skip_field: bool = True, max_skip_distance: int = 16, max_rays: int = 1 << 18):
+        """
+        Initialize Raycaster class
+
+        :param pojo.Map map: occupancy map (unknown cells are treated as free)
+               int num_beams: number of beams per scan
+               float angle_min: angle of the first beam w.r.t. robot heading
+               float angle_increment: angle between beams, default covers 360 degrees
+               float min_range: beams start at this range, default is pojo.LaserScan._min_laser_value
+               float max_range: beams end at this range, default is pojo.LaserScan._max_laser_value
+               float no_hit_value: range of beams without obstacle within max_range
+                     (inf as in sensor_msgs/LaserScan.ranges)
+               bool use_skip_field: whether to precompute the skip field of the map
+               int max_skip_distance: cap (in cells) of the skip field
+               int max_rays: maximum number of beams traced at once (bounds the memory)
+        """
+        super(Raycaster, self).__init__()
+
+        laser_scan = pojo.LaserScan()
+        if min_range is None:
+            min_range = laser_scan._min_laser_value
+        if max_range is None:
+            max_range = laser_scan._max_laser_value
+        if angle_increment is None:
+            angle_increment = 2 * np.pi / num_beams
+
+        self._map = map
+        self._min_range = float(min_range)
+        self._max_range = float(max_range)
+        self._no_hit_value = no_hit_value
+        self._max_rays = max_rays
+        self._beam_angles = angle_min + angle_increment * np.arange(num_beams)
+
+        self._scale = map.get_scale()
+        self._width, self._height = map.get_size()
+        self._occupied = np.ascontiguousarray(map.get_occupied_mask()).reshape(-1)
+        self._skip_field = None
+        if use_skip_field:
+            self._skip_field = build_skip_field(map.get_occupied_mask(), max_skip_distance) \
+                                    .astype(np.float64).reshape(-1)
+
+    def get_beam_angles(self):
+        """
+        Beam angles (w.r.t. robot heading) Getter
+        """
+        return self._beam_angles
+
+    def cast(self, poses):
+        """
+        Cast all beams from each pose
+
+        :param numpy.ndarray poses: (N, 3) [x, y, yaw] rows (or single [x, y, yaw]) in world frame
+        :return numpy.ndarray (float32 (N, num_beams) ranges, or (num_beams,) for single pose)
+        """
+
+        poses = np.asarray(poses, dtype=np.float64)
+        is_single = poses.ndim == 1
+        poses = poses.reshape(-1, 3)
+        num_beams = self._beam_angles.shape[0]
+
+        ranges = np.empty((poses.shape[0], num_beams), dtype=np.float32)
+        chunk = max(1, self._max_rays // num_beams)
+        for start in range(0, poses.shape[0], chunk):
+            ranges[start:start + chunk] = self.__cast(poses[start:start + chunk]).reshape(-1, num_beams)
+
+        return ranges[0] if is_single else ranges
+
+    def __cast(self, poses):
+        """
+        Trace the beams of the poses through the grid
+
+        :param numpy.ndarray poses: (N, 3) [x, y, yaw] rows
+        :return numpy.ndarray (float32 (N * num_beams) ranges)
+        """
+
+        num_beams = self._beam_angles.shape[0]
+        cols, rows = self._map.world_to_grid(poses[:, 0], poses[:, 1])
+        origin_x = np.repeat(cols, num_beams)
+        origin_y = np.repeat(rows, num_beams)
+        angles = (poses[:, 2:3] + self._beam_angles).reshape(-1)
+        dir_x = np.cos(angles)
+        dir_y = np.sin(angles)
+
+        # beams are clipped to the grid (no obstacles outside of it), slab test
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv_x = np.where(dir_x != 0.0, 1.0 / dir_x, np.inf)
+            inv_y = np.where(dir_y != 0.0, 1.0 / dir_y, np.inf)
+        t_x0, t_x1 = self.__slab(origin_x, dir_x, inv_x, self._width)
+        t_y0, t_y1 = self.__slab(origin_y, dir_y, inv_y, self._height)
+        t_enter = np.maximum(np.maximum(t_x0, t_y0), self._min_range / self._scale)
+        t_exit = np.minimum(np.minimum(t_x1, t_y1), self._max_range / self._scale)
+
+        # next cell boundary is at floor + 1 for positive direction (or parallel), floor otherwise
+        offset_x = (dir_x >= 0.0).astype(np.float64)
+        offset_y = (dir_y >= 0.0).astype(np.float64)
+        # nudge past cell boundaries (in cells)
+        epsilon = 1e-6
+
+        ranges = np.full(angles.shape, self._no_hit_value, dtype=np.float32)
+        t = t_enter
+        active = np.nonzero(t_enter < t_exit)[0]
+        max_col, max_row = self._width - 1, self._height - 1
+        while active.shape[0] > 0:
+            t_active = t[active]
+            pos_x = origin_x[active] + t_active * dir_x[active]
+            pos_y = origin_y[active] + t_active * dir_y[active]
+            # beam is within the grid, clamp round off at the boundaries
+            cell_x = np.minimum(np.maximum(np.floor(pos_x), 0), max_col)
+            cell_y = np.minimum(np.maximum(np.floor(pos_y), 0), max_row)
+            cells = (cell_y * self._width + cell_x).astype(np.intp)
+
+            is_hit = self._occupied[cells]
+            ranges[active[is_hit]] = t_active[is_hit] * self._scale
+
+            # distance to the next cell boundary along the beam
+            step = np.minimum((cell_x + offset_x[active] - pos_x) * inv_x[active],
+                              (cell_y + offset_y[active] - pos_y) * inv_y[active])
+            if self._skip_field is not None:
+                step = np.maximum(step, self._skip_field[cells] - 1.0)
+            t_active += step + epsilon
+            t[active] = t_active
+
+            active = active[~is_hit & (t_active < t_exit[active])]
+
+        return ranges
+
+    @staticmethod
+    def __slab(origin, direction, inverse, size: int):
+        """
+        Compute the beam parameters at which the beam enters and exits the
+        grid extent [0, size) along one axis
+
+        :return numpy.ndarray (enter), numpy.ndarray (exit)
+        """
+        is_inside = (origin >= 0) & (origin < size)
+        with np.errstate(invalid='ignore'):
+            t0 = -origin * inverse
+            t1 = (size - origin) * inverse
+        t_enter = np.where(direction != 0.0, np.minimum(t0, t1), np.where(is_inside, -np.inf, np.inf))
+        t_exit = np.where(direction != 0.0, np.maximum(t0, t1), np.where(is_inside, np.inf, -np.inf))
+        return t_enter, t_exit
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+import rospy
+from gazebo_msgs.msg import ModelState
+import time
+import threading
+
+class ResetPlanner():
+    """
+        ResetPlanner class is an implementation to reset the world models incrementally,
+        the desired world is compared with the models tracked by the connection and
+        only the differences are spawned, deleted or teleported
+    """
+
+    # reset paths, from cheapest to most expensive
+    NOOP = 'NOOP'
+    TELEPORT = 'TELEPORT'
+    INCREMENTAL = 'INCREMENTAL'
+    FULL = 'FULL'
+
+    def __init__(self, gazebo, tolerance: float = 1e-4):
+        """
+        Initialize ResetPlanner class
+
+        :param GazeboConnection gazebo: connection (or KinematicConnection) of the world
+               float tolerance: maximum difference of pose components (position in meters,
+                     quaternion) of a model considered as unchanged
+        """
+        super(ResetPlanner, self).__init__()
+
+        self.__lock = threading.Lock()
+        self.__gazebo = gazebo
+        self.__tolerance = tolerance
+        # model name => pose (tuple) last applied through this planner
+        self.__poses = {}
+        self.__last_report = None
+        # reset path => {'count': int, 'total_duration': seconds}
+        self.__stats = {}
+
+    def add_unmanaged(self, model_names: list):
+        """
+        Exclude the models from reset, they are neither deleted nor teleported
+
+        Models are registered with the connection, so they are excluded from the
+        reset of every robot sharing the world (MultiRobotEnv)
+
+        :param list model_names: names of the models
+        """
+        self.__gazebo.add_unmanaged_models(model_names)
+
+    def plan(self, desired_models: dict):
+        """
+        Compute the changes required to reach the desired world
+
+        :param dict desired_models: model name => geometry_msgs.msg._Pose.Pose, sdf models
+                    (of indoor_layouts) the world should contain besides the initial models
+        :return dict ('spawn', 'delete', 'teleport' and 'keep' model name lists, 'path')
+        """
+
+        spawned_models = self.__gazebo.get_spawned_models()
+        unmanaged = self.__gazebo.get_unmanaged_models()
+        with self.__lock:
+            poses = dict(self.__poses)
+
+        plan = {'spawn': [], 'delete': [], 'teleport': [], 'keep': []}
+        for model_name in spawned_models:
+            if model_name not in desired_models and model_name not in unmanaged:
+                plan['delete'].append(model_name)
+        for model_name, pose in desired_models.items():
+            if model_name not in spawned_models:
+                plan['spawn'].append(model_name)
+            elif self.__is_same_pose(poses.get(model_name), self.__pose_tuple(pose)):
+                plan['keep'].append(model_name)
+            else:
+                # pose is unknown (not applied by this planner) or changed
+                plan['teleport'].append(model_name)
+
+        if plan['spawn'] and not plan['keep'] and not plan['teleport']:
+            plan['path'] = self.FULL
+        elif plan['spawn'] or plan['delete']:
+            plan['path'] = self.INCREMENTAL
+        elif plan['teleport']:
+            plan['path'] = self.TELEPORT
+        else:
+            plan['path'] = self.NOOP
+        return plan
+
+    def reset(self, desired_models: dict):
+        """
+        Reset the world models to the desired world
+
+        :param dict desired_models: model name => geometry_msgs.msg._Pose.Pose, sdf models
+                    (of indoor_layouts) the world should contain besides the initial models
+        :return dict (report: 'path', 'spawned', 'deleted', 'teleported' model name lists, 'duration')
+        """
+
+        rospy.logdebug('ResetPlanner.reset() start')
+        start = time.perf_counter()
+        plan = self.plan(desired_models)
+
+        # delete first, so spawned models never overlap the removed ones
+        for model_name in plan['delete']:
+            self.__gazebo.delete_model(model_name)
+            with self.__lock:
+                self.__poses.pop(model_name, None)
+
+        for model_name in plan['teleport']:
+            model_state = ModelState()
+            model_state.model_name = model_name
+            model_state.pose = desired_models[model_name]
+            self.__gazebo.set_model_state(model_state)
+            with self.__lock:
+                self.__poses[model_name] = self.__pose_tuple(desired_models[model_name])
+
+        for model_name in plan['spawn']:
+            self.__gazebo.spawn_sdf_model(model_name, desired_models[model_name])
+            with self.__lock:
+                self.__poses[model_name] = self.__pose_tuple(desired_models[model_name])
+
+        duration = time.perf_counter() - start
+        report = {
+            'path': plan['path'],
+            'spawned': plan['spawn'],
+            'deleted': plan['delete'],
+            'teleported': plan['teleport'],
+            'duration': duration,
+        }
+        with self.__lock:
+            self.__last_report = report
+            stat = self.__stats.setdefault(plan['path'], {'count': 0, 'total_duration': 0.0})
+            stat['count'] += 1
+            stat['total_duration'] += duration
+
+        rospy.logdebug('reset path: {0} ({1:.3f} sec) spawned: {2} deleted: {3} teleported: {4}'.format(
+                        plan['path'], duration, plan['spawn'], plan['delete'], plan['teleport']))
+        return report
+
+    def get_last_report(self):
+        """
+        Gets the report of the last reset
+
+        :return dict or None if not yet reset
+        """
+        with self.__lock:
+            return None if self.__last_report is None else dict(self.__last_report)
+
+    def get_stats(self):
+        """
+        Gets the per reset path count and total duration
+
+        :return dict
+        """
+        with self.__lock:
+            return {path: dict(stat) for path, stat in self.__stats.items()}
+
+    @staticmethod
+    def __pose_tuple(pose):
+        """
+        Convert the pose to tuple (position x, y, z, orientation x, y, z, w)
+        """
+        return (pose.position.x, pose.position.y, pose.position.z,
+                pose.orientation.x, pose.orientation.y, pose.orientation.z, pose.orientation.w)
+
+    def __is_same_pose(self, pose_a, pose_b):
+        """
+        Checks whether both poses (tuples) are equal within tolerance
+        """
+        if pose_a is None or pose_b is None:
+            return False
+        return all(abs(a - b) <= self.__tolerance for a, b in zip(pose_a, pose_b))
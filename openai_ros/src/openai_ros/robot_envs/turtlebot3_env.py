@@ -2,18 +2,22 @@
 
 import rospy
 from openai_ros import utils, rosbot_gazebo_env
+from openai_ros.sensor_hub import SensorHub
 from sensor_msgs.msg import LaserScan, Imu
 from nav_msgs.msg import Odometry
 from geometry_msgs.msg import Twist, PoseWithCovarianceStamped
 from gazebo_msgs.msg import ModelState
 import time
+import threading
 
 class TurtleBot3Env(rosbot_gazebo_env.RosbotGazeboEnv):
     """
         TurtleBot3Env class acts as abstract turtlebot environment template
     """
 
-    def __init__(self, reset_type = 'SIMULATION'):
+    def __init__(self, reset_type = 'SIMULATION', profile: bool = False, metrics_file: str = None,
+                 step_mode: str = 'REALTIME', step_iterations: int = 200,
+                 robot_ns: str = '', gazebo = None):
         """
         Initialize TurtleBot3Env class
 
@@ -25,9 +29,34 @@ class TurtleBot3Env(rosbot_gazebo_env.RosbotGazeboEnv):
         Actuator Topic List:
         * /cmd_vel : Move the robot through Twist commands
 
-        """
+        All topics are resolved within robot namespace (eg. /tb3_0/scan)
 
-        super(TurtleBot3Env, self).__init__(reset_type = reset_type)
+        Parameters
+        ----------
+        reset_type: str
+            Possible values are: ['SIMULATION', 'WORLD']
+        profile: bool
+            Whether to time the phases of step() and reset()
+        metrics_file: str
+            Path of prometheus text format file for phase latencies
+        step_mode: str
+            Possible values are: ['REALTIME', 'LOCKSTEP']
+        step_iterations: int
+            Number of physics iterations per action in LOCKSTEP mode
+        robot_ns: str
+            Namespace of the robot topics, services and tf frames, also used as the
+            gazebo model name (default model name is 'turtlebot3' if empty)
+        gazebo: GazeboConnection
+            Connection shared by robots within the same gazebo world
+
+        """
+
+        super(TurtleBot3Env, self).__init__(reset_type = reset_type, profile = profile,
+                                            metrics_file = metrics_file, step_mode = step_mode,
+                                            step_iterations = step_iterations, gazebo = gazebo)
+
+        self._robot_ns = robot_ns.strip('/')
+        self._model_name = self._robot_ns or 'turtlebot3'
 
         self._laser_scan = None
         self._imu_data = None
@@ -48,17 +77,36 @@ class TurtleBot3Env(rosbot_gazebo_env.RosbotGazeboEnv):
         self._request_amcl = False
         self._request_gazebo_data = False
 
+        # long-lived sensor subscriptions, latest message per topic
+        self._sensor_hub = SensorHub()
+        self._lockstep_sensor_time_out = 0.1
+        self._sensor_seqs = {}
+        self._sensor_hub.register(self._resolve_name('/scan'), LaserScan)
+        self._sensor_hub.register(self._resolve_name('/imu'), Imu)
+        self._sensor_hub.register(self._resolve_name('/odom'), Odometry)
+
+        # twist tolerance (min/max linear and angular speed) evaluated on each odom message
+        self._twist_condition = threading.Condition()
+        self._twist_target = None
+        self._twist_start = None
+        self._twist_achieved = False
+        self._twist_samples = 0
+        self._twist_latency = 0.0
+        self._twist_stats = {}
+
         # setup subscribers and publishers
         self.gazebo.unpause_sim()
         self._check_all_systems_are_ready()
 
-        rospy.Subscriber('/scan', LaserScan, self._laser_scan_callback)
-        rospy.Subscriber('/imu', Imu, self._imu_data_callback)
-        rospy.Subscriber('/odom', Odometry, self._odom_data_callback)
+        # topics served by an in-process simulation backend are received/published locally
+        utils.create_subscriber(self._resolve_name('/scan'), LaserScan, self._laser_scan_callback)
+        utils.create_subscriber(self._resolve_name('/imu'), Imu, self._imu_data_callback)
+        utils.create_subscriber(self._resolve_name('/odom'), Odometry, self.__odom_callback)
 
-        self._cmd_vel_pub = rospy.Publisher('/cmd_vel', Twist, queue_size = 5)
-        self._init_pose_pub = rospy.Publisher('/initialpose', PoseWithCovarianceStamped, queue_size = 5)
-        self._gazebo_pose_pub = rospy.Publisher('/gazebo/set_model_state', ModelState, queue_size = 5)
+        self._cmd_vel_pub = utils.create_publisher(self._resolve_name('/cmd_vel'), Twist, queue_size = 5)
+        self._init_pose_pub = utils.create_publisher(self._resolve_name('/initialpose'), PoseWithCovarianceStamped, queue_size = 5)
+        # gazebo topics and services belong to the world, they are not namespaced
+        self._gazebo_pose_pub = utils.create_publisher('/gazebo/set_model_state', ModelState, queue_size = 5)
 
         self._check_publishers_connection()
         self.gazebo.pause_sim()
@@ -102,6 +150,25 @@ class TurtleBot3Env(rosbot_gazebo_env.RosbotGazeboEnv):
     	"""
     	return self._gazebo_pose
 
+    def get_sensor_hub_stats(self):
+    	"""
+    	Sensor hub received message counters Getter
+    	"""
+    	return self._sensor_hub.get_stats()
+
+    def get_wait_stats(self):
+    	"""
+    	State-confirmed wait durations Getter
+    	"""
+    	return utils.get_wait_stats()
+
+    def close(self):
+        """
+        Override rosbot gazebo environment close() with custom logic
+        """
+        self._sensor_hub.close()
+        super(TurtleBot3Env, self).close()
+
     #### private methods ####
 
     def _check_all_systems_are_ready(self):
@@ -195,10 +262,9 @@ class TurtleBot3Env(rosbot_gazebo_env.RosbotGazeboEnv):
         """
 
         rospy.logdebug('TurtleBot3Env._check_laser_scan_is_ready() start')
-        topic_name = '/scan'
-        topic_class = LaserScan
+        topic_name = self._resolve_name('/scan')
         time_out = 5.0
-        self._laser_scan  = utils.receive_topic_msg(topic_name, topic_class, time_out)
+        self._laser_scan = self._wait_for_sensor_msg(topic_name, time_out)
         return self._laser_scan
 
     def _check_imu_data_is_ready(self):
@@ -212,10 +278,9 @@ class TurtleBot3Env(rosbot_gazebo_env.RosbotGazeboEnv):
         """
 
         rospy.logdebug('TurtleBot3Env._check_imu_data_is_ready() start')
-        topic_name = '/imu'
-        topic_class = Imu
+        topic_name = self._resolve_name('/imu')
         time_out = 5.0
-        self._imu_data = utils.receive_topic_msg(topic_name, topic_class, time_out)
+        self._imu_data = self._wait_for_sensor_msg(topic_name, time_out)
         return self._imu_data
 
     def _check_odom_data_is_ready(self):
@@ -229,12 +294,69 @@ class TurtleBot3Env(rosbot_gazebo_env.RosbotGazeboEnv):
         """
 
         rospy.logdebug('TurtleBot3Env._check_odom_data_is_ready() start')
-        topic_name = '/odom'
-        topic_class = Odometry
+        topic_name = self._resolve_name('/odom')
         time_out = 5.0
-        self._odom_data = utils.receive_topic_msg(topic_name, topic_class, time_out)
+        self._odom_data = self._wait_for_sensor_msg(topic_name, time_out)
         return self._odom_data
 
+    def _resolve_name(self, name: str):
+        """
+        Resolve the topic/service name within the robot namespace
+
+        Parameters
+        ----------
+        name: str
+            global name (eg. '/scan')
+
+        Returns
+        -------
+        name: str
+            namespaced name (eg. '/tb3_0/scan')
+        """
+
+        return utils.resolve_name(self._robot_ns, name)
+
+    def _wait_for_sensor_msg(self, topic_name: str, time_out: float = 5.0, require_new: bool = True):
+        """
+        Gets the latest message of the sensor topic, blocks only if no message newer
+        than the previously consumed one has been received
+
+        Parameters
+        ----------
+        topic_name: str
+            name of the topic registered with sensor hub
+        time_out: float
+            timeout in seconds
+        require_new: bool
+            whether the message must be newer than the previously consumed one, topics
+            republished only on change (eg. latched amcl output) use the latest message
+            and block only until the first one is received
+
+        Returns
+        -------
+        msg: rospy.Message
+            Message (None if timed out)
+        """
+
+        newer_than = self._sensor_seqs.get(topic_name, 0)
+        if not require_new:
+            msg, seq, _ = self._sensor_hub.get_latest(topic_name)
+            if msg is None:
+                msg, seq = self._sensor_hub.wait_for_message(topic_name, 0, time_out)
+        else:
+            if self.is_lockstep():
+                # paused world only publishes what was produced while it was stepped,
+                # wait briefly for a newer message and otherwise use the latest one
+                time_out = min(time_out, self._lockstep_sensor_time_out)
+            msg, seq = self._sensor_hub.wait_for_message(topic_name, newer_than, time_out)
+            if msg is None and self.is_lockstep():
+                msg, seq, _ = self._sensor_hub.get_latest(topic_name)
+        if msg is not None:
+            self._sensor_seqs[topic_name] = seq
+        else:
+            rospy.logwarn('wait for message from topic %s failed', topic_name)
+        return msg
+
     def _laser_scan_callback(self, data):
         """
         This function is called when laser scan is received
@@ -298,8 +420,17 @@ class TurtleBot3Env(rosbot_gazebo_env.RosbotGazeboEnv):
         cmd_vel_msg.linear.x = linear_speed
         cmd_vel_msg.angular.z = angular_speed
         self._check_cmd_vel_pub_ready()
+        # odom callback starts evaluating the twist tolerance before the command is sent
+        self._set_twist_target(cmd_vel_msg, motion_error)
+        if self.is_lockstep():
+            # command is part of the step request, so it is delivered before the world is
+            # advanced by exact number of physics iterations (a topic may arrive too late)
+            self.gazebo.step_sim(self._step_iterations, cmd_vel_msg, self._resolve_name('/cmd_vel'))
+            delta = self._collect_twist_stats()
+            # world stays paused, next step request carries the next command
+            return
+
         self._cmd_vel_pub.publish(cmd_vel_msg)
-        time.sleep(0.2)
         # wait for the given twist message to be executed correctly
         delta = self._wait_until_twist_achieved(cmd_vel_msg, motion_error, update_rate)
 
@@ -309,9 +440,37 @@ class TurtleBot3Env(rosbot_gazebo_env.RosbotGazeboEnv):
         self._check_cmd_vel_pub_ready()
         self._cmd_vel_pub.publish(cmd_vel_msg)
 
+    def _set_twist_target(self, cmd_vel_msg: Twist, motion_error: float):
+        """
+        Set the twist to be evaluated by the odom callback, only odom messages
+        stamped after this call are considered
+
+        Parameters
+        ----------
+        cmd_vel_msg: Twist
+            velocity in terms of linear and angular parts
+        motion_error: float
+            acceptable deviation from the given speed and odometry readings
+        """
+
+        # compute the acceptable ranges for linear and angular velocity
+        min_linear_speed = cmd_vel_msg.linear.x - motion_error
+        max_linear_speed = cmd_vel_msg.linear.x + motion_error
+        min_angular_speed = cmd_vel_msg.angular.z - motion_error
+        max_angular_speed = cmd_vel_msg.angular.z + motion_error
+
+        with self._twist_condition:
+            self._twist_target = (min_linear_speed, max_linear_speed,
+                                  min_angular_speed, max_angular_speed)
+            self._twist_start = rospy.get_rostime()
+            self._twist_achieved = False
+            self._twist_samples = 0
+            self._twist_latency = 0.0
+
     def _wait_until_twist_achieved(self, cmd_vel_msg: Twist, motion_error: float, update_rate: float, time_out: float = 3.0):
         """
-        Wait for the robot to achieve given cmd_vel, by referencing the odometry velocity readings
+        Wait for the robot to achieve given cmd_vel, the odometry velocity readings
+        are evaluated by the odom callback which notifies once twist is achieved
 
         Parameters
         ----------
@@ -320,9 +479,9 @@ class TurtleBot3Env(rosbot_gazebo_env.RosbotGazeboEnv):
         motion_error: float
             acceptable deviation from the given speed and odometry readings
         update_rate: float
-            rate at which we check the odometry
+            rate at which the (simulation time) deadline is rechecked
         time_out: float
-            timeout in seconds
+            timeout in seconds (simulation time)
 
         Returns
         -------
@@ -331,48 +490,110 @@ class TurtleBot3Env(rosbot_gazebo_env.RosbotGazeboEnv):
         """
 
         rospy.logdebug('TurtleBot3Env._wait_until_twist_achieved() start')
-        # compute the acceptable ranges for linear and angular velocity
-        min_linear_speed = cmd_vel_msg.linear.x - motion_error
-        max_linear_speed = cmd_vel_msg.linear.x + motion_error
-        min_angular_speed = cmd_vel_msg.angular.z - motion_error
-        max_angular_speed = cmd_vel_msg.angular.z + motion_error
+        wait_start_time = time.monotonic()
+        with self._twist_condition:
+            if self._twist_target is None:
+                # twist target not set by caller
+                self._set_twist_target(cmd_vel_msg, motion_error)
+            start_time = self._twist_start.to_sec()
+            deadline = start_time + time_out
+            # guard against simulation clock not advancing (eg. paused simulation)
+            wall_deadline = time.monotonic() + time_out
+            wall_start_time = start_time
 
-        rate = rospy.Rate(update_rate)
-        start_time = rospy.get_rostime().to_sec()
-        duration = 0.0
+            # TODO: check if robot has crashed
 
-        # loop until the twist is achieved
-        while not rospy.is_shutdown():
+            while not self._twist_achieved and not rospy.is_shutdown():
+                current_time = rospy.get_rostime().to_sec()
+                if current_time >= deadline:
+                    rospy.logwarn('motion cannot be achieved')
+                    break
+                if current_time > wall_start_time:
+                    # simulation clock advanced, reset the guard
+                    wall_start_time = current_time
+                    wall_deadline = time.monotonic() + time_out
+                elif time.monotonic() >= wall_deadline:
+                    rospy.logwarn('odom is not available')
+                    break
+                self._twist_condition.wait(1.0 / update_rate)
+
+            duration = self._collect_twist_stats()
+
+        utils.record_wait('twist_achieved', time.monotonic() - wait_start_time,
+                          self._twist_stats['twist_achieved'])
+        return duration
 
-            # TODO: check if robot has crashed
+    def _collect_twist_stats(self):
+        """
+        Stop evaluating the twist tolerance and store the twist statistics
 
-            current_odom = self._check_odom_data_is_ready()
-            duration = rospy.get_rostime().to_sec() - start_time
-            if current_odom is None:
-                # odom data not available
-                rospy.logwarn('odom is not available')
-                break
-
-            odom_linear_vel = current_odom.twist.twist.linear.x
-            odom_angular_vel = current_odom.twist.twist.angular.z
-
-            # check whether linear and angular veloctiy are valid
-            is_linear_vel_valid = (
-                                    (odom_linear_vel <= max_linear_speed) and
-                                    (odom_linear_vel > min_linear_speed)
-                                  )
-            is_angular_vel_valid = (
-                                    (odom_angular_vel <= max_angular_speed) and
-                                    (odom_angular_vel > min_angular_speed)
-                                   )
-
-            if is_linear_vel_valid and is_angular_vel_valid:
-                # required twist achieved
-                break
-            elif duration < time_out:
-                # otherwise
-                rate.sleep()
+        Returns
+        -------
+        duration: float
+            time taken to achieve required twist, or time elapsed since
+            twist target was set if not achieved (in seconds)
+        """
+
+        with self._twist_condition:
+            if self._twist_achieved:
+                duration = self._twist_latency
             else:
-                rospy.logwarn('motion cannot be achieved')
-                break
+                duration = rospy.get_rostime().to_sec() - self._twist_start.to_sec()
+            self._twist_stats = {
+                'twist_achieved': self._twist_achieved,
+                'twist_latency': duration,
+                'odom_samples': self._twist_samples,
+            }
+            self._twist_target = None
         return duration
+
+    def _get_info(self):
+        """
+        Override rosbot gazebo environment _get_info() with custom logic
+
+        Returns
+        -------
+        info: dict
+            twist achieved flag, latency (in seconds) and number of odom samples
+            examined while executing the last action
+        """
+
+        return dict(self._twist_stats)
+
+    def __odom_callback(self, data):
+        """
+        This function is called when odom data is received, evaluates the
+        twist tolerance before forwarding data to _odom_data_callback()
+
+        Parameters
+        ----------
+        data: rospy.Message
+            data received from odom topic
+        """
+
+        with self._twist_condition:
+            if self._twist_target is not None and not self._twist_achieved and \
+                    data.header.stamp >= self._twist_start:
+                min_linear_speed, max_linear_speed, \
+                    min_angular_speed, max_angular_speed = self._twist_target
+                odom_linear_vel = data.twist.twist.linear.x
+                odom_angular_vel = data.twist.twist.angular.z
+                self._twist_samples += 1
+
+                # check whether linear and angular veloctiy are valid
+                is_linear_vel_valid = (
+                                        (odom_linear_vel <= max_linear_speed) and
+                                        (odom_linear_vel > min_linear_speed)
+                                      )
+                is_angular_vel_valid = (
+                                        (odom_angular_vel <= max_angular_speed) and
+                                        (odom_angular_vel > min_angular_speed)
+                                       )
+
+                if is_linear_vel_valid and is_angular_vel_valid:
+                    # required twist achieved
+                    self._twist_achieved = True
+                    self._twist_latency = (data.header.stamp - self._twist_start).to_sec()
+                    self._twist_condition.notify_all()
+
+        self._odom_data_callback(data)
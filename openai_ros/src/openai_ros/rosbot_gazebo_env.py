@@ -4,6 +4,8 @@ import rospy
 import gym
 from gym.utils import seeding
 from openai_ros.gazebo_connection import GazeboConnection
+from openai_ros.profiler import StepProfiler
+from openai_ros.reset_planner import ResetPlanner
 from geometry_msgs.msg import *
 import time
 
@@ -14,7 +16,8 @@ class RosbotGazeboEnv(gym.Env):
 
     metadata = {'render.modes': ['human']}
 
-    def __init__(self, reset_type: str = 'SIMULATION'):
+    def __init__(self, reset_type: str = 'SIMULATION', profile: bool = False, metrics_file: str = None,
+                 step_mode: str = 'REALTIME', step_iterations: int = 200, gazebo: GazeboConnection = None):
         """
         Initialize RosbotGazeboEnv class
 
@@ -23,11 +26,36 @@ class RosbotGazeboEnv(gym.Env):
         reset_type: str
             This paremeter is used for creating GazeboConnection instance
             Possible values are: ['SIMULATION', 'WORLD']
+        profile: bool
+            Whether to time the phases of step() and reset(), last step
+            breakdown is returned as info['profile']
+        metrics_file: str
+            Path of prometheus text format file the phase latencies are
+            periodically written to
+        step_mode: str
+            Possible values are: ['REALTIME', 'LOCKSTEP']
+            REALTIME unpauses the simulation while action is executed, LOCKSTEP
+            keeps it paused and advances it by step_iterations physics iterations
+        step_iterations: int
+            Number of physics iterations per action in LOCKSTEP mode
+        gazebo: GazeboConnection
+            Connection shared by environments of robots within the same gazebo world,
+            new connection is created if not given
 
         """
 
+        self._step_mode = step_mode
+        self._step_iterations = step_iterations
+
+        # create StepProfiler instance
+        self.profiler = StepProfiler(enabled = profile, metrics_file = metrics_file)
+
         # create GazeboConnection instance
-        self.gazebo = GazeboConnection(reset_type = reset_type)
+        if gazebo is None:
+            gazebo = GazeboConnection(reset_type = reset_type)
+        self.gazebo = gazebo
+        # world models are reset incrementally, unchanged models are reused across episodes
+        self._reset_planner = ResetPlanner(self.gazebo)
 
         self.seed()
 
@@ -49,10 +77,13 @@ class RosbotGazeboEnv(gym.Env):
 
         """
 
-        # reset the gazebo simulation
-        self._reset_sim()
-        # get latest observation
-        obs = self._get_obs()
+        profiler = self.profiler
+        with profiler.section('reset'):
+            # reset the gazebo simulation
+            self._reset_sim()
+            # get latest observation
+            with profiler.phase('reset', 'get_obs'):
+                obs = self._get_obs()
         rospy.loginfo('status: environment is reset')
         return obs
 
@@ -62,11 +93,26 @@ class RosbotGazeboEnv(gym.Env):
 
         """
 
+        # write final phase latencies
+        self.profiler.flush()
+
         # initiate node shutdown
         rospy.signal_shutdown('closing RosbotGazeboEnv')
         rospy.loginfo('status: environment is closed')
         rospy.loginfo('======================================')
 
+    def is_lockstep(self):
+        """
+        Whether the world is currently advanced in lock-step, i.e. LOCKSTEP mode
+        and the simulation is paused
+
+        Returns
+        -------
+        lockstep: bool
+        """
+
+        return self._step_mode == 'LOCKSTEP' and self.gazebo.is_paused()
+
     def render(self, mode='human'):
         """
         Override gym environment render() with custom logic
@@ -97,17 +143,36 @@ class RosbotGazeboEnv(gym.Env):
 
         """
 
-        # execute the action
-        self.gazebo.unpause_sim()
-        self._set_action(action)
-        self._check_all_systems_are_ready() # get latest system data
-        self.gazebo.pause_sim()
-
-        # compute the required fields
-        obs = self._get_obs()
-        done = self._is_done()
-        reward = self._compute_reward(obs, done)
-        info = {}
+        profiler = self.profiler
+        with profiler.section('step'):
+            if self.is_lockstep():
+                # execute the action, world is advanced by the action while remaining paused
+                with profiler.phase('step', 'set_action'):
+                    self._set_action(action)
+                with profiler.phase('step', 'check_all_systems'):
+                    self._check_all_systems_are_ready() # get latest system data
+            else:
+                # execute the action
+                with profiler.phase('step', 'unpause_sim'):
+                    self.gazebo.unpause_sim()
+                with profiler.phase('step', 'set_action'):
+                    self._set_action(action)
+                with profiler.phase('step', 'check_all_systems'):
+                    self._check_all_systems_are_ready() # get latest system data
+                with profiler.phase('step', 'pause_sim'):
+                    self.gazebo.pause_sim()
+
+            # compute the required fields
+            with profiler.phase('step', 'get_obs'):
+                obs = self._get_obs()
+            with profiler.phase('step', 'is_done'):
+                done = self._is_done()
+            with profiler.phase('step', 'compute_reward'):
+                reward = self._compute_reward(obs, done)
+            info = self._get_info()
+
+        if profiler.is_enabled():
+            info['profile'] = profiler.get_last('step')
 
         return obs, reward, done, info
 
@@ -119,27 +184,118 @@ class RosbotGazeboEnv(gym.Env):
 
         """
 
+        profiler = self.profiler
         # pre-reset tasks
-        self.gazebo.unpause_sim()
-        self._check_all_systems_are_ready()
-        self._set_init_pose()
-        self.gazebo.pause_sim()
+        with profiler.phase('reset', 'unpause_sim'):
+            self.gazebo.unpause_sim()
+        with profiler.phase('reset', 'check_all_systems'):
+            self._check_all_systems_are_ready()
+        with profiler.phase('reset', 'set_init_pose'):
+            self._set_init_pose()
+        with profiler.phase('reset', 'pause_sim'):
+            self.gazebo.pause_sim()
 
         # reset the gazebo
         #self.gazebo.reset_sim()
 
-        self.gazebo.clear_all_spawned_models()
-        # TODO: sdf_model should randomly change
-        sdf_model = 'sample'
-        self.gazebo.spawn_sdf_model(sdf_model, Pose())
+        self._reset_world()
 
         # set environment variables each time we reset
-        self._init_env_variables()
+        with profiler.phase('reset', 'init_env_variables'):
+            self._init_env_variables()
 
         # check if everything working fine after reset
-        self.gazebo.unpause_sim()
-        self._check_all_systems_are_ready()
-        self.gazebo.pause_sim()
+        with profiler.phase('reset', 'unpause_sim'):
+            self.gazebo.unpause_sim()
+        with profiler.phase('reset', 'check_all_systems'):
+            self._check_all_systems_are_ready()
+        with profiler.phase('reset', 'pause_sim'):
+            self.gazebo.pause_sim()
+
+    def _reset_world(self):
+        """
+        Custom logic to reset the models of gazebo world (shared by all robots)
+
+        """
+
+        profiler = self.profiler
+        with profiler.phase('reset', 'reset_world'):
+            report = self._reset_planner.reset(self._get_world_models())
+        rospy.loginfo('status: world reset path {0} ({1:.3f} sec)'.format(report['path'], report['duration']))
+
+        arena = self.gazebo.get_arena()
+        if arena is not None:
+            # layouts are already within the world, only the map of the next layout is published
+            with profiler.phase('reset', 'switch_layout'):
+                arena.activate(self._select_layout(arena.get_layouts()))
+
+    def _get_world_models(self):
+        """
+        Desired models of gazebo world (besides the initial models) for the next episode
+
+        Returns
+        -------
+        models: dict
+            model name => geometry_msgs.msg._Pose.Pose of sdf models (of indoor_layouts)
+
+        """
+
+        arena = self.gazebo.get_arena()
+        if arena is not None:
+            # all preloaded layouts are kept at their offsets
+            return arena.get_world_models()
+
+        # TODO: sdf_model should randomly change
+        sdf_model = 'sample'
+        return {sdf_model: Pose()}
+
+    def _select_layout(self, layouts: list):
+        """
+        Select the layout of the next episode among the preloaded layouts
+
+        Parameters
+        ----------
+        layouts: list
+            names of the preloaded layouts
+
+        Returns
+        -------
+        layout: str
+
+        """
+
+        # uniform random layout
+        return str(self.np_random.choice(layouts))
+
+    def get_layout_offset(self):
+        """
+        World position (in meters) of the origin of the active layout, robot
+        poses of the layout are shifted by it
+
+        Returns
+        -------
+        offset: tuple
+            (x, y), (0.0, 0.0) if layouts are not preloaded
+
+        """
+
+        arena = self.gazebo.get_arena()
+        if arena is None:
+            return (0.0, 0.0)
+        return arena.get_offset()
+
+    def get_reset_report(self):
+        """
+        Reset path (NOOP, TELEPORT, INCREMENTAL or FULL), changed models and duration
+        of the last world reset
+
+        Returns
+        -------
+        report: dict or None if not yet reset
+
+        """
+
+        return self._reset_planner.get_last_report()
 
     def _init_env_variables(self):
         """
@@ -183,5 +339,11 @@ class RosbotGazeboEnv(gym.Env):
         """
         raise NotImplementedError()
 
+    def _get_info(self):
+        """
+        Return the diagnostic information of the last step
+        """
+        return {}
+
 if __name__ == '__main__':
     env = RosbotGazeboEnv()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+class ScanProcessor():
+    """
+        ScanProcessor class is an implementation to process laser scan ranges
+        with whole-array numpy operations
+    """
+
+    def __init__(self, sector_angle: int = 15, max_laser_value: float = 6, min_laser_value: float = 0):
+        """
+        Initialize ScanProcessor class
+
+        :param int sector_angle: angle (in degrees) covered by each sector
+               float max_laser_value: value stored for inf laser beams
+               float min_laser_value: value stored for nan laser beams
+        """
+        super(ScanProcessor, self).__init__()
+
+        self._sector_angle = sector_angle
+        self._max_laser_value = max_laser_value
+        self._min_laser_value = min_laser_value
+        self._num_sectors = 360 // self._sector_angle
+
+        # shortest beam (range, angle) per sector => anti-clockwise
+        self.__sector_laser_scan = np.full((self._num_sectors, 2), np.inf, dtype=float)
+        self.__scan_ranges = np.zeros(0, dtype=np.float32)
+
+        # scan geometry for which lookup tables are computed
+        self.__geometry = None
+        self.__beam_cos = None
+        self.__beam_sin = None
+        self.__beam_angles = None
+        self.__sector_table = None
+
+        # preallocated work buffers (last element is an inf sentinel used for padding)
+        self.__ranges = None
+        self.__valid = None
+        self.__work_ranges = None
+        self.__work_angles = None
+        self.__sector_ranges = None
+        self.__sector_angles = None
+        self.__sector_argmin = None
+        self.__sector_rows = np.arange(self._num_sectors)
+
+    def get_sector_laser_scan(self):
+        """
+        Gets the shortest beam range with angle per sector
+
+        :return numpy.ndarray
+        """
+        return self.__sector_laser_scan
+
+    def get_scan_ranges(self):
+        """
+        Gets the scan ranges with inf/nan values clamped
+
+        :return numpy.ndarray
+        """
+        return self.__scan_ranges
+
+    def configure(self, num_beams: int, angle_min: float, angle_increment: float):
+        """
+        Precompute the per beam lookup tables for the given scan geometry,
+        tables are only rebuilt if the geometry changes
+
+        :param int num_beams: number of beams per scan
+               float angle_min: start angle of the scan (in radians)
+               float angle_increment: angular distance between beams (in radians)
+        """
+
+        geometry = (num_beams, angle_min, angle_increment)
+        if geometry == self.__geometry:
+            return
+        self.__geometry = geometry
+
+        beam_angles = angle_min + np.arange(num_beams) * angle_increment
+        self.__beam_angles = beam_angles
+        self.__beam_cos = np.cos(beam_angles)
+        self.__beam_sin = np.sin(beam_angles)
+
+        # beam -> sector index based on the beam angle (not the beam index)
+        # small tolerance to avoid float round off pushing a beam into previous sector
+        sector_rad = np.radians(self._sector_angle)
+        wrapped = np.mod(beam_angles, 2 * np.pi)
+        beam_sector = np.floor(wrapped / sector_rad + 1e-6).astype(int) % self._num_sectors
+
+        # padded (sector, beam) index table, padding points to the inf sentinel at index num_beams
+        counts = np.bincount(beam_sector, minlength=self._num_sectors)
+        width = max(int(counts.max()), 1)
+        table = np.full((self._num_sectors, width), num_beams, dtype=np.intp)
+        order = np.argsort(beam_sector, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        columns = np.arange(num_beams) - np.repeat(starts, counts)
+        table[beam_sector[order], columns] = order
+        self.__sector_table = table
+
+        self.__scan_ranges = np.zeros(num_beams, dtype=np.float32)
+        self.__ranges = np.zeros(num_beams, dtype=float)
+        self.__valid = np.zeros(num_beams, dtype=bool)
+        self.__work_ranges = np.full(num_beams + 1, np.inf, dtype=float)
+        self.__work_angles = np.full(num_beams + 1, np.inf, dtype=float)
+        self.__sector_ranges = np.zeros(table.shape, dtype=float)
+        self.__sector_angles = np.zeros(table.shape, dtype=float)
+        self.__sector_argmin = np.zeros(self._num_sectors, dtype=np.intp)
+
+    def process(self, ranges, angle_min: float, angle_increment: float,
+                pose_x: float, pose_y: float, pose_yaw: float, scale: float = 1.0):
+        """
+        Process the laser scan ranges w.r.t given robot pose
+
+            1. clamp inf/nan ranges into scan ranges
+            2. compute beam endpoints (in map frame) of beams hitting obstacle
+            3. store shortest beam range with angle per sector
+
+        :param sequence ranges: laser scan ranges
+               float angle_min: start angle of the scan (in radians)
+               float angle_increment: angular distance between beams (in radians)
+               float pose_x: robot position in x-axis
+               float pose_y: robot position in y-axis
+               float pose_yaw: robot orientation
+               float scale: scale the beam endpoints
+        :return numpy.ndarray
+        """
+
+        num_beams = len(ranges)
+        self.configure(num_beams, angle_min, angle_increment)
+
+        lranges = self.__ranges
+        lranges[:] = ranges
+        valid = self.__valid
+        np.isfinite(lranges, out=valid)
+
+        # if range is inf store max laser value, if nan store min laser value
+        scan_ranges = self.__scan_ranges
+        scan_ranges[:] = lranges
+        scan_ranges[np.isinf(lranges)] = self._max_laser_value
+        scan_ranges[np.isnan(lranges)] = self._min_laser_value
+
+        # beam endpoints for plotting, rotate precomputed beam directions by robot yaw
+        cos_yaw = np.cos(pose_yaw)
+        sin_yaw = np.sin(pose_yaw)
+        hit_ranges = lranges[valid] / scale
+        hit_cos = self.__beam_cos[valid]
+        hit_sin = self.__beam_sin[valid]
+        scan_points = np.empty((hit_ranges.shape[0], 2), dtype=float)
+        scan_points[:, 0] = pose_x + hit_ranges * (hit_cos * cos_yaw - hit_sin * sin_yaw)
+        scan_points[:, 1] = pose_y + hit_ranges * (hit_sin * cos_yaw + hit_cos * sin_yaw)
+
+        # shortest beam range with angle per sector => for obstacle checking
+        work_ranges = self.__work_ranges
+        work_angles = self.__work_angles
+        work_ranges[:num_beams] = lranges
+        work_ranges[:num_beams][~valid] = np.inf
+        np.add(self.__beam_angles, pose_yaw, out=work_angles[:num_beams])
+
+        np.take(work_ranges, self.__sector_table, out=self.__sector_ranges)
+        np.take(work_angles, self.__sector_table, out=self.__sector_angles)
+        np.argmin(self.__sector_ranges, axis=1, out=self.__sector_argmin)
+
+        sector_scan = self.__sector_laser_scan
+        sector_scan[:, 0] = self.__sector_ranges[self.__sector_rows, self.__sector_argmin]
+        sector_scan[:, 1] = self.__sector_angles[self.__sector_rows, self.__sector_argmin]
+        # sectors without any obstacle keep both range and angle as inf
+        sector_scan[np.isinf(sector_scan[:, 0]), 1] = np.inf
+
+        return scan_points
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+import rospy
+from openai_ros import utils
+import time
+import threading
+
+class SensorHub():
+    """
+        SensorHub class is an implementation to keep long-lived topic subscriptions
+        and store the latest message per topic in a double buffer
+    """
+
+    def __init__(self):
+        """
+        Initialize SensorHub class
+        """
+        super(SensorHub, self).__init__()
+
+        self.__condition = threading.Condition(threading.Lock())
+        # topic name => [ (msg, seq, stamp, receipt_time) slot0, slot1 ], front slot index
+        self.__buffers = {}
+        self.__front = {}
+        self.__subscribers = {}
+
+    def register(self, topic_name: str, topic_class):
+        """
+        Subscribe to the topic, nothing is done if topic is already registered
+
+        :param str topic_name: name of the topic
+               topic_class: topic type
+        """
+        with self.__condition:
+            if topic_name in self.__subscribers:
+                return
+            self.__buffers[topic_name] = [(None, 0, None, None), (None, 0, None, None)]
+            self.__front[topic_name] = 0
+            # reserve the entry to avoid duplicate subscriptions
+            self.__subscribers[topic_name] = None
+
+        subscriber = utils.create_subscriber(topic_name, topic_class, self.__topic_callback,
+                                             callback_args=topic_name)
+        with self.__condition:
+            self.__subscribers[topic_name] = subscriber
+
+    def unregister(self, topic_name: str):
+        """
+        Unsubscribe from the topic
+
+        :param str topic_name: name of the topic
+        """
+        with self.__condition:
+            subscriber = self.__subscribers.pop(topic_name, None)
+            self.__buffers.pop(topic_name, None)
+            self.__front.pop(topic_name, None)
+            self.__condition.notify_all()
+        if subscriber is not None:
+            subscriber.unregister()
+
+    def close(self):
+        """
+        Unsubscribe from all topics
+        """
+        for topic_name in list(self.__subscribers.keys()):
+            self.unregister(topic_name)
+
+    def get_latest(self, topic_name: str):
+        """
+        Gets the latest message of the topic without blocking
+
+        :param str topic_name: name of the topic
+        :return rospy.Message (None if nothing received yet), int (sequence number),
+                rospy.Time (message stamp)
+        """
+        with self.__condition:
+            msg, seq, stamp, _ = self.__buffers[topic_name][self.__front[topic_name]]
+        return msg, seq, stamp
+
+    def get_seq(self, topic_name: str):
+        """
+        Gets the sequence number of latest message of the topic (0 if nothing received yet)
+
+        :param str topic_name: name of the topic
+        :return int
+        """
+        with self.__condition:
+            return self.__buffers[topic_name][self.__front[topic_name]][1]
+
+    def wait_for_message(self, topic_name: str, newer_than: int = 0, time_out: float = 5):
+        """
+        Gets the latest message of the topic, blocks only if the latest message
+        is not newer than the given sequence number
+
+        :param str topic_name: name of the topic
+               int newer_than: sequence number the message must be newer than
+               float time_out: timeout in seconds
+        :return rospy.Message (None if timed out), int (sequence number)
+        """
+        deadline = time.monotonic() + time_out
+        with self.__condition:
+            while not rospy.is_shutdown():
+                if topic_name not in self.__buffers:
+                    break
+                msg, seq, _, _ = self.__buffers[topic_name][self.__front[topic_name]]
+                if seq > newer_than:
+                    return msg, seq
+                remaining = deadline - time.monotonic()
+                if remaining <= 0.0:
+                    break
+                self.__condition.wait(remaining)
+
+        # timeout is reported by the caller
+        return None, newer_than
+
+    def get_stats(self):
+        """
+        Gets the number of messages received and the receipt time of latest message per topic
+
+        :return dict
+        """
+        with self.__condition:
+            stats = {}
+            for topic_name, buffer in self.__buffers.items():
+                _, seq, _, receipt_time = buffer[self.__front[topic_name]]
+                stats[topic_name] = {
+                    'received': seq,
+                    'last_receipt_time': receipt_time,
+                }
+            return stats
+
+    def __topic_callback(self, msg, topic_name: str):
+        """
+        This function is called when a message is received on any registered topic,
+        message is written to the back slot which then becomes the front slot
+
+        :param rospy.Message msg: received message
+               str topic_name: name of the topic
+        """
+        receipt_time = time.monotonic()
+        header = getattr(msg, 'header', None)
+        stamp = header.stamp if header is not None else rospy.get_rostime()
+
+        with self.__condition:
+            if topic_name not in self.__buffers:
+                return
+            buffer = self.__buffers[topic_name]
+            front = self.__front[topic_name]
+            back = 1 - front
+            buffer[back] = (msg, buffer[front][1] + 1, stamp, receipt_time)
+            self.__front[topic_name] = back
+            self.__condition.notify_all()
@@ -2,7 +2,11 @@
 
 import rospy
 from openai_ros.robot_envs import turtlebot3_env
-from openai_ros import pojo, utils
+from openai_ros import pojo, utils, msg_decoder
+from openai_ros.scan_processor import ScanProcessor
+from openai_ros.map_cache import MapCache
+from openai_ros.particle_filter import ParticleFilter
+from openai_ros.obstacle_pool import sample_free_positions
 from gym import spaces
 from geometry_msgs.msg import *
 from gazebo_msgs.msg import ModelStates, ModelState
@@ -10,7 +14,6 @@ from sensor_msgs.msg import LaserScan
 from std_srvs.srv import Empty
 from nav_msgs.srv import GetMap
 from tf.transformations import quaternion_from_euler, euler_from_quaternion
-import dynamic_reconfigure.client as dynamic_reconfig
 import tf
 import matplotlib.pyplot as plt
 from matplotlib.patches import Wedge
@@ -26,15 +29,52 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         Goal is to become more certain about the position of turtlebot3
     """
 
-    def __init__(self):
+    def __init__(self, profile: bool = False, metrics_file: str = None,
+                 step_mode: str = 'REALTIME', step_iterations: int = 200,
+                 robot_ns: str = '', gazebo = None, localizer: str = 'AMCL', obstacle_pool = None):
         """
         Initialize TurtleBot3LocalizeEnv class
 
         Parameters
         ----------
-
-        """
-        super(TurtleBot3LocalizeEnv, self).__init__(reset_type = 'SIMULATION')
+        profile: bool
+            Whether to time the phases of step() and reset()
+        metrics_file: str
+            Path of prometheus text format file for phase latencies
+        step_mode: str
+            Possible values are: ['REALTIME', 'LOCKSTEP']
+        step_iterations: int
+            Number of physics iterations per action in LOCKSTEP mode
+        robot_ns: str
+            Namespace of the robot topics, services, tf frames and gazebo model name
+        gazebo: GazeboConnection
+            Connection shared by robots within the same gazebo world
+        localizer: str
+            Possible values are: ['AMCL', 'PARTICLE_FILTER'] (in-process particle filter
+            fed with odom and scan, no amcl node required)
+        obstacle_pool: ObstaclePool
+            Pooled obstacles randomly placed in free space of the map on every reset,
+            pool is shared by robots within the same gazebo world (give it to one robot)
+
+        """
+        super(TurtleBot3LocalizeEnv, self).__init__(reset_type = 'SIMULATION', profile = profile,
+                                                    metrics_file = metrics_file, step_mode = step_mode,
+                                                    step_iterations = step_iterations,
+                                                    robot_ns = robot_ns, gazebo = gazebo)
+
+        self._localizer = localizer
+        self._particle_filter = None
+
+        # pooled obstacles are teleported on reset, never deleted by the world reset
+        # (registered with the shared connection, as any robot may reset the world)
+        self._obstacle_pool = obstacle_pool
+        if self._obstacle_pool is not None:
+            self.gazebo.add_unmanaged_models(self._obstacle_pool.get_model_names())
+        self._init_position = None
+        if self._localizer == 'AMCL':
+            # amcl topics are received as rospy.AnyMsg and decoded with msg_decoder
+            self._sensor_hub.register(self._resolve_name('/particlecloud'), rospy.AnyMsg)
+            self._sensor_hub.register(self._resolve_name('/amcl_pose'), rospy.AnyMsg)
 
         # TODO: need to get variable values from config file
 
@@ -47,18 +87,23 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         self.reward_range = (-np.inf, np.inf)
 
         self._obs_type = 'PARTCILES'
+        self._max_amcl_particles = 20000
         if self._obs_type == 'LASER':
             self.observation_space = spaces.Box(self._laserscanner._scan_low, \
                                 self._laserscanner._scan_high, dtype=np.float32)
         elif self._obs_type == 'PARTCILES':
             # for particle cloud [x_max, y_max, theta_max] for 384 x 384 map
-            max_amcl_particles = 20000
+            max_amcl_particles = self._max_amcl_particles
             amcl_pose_high = np.array([np.inf, np.inf, np.inf] * max_amcl_particles, \
                              dtype=np.float32).reshape(max_amcl_particles, 3)
             amcl_pose_high = amcl_pose_high.flatten()
             self.observation_space = spaces.Box(-amcl_pose_high, amcl_pose_high, \
                              dtype=np.float32)
 
+        # preallocated [x, y, yaw] buffer, amcl particle cloud is decoded into it
+        self._particle_buffer = np.zeros((self._max_amcl_particles, 3), dtype=np.float32)
+        self._particle_batch = pojo.PoseBatch.from_array(self._particle_buffer[:0])
+
         # code related to motion commands
         self._robotmotion = pojo.RobotMotion()
 
@@ -70,14 +115,19 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         self._ent_threshold = -1.0
 
         # fot turtlebot3
-        self._robot = pojo.Robot()
+        self._robot = pojo.Robot(self._model_name)
         self._sector_angle = self._robot._sector_angle
         self._robot_radius = self._robot._robot_radius
-        self._sector_laser_scan = np.zeros((360//self._sector_angle, 2), dtype=float) # anti-clockwise
+        self._scan_processor = ScanProcessor(self._sector_angle,
+                                             self._laserscanner._max_laser_value,
+                                             self._laserscanner._min_laser_value)
+        self._sector_laser_scan = self._scan_processor.get_sector_laser_scan() # anti-clockwise
+        # global frame (map) is shared by all robots, robot frames are namespaced
         self._global_frame_id = self._robot._global_frame_id
-        self._scan_frame_id = self._robot._scan_frame_id
+        self._scan_frame_id = utils.resolve_frame_id(self._robot_ns, self._robot._scan_frame_id)
 
         self._is_new_map = False
+        self._map_cache = MapCache(topic_name = self._resolve_name('/map_metadata'))
         self._episode_done = False
         self._current_step = 0
         self._max_steps = 200
@@ -85,6 +135,7 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         self._success_episode = False
         self._cumulated_reward = 0.0
         self._collision_action = False
+        self._clearance = np.inf
 
         # code related to displaying results in matplotlib
         fig = plt.figure(figsize=(7, 7))
@@ -152,6 +203,12 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         plt.draw()
         plt.pause(0.00000000001)
 
+    def get_map_cache_stats(self):
+        """
+        Map cache hit and miss counters Getter
+        """
+        return self._map_cache.get_stats()
+
     def close(self):
         """
         Override turtlebot3 environment close() with custom logic
@@ -168,27 +225,33 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         """
 
         rospy.logdebug('TurtleBot3LocalizeEnv._check_amcl_data_is_ready() start')
-        topic_name = '/particlecloud'
-        topic_class = PoseArray
+        if self._localizer == 'PARTICLE_FILTER':
+            self.__update_particle_filter()
+            return
+
+        # subscribed with rospy.AnyMsg to skip genpy deserialization of every particle
+        # amcl output is latched and republished only after its update thresholds are
+        # exceeded, so the latest message is used instead of waiting for a newer one
+        topic_name = self._resolve_name('/particlecloud')
         time_out = 5.0
-        particle_msg = utils.receive_topic_msg(topic_name, topic_class, time_out)
+        particle_msg = self._wait_for_sensor_msg(topic_name, time_out, require_new = False)
 
         if particle_msg is not None:
-            if particle_msg.header.frame_id != self._global_frame_id:
-                rospy.logwarn('received amcl particle cloud must be in the global frame')
             # retrieve particle cloud of amcl
-            self._particle_cloud = self.__process_particle_msg(particle_msg.poses)
+            header, self._particle_cloud = self.__process_particle_msg(particle_msg._buff)
+            self._particle_batch = pojo.PoseBatch.from_array(self._particle_cloud)
+            if header.frame_id != self._global_frame_id:
+                rospy.logwarn('received amcl particle cloud must be in the global frame')
 
-        topic_name = '/amcl_pose'
-        topic_class = PoseWithCovarianceStamped
+        topic_name = self._resolve_name('/amcl_pose')
         time_out = 5.0
-        pose_msg = utils.receive_topic_msg(topic_name, topic_class, time_out)
+        pose_msg = self._wait_for_sensor_msg(topic_name, time_out, require_new = False)
 
         if pose_msg is not None:
-            if pose_msg.header.frame_id != self._global_frame_id:
-                rospy.logwarn('received amcl pose must be in the global frame')
             # retrieve pose estimate of amcl
-            self._amcl_pose = self.__process_pose_cov_msg(pose_msg.pose)
+            header, self._amcl_pose = self.__process_pose_cov_buff(pose_msg._buff)
+            if header.frame_id != self._global_frame_id:
+                rospy.logwarn('received amcl pose must be in the global frame')
             # rescale robot position
             x, y, z = self._amcl_pose.get_position() / self._map_data.get_scale()
             self._amcl_pose.set_position(x, y, z)
@@ -247,10 +310,9 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         """
 
         rospy.logdebug('TurtleBot3LocalizeEnv._check_laser_scan_is_ready() start')
-        topic_name = '/scan'
-        topic_class = LaserScan
+        topic_name = self._resolve_name('/scan')
         time_out = 5.0
-        data = utils.receive_topic_msg(topic_name, topic_class, time_out)
+        data = self._wait_for_sensor_msg(topic_name, time_out)
 
         if data is not None:
             self._laser_scan = self.__process_laser_msg(data)
@@ -275,17 +337,47 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         """
 
         rospy.logdebug('TurtleBot3LocalizeEnv._check_map_data_is_ready() start')
-        service_name = '/static_map'
-        service_class = GetMap
-        msg, _ = utils.call_service(service_name, service_class)
+        arena = self.gazebo.get_arena()
+        if arena is not None and arena.get_active_layout() is not None:
+            # wait for the latched map metadata of the switched layout
+            map_key = MapCache.metadata_key_from_msg(arena.get_map_info())
+            utils.wait_for_condition(lambda: self._map_cache.get_latest_key() == map_key,
+                                     time_out = 2.0, name = 'map_metadata')
+
+        # reuse cached map unless map metadata has changed
+        map_data = self._map_cache.get()
+        if map_data is not None:
+            rospy.logdebug('map cache hit: {0}'.format(self._map_cache.get_stats()))
+            self._map_data = map_data
+            self._request_map = False
+        else:
+            # receive latched map as rospy.AnyMsg so grid cells are viewed without deserialization
+            topic_name = self._resolve_name('/map')
+            topic_class = rospy.AnyMsg
+            time_out = 5.0
+            map_msg = utils.receive_topic_msg(topic_name, topic_class, time_out, max_retry=1)
 
-        if msg.map.header.frame_id != self._global_frame_id:
-            rospy.logwarn('received map must be in the global frame')
+            if map_msg is not None:
+                frame_id, map_key, map_data = self.__process_map_buff(map_msg._buff)
+            else:
+                # fall back to map service
+                service_name = self._resolve_name('/static_map')
+                service_class = GetMap
+                msg, _ = utils.call_service(service_name, service_class)
+                frame_id = msg.map.header.frame_id
+                map_key = MapCache.metadata_key_from_msg(msg.map.info)
+                map_data = self.__process_map_msg(msg.map)
+
+            if frame_id != self._global_frame_id:
+                rospy.logwarn('received map must be in the global frame')
 
-        self._map_data = self.__process_map_msg(msg.map)
+            self._map_data = self._map_cache.put(map_key, map_data, map_data.get_cells())
+            rospy.logdebug('map cache miss: {0}'.format(self._map_cache.get_stats()))
 
         # every time map is received perfrom following
         self._publish_rnd_init_pose()
+        if self._obstacle_pool is not None:
+            self.__randomize_obstacles()
         self._init_amcl(is_global=True)
 
     def _init_amcl(self, is_global=True):
@@ -298,14 +390,19 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
             flag to initialize global localization or not
         """
 
+        if self._localizer == 'PARTICLE_FILTER':
+            self.__init_particle_filter(is_global)
+            return
+
         # publish initialpose for amcl
         init_pose_msg = PoseWithCovarianceStamped()
         init_pose_msg.header.stamp = rospy.get_rostime()
-        init_pose_msg.header.frame_id = 'map'
+        init_pose_msg.header.frame_id = self._global_frame_id
 
-        # position
-        init_pose_msg.pose.pose.position.x = 0.0    # pose_x
-        init_pose_msg.pose.pose.position.y = 0.0    # pose_y
+        # position (origin of the active layout)
+        pose_x, pose_y = self.get_layout_offset()
+        init_pose_msg.pose.pose.position.x = pose_x
+        init_pose_msg.pose.pose.position.y = pose_y
         init_pose_msg.pose.pose.position.z = 0.0
         # orientation
         quaternion = quaternion_from_euler(0.0, 0.0, 0.0)   # pose_a
@@ -320,20 +417,19 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         covariance[6*5 + 5] = (np.pi/12.0) *(np.pi/12.0)    # cov_aa
         init_pose_msg.pose.covariance = covariance
 
+        # amcl publishes a new particle cloud once initial pose is processed
+        topic_name = self._resolve_name('/particlecloud')
+        particle_seq = self._sensor_hub.get_seq(topic_name)
         self._init_pose_pub.publish(init_pose_msg)
 
         if is_global:
 
-            # dynamic reconfigure
-            particles = 10000   # Note: only max 10000 is getting accepted
-            client = dynamic_reconfig.Client('/amcl')
-            config_params = {
-                        'max_particles' : particles,
-                     }
-            # hard coded directly in launch file
-            #config = client.update_configuration(config_params)
+            # amcl max_particles is hard coded directly in launch file
+            # (only max 10000 is getting accepted through dynamic reconfigure)
             self._init_global_localization()
 
+        utils.wait_for_condition(lambda: self._sensor_hub.get_seq(topic_name) > particle_seq,
+                                 time_out = 2.0, name = 'amcl_particlecloud')
         rospy.logdebug('status: amcl initialized')
 
     def _init_global_localization(self):
@@ -341,7 +437,7 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         Initialize global localization for amcl
         """
 
-        service_name = '/global_localization'
+        service_name = self._resolve_name('/global_localization')
         service_class = Empty
         utils.call_service(service_name, service_class)
 
@@ -361,12 +457,17 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
 
         # publish modelstate message
         state_msg = ModelState()
-        state_msg.model_name = 'turtlebot3'
+        state_msg.model_name = self._robot._rosbot_name
 
         # TODO: position also need to be random
-        # uniform random position
-        state_msg.pose.position.x = np.random.uniform(-1.0, 1.0)
-        state_msg.pose.position.y = -1.0
+        if self._robot_ns:
+            # robots sharing the world start at free positions away from each other
+            position = self.gazebo.claim_start_position(self._model_name, self.__sample_start_position)
+        else:
+            # uniform random position (relative to the origin of the active layout)
+            position = self.__default_start_position()
+        state_msg.pose.position.x, state_msg.pose.position.y = position
+        self._init_position = position
 
         # uniform random orientation
         #quaternion = quaternion_from_euler(0.0, 0.0, np.random.random() * 2 * np.pi)
@@ -382,10 +483,19 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         else:
             self._check_gazebo_pose_pub_ready()
             self._gazebo_pose_pub.publish(state_msg)
-        time.sleep(0.2)
 
-        response = self.gazebo.get_model_state(state_msg.model_name)
-        if response.success:
+        # wait until the set pose is reflected in gazebo
+        responses = []
+        def is_pose_reflected():
+            response = self.gazebo.get_model_state(state_msg.model_name)
+            responses.append(response)
+            return response is not None and response.success and \
+                abs(response.pose.position.x - state_msg.pose.position.x) < 1e-3 and \
+                abs(response.pose.position.y - state_msg.pose.position.y) < 1e-3
+        utils.wait_for_condition(is_pose_reflected, time_out = 2.0, name = 'set_model_state')
+
+        response = responses[-1]
+        if response is not None and response.success:
             current_pose = self.__process_pose_msg(response.pose)
             rospy.logdebug('initial robot pose: [{0:.3f}, {1:.3f}, {2:.3f}]'.\
                     format(current_pose.get_position()[0],
@@ -413,8 +523,6 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         self._request_amcl = True
         self._request_gazebo_data = True
 
-        time.sleep(1.0) # wait for small time before starting environment
-
     def _get_obs(self):
         """
         Return the observation from the environment
@@ -428,9 +536,10 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         self._robot.update_surroundings(self._sector_laser_scan)
 
         if self._obs_type == 'LASER':
-            return np.asarray(self._scan_ranges)   # return scan ranges
+            return np.array(self._scan_ranges)   # return scan ranges
         elif self._obs_type == 'PARTCILES':
-            return self._particle_cloud.flatten() # return particle cloud
+            # return particle cloud, view of preallocated buffer which is overwritten on next step
+            return self._particle_batch.to_array().reshape(-1)
 
     def _is_done(self):
         """
@@ -447,9 +556,16 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         #     back_details['obstacle_sector'] == 1 and \
         #         (left_details['obstacle_sector'] == 1 or \
         #             right_details['obstacle_sector'] == 1)):
-        if self._robot.get_too_close():
+
+        # constant time clearance of ground truth position from the map distance field
+        scale = self._map_data.get_scale()
+        x, y, _ = self._robot.get_pose().get_position()
+        self._clearance = float(self._map_data.get_clearance(x * scale, y * scale))
+        if self._obstacle_pool is not None:
+            self._clearance = min(self._clearance, float(self._obstacle_pool.get_clearance(x * scale, y * scale)))
+        if self._robot.get_too_close() or self._clearance < self._robot.get_footprint_radius():
             # abort episode if robot is stuck (atleast 3 direction has obstacles)
-            # or too close to obstacle
+            # or too close to obstacle or colliding with it
             self._abort_episode = self._episode_done = True
         elif self._current_step > self._max_steps:
             # episode done if max steps elapsed
@@ -774,23 +890,131 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
 
         return scan_plt
 
-    def __process_particle_msg(self, particle_msg):
+    def __default_start_position(self):
+        """
+        Uniform random start position near the origin of the active layout
         """
-        Process the particle cloud message
 
-        :param list[geometry_msgs.msg._Pose.Pose] particle_msg: list of poses
-        :return numpy.ndarray
+        offset_x, offset_y = self.get_layout_offset()
+        return (offset_x + np.random.uniform(-1.0, 1.0), offset_y - 1.0)
+
+    def __sample_start_position(self, claimed: list):
+        """
+        Sample the start position in free space of the map, away from the walls and
+        the positions claimed by the other robots of the world
         """
 
-        poses = []
-        for pose_msg in particle_msg:
-            pose = self.__process_pose_msg(pose_msg)
-            x, y, _ = pose.get_position()
-            _, _, yaw = pose.get_euler()
-            poses.append([x, y, yaw])
+        footprint_radius = self._robot.get_footprint_radius()
+        rng = np.random.default_rng(np.random.randint(np.iinfo(np.int32).max))
+        # wall margin keeps the laser clear of the too close thresholds (up to 0.6 meters)
+        x, y = sample_free_positions(self._map_data, [footprint_radius], rng, keep_out = claimed,
+                                     keep_out_radius = footprint_radius + 0.3, margin = 0.45)[0]
+        if np.isnan(x):
+            rospy.logwarn('no free start position for {0}, using the default one'.format(self._model_name))
+            return self.__default_start_position()
+        return (float(x), float(y))
 
-        poses = np.asarray(poses).astype(np.float32)
-        return poses
+    def __randomize_obstacles(self):
+        """
+        Place the pooled obstacles randomly in free space of the map, away from the start
+        positions of all robots sharing the world
+        """
+
+        keep_out = self.gazebo.get_claimed_positions()
+        if self._init_position is not None and self._init_position not in keep_out:
+            keep_out.append(self._init_position)
+        keep_out = keep_out or None
+        report = self._obstacle_pool.randomize(self._map_data, keep_out = keep_out,
+                                               keep_out_radius = self._robot.get_footprint_radius() + 0.3)
+        rospy.loginfo('status: {0} obstacles randomized ({1:.3f} sec)'.format(
+                        len(report['active']), report['duration']))
+
+    def __init_particle_filter(self, is_global=True):
+        """
+        Initialize the in-process particle filter (same initial pose as for amcl)
+
+        :param bool is_global: flag to initialize global localization or not
+        """
+
+        if self._particle_filter is None:
+            self._particle_filter = ParticleFilter(self._map_data)
+        else:
+            self._particle_filter.set_map(self._map_data)
+
+        covariance = np.zeros((6, 6), dtype=np.float64)
+        covariance[0, 0] = 0.5 * 0.5 # cov_xx
+        covariance[1, 1] = 0.5 * 0.5 # cov_yy
+        covariance[5, 5] = (np.pi/12.0) *(np.pi/12.0)    # cov_aa
+        pose_x, pose_y = self.get_layout_offset()
+        self._particle_filter.set_initial_pose([pose_x, pose_y, 0.0], covariance)
+        if is_global:
+            self._particle_filter.global_localization()
+        rospy.logdebug('status: particle filter initialized')
+
+    def __update_particle_filter(self):
+        """
+        Update the in-process particle filter with the latest odom and laser scan,
+        its particle cloud and pose estimate replace the ones of amcl
+        """
+
+        odom_msg, _, _ = self._sensor_hub.get_latest(self._resolve_name('/odom'))
+        scan_msg, _, _ = self._sensor_hub.get_latest(self._resolve_name('/scan'))
+        if odom_msg is not None and scan_msg is not None:
+            orientation = odom_msg.pose.pose.orientation
+            odom_yaw = msg_decoder.quaternion_to_yaw(np.array([orientation.x, orientation.y,
+                                                               orientation.z, orientation.w]))
+            odom_pose = [odom_msg.pose.pose.position.x, odom_msg.pose.pose.position.y, odom_yaw]
+            self._particle_filter.update(odom_pose, scan_msg.ranges,
+                                         scan_msg.angle_min, scan_msg.angle_increment)
+        else:
+            rospy.logwarn('particle filter is not updated, odom or laser scan not received')
+
+        # particles are copied into the preallocated buffer as with decoded amcl particle cloud
+        self._particle_cloud = self._particle_filter.get_particles(self._particle_buffer)
+        self._particle_batch = pojo.PoseBatch.from_array(self._particle_cloud)
+
+        mean, covariance = self._particle_filter.get_estimate()
+        self._amcl_pose = pojo.Pose()
+        # rescale robot position
+        scale = self._map_data.get_scale()
+        self._amcl_pose.set_position(mean[0] / scale, mean[1] / scale, 0.0)
+        self._amcl_pose.set_quaternion(*msg_decoder.yaw_to_quaternion(mean[2]))
+        self._amcl_pose.set_covariance(covariance)
+
+    def __process_particle_msg(self, particle_buff):
+        """
+        Process the serialized particle cloud message
+
+        :param bytes particle_buff: serialized geometry_msgs/PoseArray message
+        :return msg_decoder.Header, numpy.ndarray
+        """
+
+        header, poses = msg_decoder.decode_particle_cloud(particle_buff, self._particle_buffer)
+        if poses.base is not self._particle_buffer:
+            rospy.logwarn('received {0} particles, more than the preallocated {1}'.format(
+                            poses.shape[0], self._particle_buffer.shape[0]))
+            # keep the whole grown array (not the view), so it is reused as buffer
+            self._particle_buffer = poses.base if poses.base is not None else poses
+        return header, poses
+
+    def __process_pose_cov_buff(self, pose_cov_buff):
+        """
+        Process the serialized pose with covariance message
+
+        :param bytes pose_cov_buff: serialized geometry_msgs/PoseWithCovarianceStamped message
+        :return msg_decoder.Header, pojo.Pose
+        """
+
+        header, pose_msg, covariance = msg_decoder.decode_pose_with_covariance_stamped(pose_cov_buff)
+
+        # initialize pose
+        pose = pojo.Pose()
+        pose.set_position(*pose_msg['position'])
+        pose.set_quaternion(*pose_msg['orientation'])
+        # initialize covariance
+        pose.set_covariance(covariance)
+
+        return header, pose
 
     def __process_pose_cov_msg(self, pose_cov_msg):
         """
@@ -840,16 +1064,47 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         :return pojo.Map
         """
 
+        return self.__process_map(msg_map.info.resolution,
+                                  msg_map.info.width, msg_map.info.height,
+                                  self.__process_pose_msg(msg_map.info.origin),
+                                  msg_map.data)
+
+    def __process_map_buff(self, map_buff):
+        """
+        Process the serialized map message
+
+        :param bytes map_buff: serialized nav_msgs/OccupancyGrid message
+        :return str (frame id), tuple (map cache key), pojo.Map
+        """
+
+        header, info, cells = msg_decoder.decode_occupancy_grid(map_buff)
+        origin = pojo.Pose()
+        origin.set_position(*info.origin['position'])
+        origin.set_quaternion(*info.origin['orientation'])
+
+        map = self.__process_map(info.resolution, info.width, info.height, origin, cells)
+        return header.frame_id, MapCache.metadata_key_from_decoded(info), map
+
+    def __process_map(self, resolution: float, width: int, height: int, origin, cells):
+        """
+        Create the map from received map details
+
+        :param float resolution: map resolution
+               int width: map width
+               int height: map height
+               pojo.Pose origin: map origin
+               cells: map grid cells
+        :return pojo.Map
+        """
+
         # initialize map
         map = pojo.Map()
-        map.set_scale(msg_map.info.resolution)
-        map.set_size(msg_map.info.width, msg_map.info.height)
-        map.set_origin(self.__process_pose_msg(msg_map.info.origin))
+        map.set_scale(resolution)
+        map.set_size(width, height)
+        map.set_origin(origin)
 
         # rescale and shift the map origin to world coordinates
-        origin = map.get_origin()
         x, y, z = origin.get_position()
-        width, height = map.get_size()
         scale = map.get_scale()
         origin.set_position(
                 x + (width/2) * scale,
@@ -858,7 +1113,7 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         )
 
         # set grid cells
-        map.set_cells(msg_map.data)
+        map.set_cells(cells)
 
         self._is_new_map = True
         self._request_map = False
@@ -929,33 +1184,12 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
                 _, _, gt_a = self._robot.get_pose().get_euler()
                 scale = self._map_data.get_scale()
 
-                collision_idx = 0
-                self._scan_ranges.clear()
-                self._sector_laser_scan[:, ...].fill(np.inf)
-                for idx in range(len(scan_msg.ranges)):
-                    lrange = scan_msg.ranges[idx]
-                    if np.isinf(lrange):
-                        # if lrange is inf store max laser scan range value
-                        self._scan_ranges.append(self._laserscanner._max_laser_value)
-                        continue
-                    elif np.isnan(lrange):
-                        # if lrange is nan store min laser scan range value
-                        self._scan_ranges.append(self._laserscanner._min_laser_value)
-                        continue
-                    else:
-                        self._scan_ranges.append(lrange)
-
-                    # if beam hits obstacle, store bean endpoint => for plotting
-                    langle = gt_a + scan_msg.angle_min + ( idx * scan_msg.angle_increment )
-                    x = gt_x + lrange * np.cos(langle) / scale
-                    y = gt_y + lrange * np.sin(langle) / scale
-                    scan_points.append([x, y])
-
-                    # store shortest beam range with angle per sector => for obstacle checking
-                    collision_idx = idx//self._sector_angle
-                    if lrange < self._sector_laser_scan[collision_idx][0]:
-                        self._sector_laser_scan[collision_idx][0] = lrange
-                        self._sector_laser_scan[collision_idx][1] = langle
+                # clamp ranges, compute beam endpoints (for plotting) and
+                # shortest beam range with angle per sector (for obstacle checking)
+                scan_points = self._scan_processor.process(scan_msg.ranges,
+                                    scan_msg.angle_min, scan_msg.angle_increment,
+                                    gt_x, gt_y, gt_a, scale)
+                self._scan_ranges = self._scan_processor.get_scan_ranges()
 
         scan_points = np.asarray(scan_points)
         return scan_points
@@ -970,9 +1204,7 @@ class TurtleBot3LocalizeEnv(turtlebot3_env.TurtleBot3Env):
         """
 
         # calculate squared euclidean in pose+covariance
-        sqr_dist_err = np.linalg.norm( pose1.get_position() - pose2.get_position() )**2 + \
-               np.linalg.norm( pose1.get_euler() - pose2.get_euler() )**2 + \
-               np.linalg.norm( pose1.get_covariance() - pose2.get_covariance() )**2
+        sqr_dist_err = pojo.PoseBatch.from_poses([pose2]).squared_error(pose1)[0]
 
         return sqr_dist_err
 
@@ -10,7 +10,9 @@ class TurtleBot3WorldEnv(turtlebot3_env.TurtleBot3Env):
         TurtleBot3WorldEnv class is an implementation for general turtlebot3 task
     """
 
-    def __init__(self, name_space: str = 'turtlebot3'):
+    def __init__(self, name_space: str = 'turtlebot3', profile: bool = False, metrics_file: str = None,
+                 step_mode: str = 'REALTIME', step_iterations: int = 200,
+                 robot_ns: str = '', gazebo = None):
         """
         Initialize TurtleBot3WorldEnv class
 
@@ -19,9 +21,23 @@ class TurtleBot3WorldEnv(turtlebot3_env.TurtleBot3Env):
         name_space: str
             string used to uniquely identify the ros node and related parameters
             refer (turtlebot3_params.yaml)
+        profile: bool
+            Whether to time the phases of step() and reset()
+        metrics_file: str
+            Path of prometheus text format file for phase latencies
+        step_mode: str
+            Possible values are: ['REALTIME', 'LOCKSTEP']
+        step_iterations: int
+            Number of physics iterations per action in LOCKSTEP mode
+        robot_ns: str
+            Namespace of the robot topics, services, tf frames and gazebo model name
+        gazebo: GazeboConnection
+            Connection shared by robots within the same gazebo world
 
         """
-        super(TurtleBot3WorldEnv, self).__init__()
+        super(TurtleBot3WorldEnv, self).__init__(profile = profile, metrics_file = metrics_file,
+                                                 step_mode = step_mode, step_iterations = step_iterations,
+                                                 robot_ns = robot_ns, gazebo = gazebo)
 
         self._num_actions = rospy.get_param('/' + name_space + '/n_actions')
         self._skip_beam_interval = rospy.get_param('/' + name_space + '/skip_beam_interval')
@@ -1,56 +1,537 @@
 #!/usr/bin/env python3
 
 import rospy
+import io
 import time
+import random
+import threading
 
-def call_service(service_name: str, service_class, service_req = None, time_out: float = 5, max_retry: int = 5):
+class ServiceProxyPool():
     """
-    Create a service proxy for given service_name and service_class and
-    call the service
+        ServiceProxyPool class is an implementation to reuse persistent service proxies
+        per (service name, service class) and track per service call statistics,
+        calls through the same proxy are serialized (rospy proxies are not thread safe)
+    """
+
+    def __init__(self, base_backoff: float = 0.05, max_backoff: float = 1.0):
+        """
+        Initialize ServiceProxyPool class
+
+        :param float base_backoff: delay (in seconds) before first retry
+               float max_backoff: maximum delay (in seconds) between retries
+        """
+        super(ServiceProxyPool, self).__init__()
+
+        self._base_backoff = base_backoff
+        self._max_backoff = max_backoff
+        self.__lock = threading.Lock()
+        self.__proxies = {}
+        # (service name, service class) => lock held while calling through the proxy
+        self.__call_locks = {}
+        self.__stats = {}
+
+    def get_proxy(self, service_name: str, service_class, time_out: float = 5):
+        """
+        Gets the persistent proxy for the service, new proxy is created if not available
+
+        :param str service_name: name of the service
+               service_class: service type
+               float time_out: timeout in seconds to wait for the service
+        :return rospy.ServiceProxy or None if service is not available
+        """
+        key = (service_name, service_class)
+        with self.__lock:
+            proxy = self.__proxies.get(key)
+        if proxy is not None:
+            return proxy
+
+        # wait until the service becomes available
+        try:
+            rospy.wait_for_service(service_name, timeout = time_out)
+        except rospy.ROSException as e:
+            rospy.logerr('service %s is not available due to %s', service_name, e)
+            return None
+
+        # create callable persistent proxy to the service
+        proxy = rospy.ServiceProxy(service_name, service_class, persistent=True)
+        with self.__lock:
+            # concurrent callers share the proxy created first
+            proxy = self.__proxies.setdefault(key, proxy)
+        return proxy
+
+    def invalidate(self, service_name: str, service_class):
+        """
+        Close and remove the proxy of the service, it is recreated on next call
+
+        :param str service_name: name of the service
+               service_class: service type
+        """
+        with self.__lock:
+            proxy = self.__proxies.pop((service_name, service_class), None)
+        if proxy is not None:
+            # never close the proxy while another thread is calling through it
+            with self.__get_call_lock(service_name, service_class):
+                proxy.close()
+
+    def close(self):
+        """
+        Close all proxies
+        """
+        with self.__lock:
+            proxies = list(self.__proxies.values())
+            self.__proxies.clear()
+        for proxy in proxies:
+            proxy.close()
+
+    def call(self, service_name: str, service_class, service_req = None, time_out: float = 5, max_retry: int = 5):
+        """
+        Call the service through its persistent proxy, on failure the proxy is reconnected
+        and call is retried with capped exponential backoff and jitter
+
+        :param str service_name: name of the service
+               service_class: service type
+               service_req: service request
+               float time_out: timeout in seconds
+               int max_retry: maximum number of times to retry calling the service
+        :return response received from service call
+                bool
+        """
+
+        is_call_successful = False
+        counter = 0
+        response = None
+        start_time = time.monotonic()
+
+        # loop until the counter reached max retry limit or
+        # until the ros is shutdown or service call is successful
+        while not is_call_successful and not rospy.is_shutdown():
+            if counter < max_retry:
+                service_proxy = self.get_proxy(service_name, service_class, time_out)
+                if service_proxy is None:
+                    break
+                try:
+                    # call service, one call at a time per persistent proxy
+                    with self.__get_call_lock(service_name, service_class):
+                        if service_req is None:
+                            response = service_proxy()
+                        else:
+                            response = service_proxy(service_req)
+                    is_call_successful = True
+                except (rospy.ServiceException, rospy.exceptions.TransportException) as e:
+                    # service call failed, reconnect and increment the counter
+                    self.invalidate(service_name, service_class)
+                    counter += 1
+                    if counter < max_retry:
+                        # no backoff after the last attempt, caller gets the failure right away
+                        backoff = min(self._max_backoff, self._base_backoff * 2**(counter - 1))
+                        time.sleep(backoff * random.uniform(0.5, 1.0))
+            else:
+                # max retry count reached
+                rospy.logwarn('call to the service %s failed', service_name)
+                break
+
+        self.__record(service_name, time.monotonic() - start_time, counter, is_call_successful)
+        return response, is_call_successful
+
+    def get_stats(self):
+        """
+        Gets the per service call statistics
+
+        :return dict
+        """
+        with self.__lock:
+            stats = {}
+            for service_name, stat in self.__stats.items():
+                stats[service_name] = dict(stat)
+                stats[service_name]['mean_latency'] = stat['total_latency'] / max(stat['calls'], 1)
+            return stats
+
+    def __get_call_lock(self, service_name: str, service_class):
+        """
+        Gets the lock serializing the calls to the service, created on first use
+
+        :return threading.Lock
+        """
+        key = (service_name, service_class)
+        with self.__lock:
+            call_lock = self.__call_locks.get(key)
+            if call_lock is None:
+                call_lock = self.__call_locks[key] = threading.Lock()
+            return call_lock
+
+    def __record(self, service_name: str, latency: float, retries: int, is_successful: bool):
+        """
+        Record the call statistics of the service
+
+        :param str service_name: name of the service
+               float latency: time taken by the call including retries (in seconds)
+               int retries: number of retries
+               bool is_successful: whether the call is successful
+        """
+        with self.__lock:
+            stat = self.__stats.setdefault(service_name, {
+                'calls': 0,
+                'failures': 0,
+                'retries': 0,
+                'total_latency': 0.0,
+                'max_latency': 0.0,
+                'last_latency': 0.0,
+            })
+            stat['calls'] += 1
+            stat['retries'] += retries
+            if not is_successful:
+                stat['failures'] += 1
+            stat['total_latency'] += latency
+            stat['max_latency'] = max(stat['max_latency'], latency)
+            stat['last_latency'] = latency
+
+class LocalPublisher():
+    """
+        LocalPublisher class is an implementation of in-process publisher with
+        the rospy.Publisher interface used by the environments
+    """
+
+    def __init__(self, transport, topic_name: str, topic_class, latch: bool = False):
+        """
+        Initialize LocalPublisher class
+
+        :param utils.LocalTransport transport: transport owning the topic
+               str topic_name: name of the topic
+               topic_class: topic type
+               bool latch: whether last message is delivered to late subscribers
+        """
+        super(LocalPublisher, self).__init__()
+
+        self.name = topic_name
+        self.data_class = topic_class
+        self._transport = transport
+        self._latch = latch
+
+    def publish(self, msg):
+        """
+        Deliver the message to all local subscribers (synchronously)
+
+        :param rospy.Message msg: message to be published
+        """
+        self._transport.publish(self.name, msg, self._latch)
+
+    def get_num_connections(self):
+        """
+        Number of local subscribers of the topic
+
+        :return int
+        """
+        return self._transport.get_num_subscribers(self.name)
+
+    def unregister(self):
+        pass
+
+class LocalSubscriber():
+    """
+        LocalSubscriber class is an implementation of in-process subscriber with
+        the rospy.Subscriber interface used by the environments
+    """
+
+    def __init__(self, transport, topic_name: str, topic_class, callback, callback_args = None):
+        """
+        Initialize LocalSubscriber class
+
+        :param utils.LocalTransport transport: transport owning the topic
+               str topic_name: name of the topic
+               topic_class: topic type (rospy.AnyMsg to receive serialized buffer)
+               callable callback: called with each message (and callback_args if given)
+               callback_args: additional argument passed to callback
+        """
+        super(LocalSubscriber, self).__init__()
+
+        self.name = topic_name
+        self.data_class = topic_class
+        self._transport = transport
+        self._callback = callback
+        self._callback_args = callback_args
+
+    def deliver(self, msg):
+        """
+        Call the subscriber callback with the message
+        """
+        if self._callback_args is None:
+            self._callback(msg)
+        else:
+            self._callback(msg, self._callback_args)
+
+    def unregister(self):
+        """
+        Stop receiving messages
+        """
+        self._transport.unsubscribe(self)
+
+class LocalTransport():
+    """
+        LocalTransport class is an implementation of in-process topics and services,
+        used by simulation backends running within the environment process so that
+        messages skip TCPROS (and serialization unless subscribed as rospy.AnyMsg)
+    """
+
+    def __init__(self):
+        """
+        Initialize LocalTransport class
+        """
+        super(LocalTransport, self).__init__()
+
+        self.__lock = threading.RLock()
+        self.__topics = set()
+        self.__subscribers = {}
+        self.__latched = {}
+        self.__services = {}
+
+    def advertise(self, topic_name: str, topic_class, latch: bool = False):
+        """
+        Create the local publisher, topic is served locally from now on
+
+        :param str topic_name: name of the topic
+               topic_class: topic type
+               bool latch: whether last message is delivered to late subscribers
+        :return utils.LocalPublisher
+        """
+        with self.__lock:
+            self.__topics.add(topic_name)
+        return LocalPublisher(self, topic_name, topic_class, latch)
+
+    def subscribe(self, topic_name: str, topic_class, callback, callback_args = None):
+        """
+        Create the local subscriber, topic is served locally from now on
+
+        :param str topic_name: name of the topic
+               topic_class: topic type
+               callable callback: called with each message
+               callback_args: additional argument passed to callback
+        :return utils.LocalSubscriber
+        """
+        subscriber = LocalSubscriber(self, topic_name, topic_class, callback, callback_args)
+        with self.__lock:
+            self.__topics.add(topic_name)
+            self.__subscribers.setdefault(topic_name, []).append(subscriber)
+            latched = self.__latched.get(topic_name)
+        if latched is not None:
+            subscriber.deliver(self.__convert(latched, topic_class, {}))
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """
+        Remove the local subscriber
+
+        :param utils.LocalSubscriber subscriber: subscriber to be removed
+        """
+        with self.__lock:
+            subscribers = self.__subscribers.get(subscriber.name, [])
+            if subscriber in subscribers:
+                subscribers.remove(subscriber)
+
+    def publish(self, topic_name: str, msg, latch: bool = False):
+        """
+        Deliver the message to all local subscribers of the topic
+
+        :param str topic_name: name of the topic
+               rospy.Message msg: message (or rospy.AnyMsg with serialized buffer)
+               bool latch: whether message is kept for late subscribers
+        """
+        with self.__lock:
+            if latch:
+                self.__latched[topic_name] = msg
+            subscribers = list(self.__subscribers.get(topic_name, []))
+        # serialized/deserialized forms are computed once per message
+        converted = {}
+        for subscriber in subscribers:
+            subscriber.deliver(self.__convert(msg, subscriber.data_class, converted))
+
+    def get_latched(self, topic_name: str, topic_class):
+        """
+        Gets the last latched message of the topic
+
+        :param str topic_name: name of the topic
+               topic_class: requested topic type
+        :return rospy.Message or None
+        """
+        with self.__lock:
+            latched = self.__latched.get(topic_name)
+        if latched is None:
+            return None
+        return self.__convert(latched, topic_class, {})
+
+    def get_num_subscribers(self, topic_name: str):
+        """
+        Number of local subscribers of the topic
+
+        :param str topic_name: name of the topic
+        :return int
+        """
+        with self.__lock:
+            return len(self.__subscribers.get(topic_name, []))
+
+    def has_topic(self, topic_name: str):
+        """
+        Whether the topic is served locally
+        """
+        with self.__lock:
+            return topic_name in self.__topics
+
+    def register_service(self, service_name: str, handler):
+        """
+        Serve the service locally
+
+        :param str service_name: name of the service
+               callable handler: called with service request, returns service response
+        """
+        with self.__lock:
+            self.__services[service_name] = handler
+
+    def has_service(self, service_name: str):
+        """
+        Whether the service is served locally
+        """
+        with self.__lock:
+            return service_name in self.__services
+
+    def call(self, service_name: str, service_class, service_req = None):
+        """
+        Call the local service
+
+        :param str service_name: name of the service
+               service_class: service type
+               service_req: service request
+        :return response received from service call
+                bool
+        """
+        with self.__lock:
+            handler = self.__services[service_name]
+        if service_req is None:
+            service_req = service_class._request_class()
+        try:
+            return handler(service_req), True
+        except rospy.ServiceException as e:
+            rospy.logwarn('call to the service %s failed due to %s', service_name, e)
+            return None, False
+
+    def close(self):
+        """
+        Remove all local topics and services
+        """
+        with self.__lock:
+            self.__topics.clear()
+            self.__subscribers.clear()
+            self.__latched.clear()
+            self.__services.clear()
+
+    def __convert(self, msg, topic_class, converted: dict):
+        """
+        Convert the message between deserialized and serialized (rospy.AnyMsg) form
+        as requested by the subscriber
+
+        :param rospy.Message msg: published message
+               topic_class: topic type of the subscriber
+               dict converted: cache of converted messages per topic type
+        :return rospy.Message
+        """
+        is_serialized = isinstance(msg, rospy.AnyMsg)
+        if topic_class is rospy.AnyMsg:
+            if is_serialized:
+                return msg
+            if rospy.AnyMsg not in converted:
+                buff = io.BytesIO()
+                msg.serialize(buff)
+                any_msg = rospy.AnyMsg()
+                any_msg._buff = buff.getvalue()
+                converted[rospy.AnyMsg] = any_msg
+            return converted[rospy.AnyMsg]
+        if is_serialized:
+            if topic_class not in converted:
+                converted[topic_class] = topic_class().deserialize(msg._buff)
+            return converted[topic_class]
+        return msg
+
+_local_transport = None
+
+def set_local_transport(transport: LocalTransport):
+    """
+    Install the in-process transport, topics and services it serves bypass ros
+
+    :param utils.LocalTransport transport: transport (None to uninstall)
+    """
+    global _local_transport
+    _local_transport = transport
+
+def get_local_transport():
+    """
+    Gets the installed in-process transport
+
+    :return utils.LocalTransport or None
+    """
+    return _local_transport
+
+def create_publisher(topic_name: str, topic_class, queue_size: int = 5, latch: bool = False):
+    """
+    Create the publisher, topics served by the in-process transport are published locally
+
+    :param str topic_name: name of the topic
+           topic_class: topic type
+           int queue_size: outgoing message queue size
+           bool latch: whether last message is delivered to late subscribers
+    :return rospy.Publisher or utils.LocalPublisher
+    """
+    transport = _local_transport
+    if transport is not None and transport.has_topic(topic_name):
+        return transport.advertise(topic_name, topic_class, latch)
+    return rospy.Publisher(topic_name, topic_class, queue_size = queue_size, latch = latch)
+
+def create_subscriber(topic_name: str, topic_class, callback, callback_args = None):
+    """
+    Create the subscriber, topics served by the in-process transport are received locally
+
+    :param str topic_name: name of the topic
+           topic_class: topic type
+           callable callback: called with each message
+           callback_args: additional argument passed to callback
+    :return rospy.Subscriber or utils.LocalSubscriber
+    """
+    transport = _local_transport
+    if transport is not None and transport.has_topic(topic_name):
+        return transport.subscribe(topic_name, topic_class, callback, callback_args)
+    if callback_args is None:
+        return rospy.Subscriber(topic_name, topic_class, callback)
+    return rospy.Subscriber(topic_name, topic_class, callback, callback_args = callback_args)
+
+_service_proxy_pool = ServiceProxyPool()
+
+def get_service_proxy_pool():
+    """
+    Gets the shared service proxy pool
+
+    :return utils.ServiceProxyPool
+    """
+    return _service_proxy_pool
+
+def call_service(service_name: str, service_class, service_req = None, time_out: float = 5, max_retry: int = 5,
+                 pool: ServiceProxyPool = None):
+    """
+    Call the service through a persistent service proxy from the pool,
+    services served by the in-process transport are called directly
 
     :param str service_name: name of the service
            service_class: service type
            service_req: service request
            float time_out: timeout in seconds
            int max_retry: maximum number of times to retry calling the service
+           utils.ServiceProxyPool pool: pool of proxies to use, shared pool if not given
     :return response received from service call
             bool
     """
 
-    # wait until the service becomes available
-    try:
-        rospy.wait_for_service(service_name, timeout = time_out)
-    except rospy.ROSException as e:
-        rospy.logerr('service %s is not available due to %s', service_name, e)
-        return
-
-    # create callable proxy to the service
-    service_proxy = rospy.ServiceProxy(service_name, service_class)
-
-    is_call_successful = False
-    counter = 0
-    response = None
-
-    # loop until the counter reached max retry limit or
-    # until the ros is shutdown or service call is successful
-    while not is_call_successful and not rospy.is_shutdown():
-        if counter < max_retry:
-            try:
-                # call service
-                if service_req is None:
-                    response = service_proxy()
-                else:
-                    response = service_proxy(service_req)
-                is_call_successful = True
-            except rospy.ServiceException as e:
-                # service call failed increment the counter
-                counter += 1
-        else:
-            # max retry count reached
-            rospy.logwarn('call to the service %s failed', service_name)
-            break
-
-    return response, is_call_successful
+    transport = _local_transport
+    if transport is not None and transport.has_service(service_name):
+        return transport.call(service_name, service_class, service_req)
+    if pool is None:
+        pool = _service_proxy_pool
+    return pool.call(service_name, service_class, service_req, time_out, max_retry)
 
 def receive_topic_msg(topic_name: str, topic_class, time_out: float = 5, max_retry: int = 5):
     """
@@ -66,6 +547,11 @@ def receive_topic_msg(topic_name: str, topic_class, time_out: float = 5, max_ret
     :return rospy.Message
     """
 
+    transport = _local_transport
+    if transport is not None and transport.has_topic(topic_name):
+        # latest message of in-process topic
+        return transport.get_latched(topic_name, topic_class)
+
     counter = 0
     response = None
     # loop until the ros is shutdown or received successfully message from topic
@@ -83,6 +569,103 @@ def receive_topic_msg(topic_name: str, topic_class, time_out: float = 5, max_ret
 
     return response
 
+def resolve_name(robot_ns: str, name: str):
+    """
+    Resolve the topic/service name within the robot namespace
+
+    :param str robot_ns: robot namespace, name is returned unchanged if empty
+           str name: global name (eg. '/scan')
+    :return str (eg. '/tb3_0/scan')
+    """
+
+    robot_ns = robot_ns.strip('/')
+    if not robot_ns:
+        return name
+    return '/' + robot_ns + '/' + name.lstrip('/')
+
+def resolve_frame_id(robot_ns: str, frame_id: str):
+    """
+    Resolve the tf frame id within the robot namespace (tf_prefix convention)
+
+    :param str robot_ns: robot namespace, frame id is returned unchanged if empty
+           str frame_id: frame id (eg. 'base_scan')
+    :return str (eg. 'tb3_0/base_scan')
+    """
+
+    robot_ns = robot_ns.strip('/')
+    if not robot_ns:
+        return frame_id
+    return robot_ns + '/' + frame_id.lstrip('/')
+
+_wait_stats = {}
+_wait_stats_lock = threading.Lock()
+
+def wait_for_condition(predicate, time_out: float = 5, poll_interval: float = 0.01, name: str = None):
+    """
+    Wait until the predicate is satisfied, returns as soon as the state change is observed
+
+    :param callable predicate: function returning True once the expected state is reached
+           float time_out: timeout in seconds
+           float poll_interval: delay (in seconds) between predicate evaluations
+           str name: name under which the wait duration is recorded, not recorded if not given
+    :return bool (whether the predicate is satisfied)
+    """
+
+    start_time = time.monotonic()
+    deadline = start_time + time_out
+    is_satisfied = False
+    # loop until the ros is shutdown or predicate is satisfied or timeout
+    while not rospy.is_shutdown():
+        if predicate():
+            is_satisfied = True
+            break
+        if time.monotonic() >= deadline:
+            rospy.logwarn('wait for condition %s timed out', name)
+            break
+        time.sleep(poll_interval)
+
+    if name is not None:
+        record_wait(name, time.monotonic() - start_time, is_satisfied)
+    return is_satisfied
+
+def record_wait(name: str, duration: float, is_satisfied: bool = True):
+    """
+    Record the duration of a state-confirmed wait
+
+    :param str name: name of the wait
+           float duration: time taken by the wait (in seconds)
+           bool is_satisfied: whether the wait succeeded or timed out
+    """
+
+    with _wait_stats_lock:
+        stat = _wait_stats.setdefault(name, {
+            'waits': 0,
+            'timeouts': 0,
+            'total_duration': 0.0,
+            'max_duration': 0.0,
+            'last_duration': 0.0,
+        })
+        stat['waits'] += 1
+        if not is_satisfied:
+            stat['timeouts'] += 1
+        stat['total_duration'] += duration
+        stat['max_duration'] = max(stat['max_duration'], duration)
+        stat['last_duration'] = duration
+
+def get_wait_stats():
+    """
+    Gets the per wait duration statistics
+
+    :return dict
+    """
+
+    with _wait_stats_lock:
+        stats = {}
+        for name, stat in _wait_stats.items():
+            stats[name] = dict(stat)
+            stats[name]['mean_duration'] = stat['total_duration'] / max(stat['waits'], 1)
+        return stats
+
 def check_publisher_connections(publisher, max_retry: int = 5):
     """
     Check whether publisher is operational by checking the number of connections
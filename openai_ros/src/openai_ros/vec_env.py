@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import signal
+import subprocess
+import traceback
+import multiprocessing
+import numpy as np
+import rospy
+import gym
+from gym.vector import VectorEnv
+
+# (package, launch file, args) started within every worker
+DEFAULT_LAUNCH_FILES = [
+    ('indoor_layouts', 'gazebo_world.launch', ['gui:=false']),
+]
+
+def _copy_observation(obs):
+    """
+    Copy the observation, so it does not share buffers reused by the environment
+
+    :param obs: observation (numpy array or dict of numpy arrays)
+    :return copy of the observation
+    """
+    if isinstance(obs, dict):
+        return {key: _copy_observation(value) for key, value in obs.items()}
+    return np.array(obs, copy=True)
+
+def _terminate_handler(signum, frame):
+    """
+    Exit the worker on SIGTERM, so the simulators it launched are stopped too
+    """
+    raise SystemExit(128 + signum)
+
+def _worker(remote, parent_remote, env_id: str, env_kwargs: dict, worker_id: int,
+            ros_port: int, gazebo_port: int, launch_files: list, startup_time_out: float):
+    """
+    Worker process owning a ros master, a gazebo instance and one gym environment
+
+    :param multiprocessing.Connection remote: worker end of the pipe
+           multiprocessing.Connection parent_remote: parent end of the pipe (closed in worker)
+           str env_id: registered gym environment id
+           dict env_kwargs: keyword arguments for gym.make()
+           int worker_id: index of the worker
+           int ros_port: port of the worker's ros master
+           int gazebo_port: port of the worker's gazebo master
+           list launch_files: (package, launch file, args) to roslaunch
+           float startup_time_out: timeout in seconds to wait for ros master
+    """
+    parent_remote.close()
+    # roslaunch runs in its own session, terminating the worker must not orphan it
+    signal.signal(signal.SIGTERM, _terminate_handler)
+
+    # must be set before rospy/gazebo clients are initialized in this process
+    os.environ['ROS_MASTER_URI'] = 'http://localhost:{0}'.format(ros_port)
+    os.environ['GAZEBO_MASTER_URI'] = 'http://localhost:{0}'.format(gazebo_port)
+    # environment plots must not block worker on close
+    os.environ['MPLBACKEND'] = 'Agg'
+
+    launch_processes = []
+    env = None
+    try:
+        for package, launch_file, args in launch_files:
+            command = ['roslaunch', '-p', str(ros_port), package, launch_file] + list(args)
+            launch_processes.append(subprocess.Popen(command, env=os.environ.copy(),
+                                                     stdout=subprocess.DEVNULL,
+                                                     start_new_session=True))
+
+        import rosgraph
+        from openai_ros import utils
+        master = rosgraph.Master('/vec_env_worker_{0}'.format(worker_id))
+        if not utils.wait_for_condition(master.is_online, time_out = startup_time_out,
+                                        poll_interval = 0.1, name = 'ros_master'):
+            raise RuntimeError('ros master on port {0} is not available'.format(ros_port))
+        rospy.init_node('vec_env_worker_{0}'.format(worker_id), disable_signals=True)
+
+        env = gym.make(env_id, **env_kwargs)
+        remote.send(('ready', (env.observation_space, env.action_space)))
+
+        while True:
+            cmd, data = remote.recv()
+            if cmd == 'step':
+                obs, reward, done, info = env.step(data)
+                if done:
+                    # auto reset, final observation of the episode is kept in info
+                    info['terminal_observation'] = _copy_observation(obs)
+                    obs = env.reset()
+                remote.send(('ok', (obs, reward, done, info)))
+            elif cmd == 'reset':
+                remote.send(('ok', env.reset()))
+            elif cmd == 'seed':
+                remote.send(('ok', env.seed(data)))
+            elif cmd == 'close':
+                break
+            else:
+                raise NotImplementedError('unsupported worker command: {0}'.format(cmd))
+    except (KeyboardInterrupt, EOFError, SystemExit):
+        pass
+    except Exception:
+        try:
+            remote.send(('error', traceback.format_exc()))
+        except (BrokenPipeError, EOFError):
+            pass
+    finally:
+        if env is not None:
+            try:
+                env.close()
+            except Exception:
+                pass
+        for launch_process in launch_processes:
+            _stop_process_group(launch_process)
+        remote.close()
+
+def _stop_process_group(process, time_out: float = 10.0):
+    """
+    Stop the process along with its children (roslaunch started in its own session)
+
+    :param subprocess.Popen process: process to be stopped
+           float time_out: timeout in seconds before process is killed
+    """
+    if process.poll() is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGINT)
+        process.wait(timeout = time_out)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+class WorkerError(RuntimeError):
+    """
+        WorkerError is raised when a worker cannot be (re)started
+    """
+    pass
+
+class VecEnv(VectorEnv):
+    """
+        VecEnv class is an implementation of gym vector environment running each
+        environment in its own process with independent ros master and gazebo instance
+    """
+
+    def __init__(self, num_envs: int, env_id: str = 'TurtleBot3Localize-v0', env_kwargs: dict = None,
+                 launch_files: list = None, ros_base_port: int = 11411, gazebo_base_port: int = 11445,
+                 port_stride: int = 1, startup_time_out: float = 120.0, step_time_out: float = 60.0,
+                 max_restarts: int = 3):
+        """
+        Initialize VecEnv class
+
+        :param int num_envs: number of environments (worker processes)
+               str env_id: registered gym environment id
+               dict env_kwargs: keyword arguments for gym.make()
+               list launch_files: (package, launch file, args) to roslaunch in every worker
+               int ros_base_port: ros master port of first worker
+               int gazebo_base_port: gazebo master port of first worker
+               int port_stride: port increment between workers
+               float startup_time_out: timeout in seconds for a worker to become ready
+               float step_time_out: timeout in seconds for a worker to reply to step/reset
+               int max_restarts: maximum number of restarts per worker
+        """
+
+        self._env_id = env_id
+        self._env_kwargs = env_kwargs or {}
+        self._launch_files = launch_files if launch_files is not None else DEFAULT_LAUNCH_FILES
+        self._ports = [(ros_base_port + idx * port_stride, gazebo_base_port + idx * port_stride)
+                       for idx in range(num_envs)]
+        self._startup_time_out = startup_time_out
+        self._step_time_out = step_time_out
+        self._max_restarts = max_restarts
+
+        self.__context = multiprocessing.get_context('spawn')
+        self.__processes = [None] * num_envs
+        self.__remotes = [None] * num_envs
+        self.__restarts = np.zeros(num_envs, dtype=int)
+        self.__actions = None
+        self.__closed = False
+
+        self.__total_steps = 0
+        self.__step_time = 0.0
+        self.__start_time = time.monotonic()
+
+        # start all workers first, then wait for them as simulators take long to launch
+        for idx in range(num_envs):
+            self.__start_worker(idx)
+        spaces = [self.__wait_worker_ready(idx) for idx in range(num_envs)]
+        observation_space, action_space = spaces[0]
+
+        super(VecEnv, self).__init__(num_envs, observation_space, action_space)
+        self.__obs_buffer = np.zeros((num_envs,) + observation_space.shape, dtype=observation_space.dtype)
+
+    def reset_async(self):
+        """
+        Request all workers to reset
+        """
+        for idx in range(self.num_envs):
+            self.__send(idx, 'reset', None)
+
+    def reset_wait(self, **kwargs):
+        """
+        Wait for all workers to reset
+
+        :return numpy.ndarray (stacked observations)
+        """
+        for idx in range(self.num_envs):
+            obs = self.__receive(idx)
+            if obs is None:
+                obs = self.__restart_worker(idx)
+            self.__set_obs(idx, obs)
+        return np.copy(self.__obs_buffer)
+
+    def step_async(self, actions):
+        """
+        Request all workers to execute their action
+
+        :param sequence actions: one action per environment
+        """
+        self.__actions = actions
+        self.__step_start = time.monotonic()
+        for idx in range(self.num_envs):
+            self.__send(idx, 'step', actions[idx])
+
+    def step_wait(self, **kwargs):
+        """
+        Wait for all workers to execute their action, finished environments are
+        reset automatically and their final observation is in info['terminal_observation']
+
+        :return numpy.ndarray (stacked observations), numpy.ndarray (rewards),
+                numpy.ndarray (dones), list (infos)
+        """
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        infos = []
+        for idx in range(self.num_envs):
+            result = self.__receive(idx)
+            if result is None:
+                # worker crashed, restarted worker starts a new episode
+                obs = self.__restart_worker(idx)
+                reward, done, info = 0.0, True, {'worker_restarted': True}
+            else:
+                obs, reward, done, info = result
+            self.__set_obs(idx, obs)
+            rewards[idx] = reward
+            dones[idx] = done
+            infos.append(info)
+
+        self.__total_steps += self.num_envs
+        self.__step_time += time.monotonic() - self.__step_start
+        return np.copy(self.__obs_buffer), rewards, dones, infos
+
+    def seed(self, seeds=None):
+        """
+        Set the random seed value for every environment
+
+        :param int or sequence seeds: seed of first environment (incremented per environment)
+                or one seed per environment
+        """
+        if seeds is None or isinstance(seeds, int):
+            seeds = [None if seeds is None else seeds + idx for idx in range(self.num_envs)]
+        for idx in range(self.num_envs):
+            self.__send(idx, 'seed', seeds[idx])
+        return [self.__receive(idx) for idx in range(self.num_envs)]
+
+    def close_extras(self, **kwargs):
+        """
+        Stop all workers along with their simulators
+        """
+        if self.__closed:
+            return
+        self.__closed = True
+        for idx in range(self.num_envs):
+            self.__stop_worker(idx)
+
+    def get_stats(self):
+        """
+        Gets the aggregate throughput over all environments
+
+        :return dict
+        """
+        elapsed = time.monotonic() - self.__start_time
+        return {
+            'steps': self.__total_steps,
+            'steps_per_sec': self.__total_steps / max(self.__step_time, 1e-9),
+            'wall_steps_per_sec': self.__total_steps / max(elapsed, 1e-9),
+            'restarts': self.__restarts.tolist(),
+        }
+
+    def __start_worker(self, idx: int):
+        """
+        Start the worker process of the environment
+
+        :param int idx: index of the environment
+        """
+        ros_port, gazebo_port = self._ports[idx]
+        parent_remote, remote = self.__context.Pipe()
+        process = self.__context.Process(target=_worker,
+                        args=(remote, parent_remote, self._env_id, self._env_kwargs, idx,
+                              ros_port, gazebo_port, self._launch_files, self._startup_time_out))
+        process.daemon = True
+        process.start()
+        remote.close()
+        self.__processes[idx] = process
+        self.__remotes[idx] = parent_remote
+
+    def __wait_worker_ready(self, idx: int):
+        """
+        Wait until the worker environment is created
+
+        :param int idx: index of the environment
+        :return gym.Space (observation space), gym.Space (action space)
+        """
+        remote = self.__remotes[idx]
+        try:
+            if remote.poll(self._startup_time_out):
+                status, data = remote.recv()
+                if status == 'ready':
+                    return data
+                raise WorkerError('worker {0} failed to start:\n{1}'.format(idx, data))
+        except (EOFError, BrokenPipeError):
+            pass
+        raise WorkerError('worker {0} failed to start'.format(idx))
+
+    def __stop_worker(self, idx: int):
+        """
+        Stop the worker process of the environment
+
+        :param int idx: index of the environment
+        """
+        process = self.__processes[idx]
+        remote = self.__remotes[idx]
+        try:
+            remote.send(('close', None))
+        except (BrokenPipeError, EOFError, OSError):
+            pass
+        process.join(timeout = 30.0)
+        if process.is_alive():
+            # worker handles SIGTERM by closing the environment and its simulators
+            process.terminate()
+            process.join(timeout = 30.0)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        remote.close()
+
+    def __restart_worker(self, idx: int):
+        """
+        Restart the crashed worker and reset its environment
+
+        :param int idx: index of the environment
+        :return observation of the reset environment
+        """
+        if self.__restarts[idx] >= self._max_restarts:
+            raise WorkerError('worker {0} exceeded maximum number of restarts'.format(idx))
+        self.__restarts[idx] += 1
+
+        self.__stop_worker(idx)
+        self.__start_worker(idx)
+        self.__wait_worker_ready(idx)
+        self.__send(idx, 'reset', None)
+        obs = self.__receive(idx)
+        if obs is None:
+            return self.__restart_worker(idx)
+        return obs
+
+    def __send(self, idx: int, cmd: str, data):
+        """
+        Send the command to the worker, failures are detected on receive
+
+        :param int idx: index of the environment
+               str cmd: command name
+               data: command data
+        """
+        try:
+            self.__remotes[idx].send((cmd, data))
+        except (BrokenPipeError, EOFError, OSError):
+            pass
+
+    def __receive(self, idx: int):
+        """
+        Receive the reply of the worker
+
+        :param int idx: index of the environment
+        :return reply data or None if the worker crashed or timed out
+        """
+        remote = self.__remotes[idx]
+        try:
+            if remote.poll(self._step_time_out):
+                status, data = remote.recv()
+                if status == 'ok':
+                    return data
+                # exception raised within the worker environment
+                rospy.logerr('worker %d failed:\n%s', idx, data)
+        except (EOFError, BrokenPipeError, OSError):
+            pass
+        return None
+
+    def __set_obs(self, idx: int, obs):
+        """
+        Copy observation into the stacked observations, variable size observations
+        (eg. particle cloud) are zero padded
+
+        :param int idx: index of the environment
+               obs: observation of the environment
+        """
+        obs = np.asarray(obs).reshape(-1)
+        row = self.__obs_buffer[idx].reshape(-1)
+        count = min(obs.shape[0], row.shape[0])
+        row[:count] = obs[:count]
+        row[count:] = 0
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+import sys
+def set_path(path: str):
+    try:
+        sys.path.index(path)
+    except ValueError:
+        sys.path.insert(0, path)
+
+# set programatically the path to 'openai_ros' directory (alternately can also set PYTHONPATH)
+set_path('/media/suresh/research/awesome-robotics/active-slam/catkin_ws/src/openai-rosbot-env/openai_ros/src')
+
+import rospy
+from rosgraph_msgs.msg import Clock
+from geometry_msgs.msg import Twist
+from std_srvs.srv import Empty, EmptyResponse
+from gazebo_msgs.srv import GetPhysicsProperties, GetPhysicsPropertiesResponse
+from openai_ros.srv import StepWorld, StepWorldResponse
+import threading
+import time
+
+class WorldControlServer():
+    """
+        WorldControlServer class is an implementation of the /gazebo/step_world service
+        used by lock-step mode of the environment
+
+        Stand-in world without gazebo for testing, owns the simulation clock and also
+        serves pause/unpause and physics properties services. With gazebo the service is
+        served in-process by the step world plugin (libopenai_ros_step_world.so)
+    """
+
+    def __init__(self, mode: str = 'STANDALONE', time_step: float = 0.001,
+                 real_time_factor: float = 1.0, time_out: float = 10.0):
+        """
+        Initialize WorldControlServer class
+
+        :param str mode: possible values are: ['STANDALONE'] (gazebo is stepped by the plugin)
+               float time_step: simulation time (in seconds) of one physics iteration
+               float real_time_factor: simulation speed while unpaused
+               float time_out: timeout in seconds to wait for the subscriber of velocity command
+        """
+        super(WorldControlServer, self).__init__()
+
+        self._mode = mode
+        self._time_step = time_step
+        self._real_time_factor = real_time_factor
+        self._time_out = time_out
+
+        self.__condition = threading.Condition()
+        self.__iterations = 0
+        self.__sim_time = rospy.Time()
+        self.__is_paused = True
+        # cmd_vel topic => publisher of velocity commands sent along with step requests
+        self.__cmd_vel_pubs = {}
+
+        if self._mode == 'GAZEBO':
+            # stepping through an external process (or /clock) per step is too slow and racy
+            raise ValueError('gazebo world is stepped by the step world plugin, load '
+                             'libopenai_ros_step_world.so within the world file instead')
+        elif self._mode != 'STANDALONE':
+            raise ValueError('unsupported world control mode: {0}'.format(mode))
+
+        self.__clock_pub = rospy.Publisher('/clock', Clock, queue_size = 10)
+        rospy.Service('/gazebo/pause_physics', Empty, self.__pause_physics)
+        rospy.Service('/gazebo/unpause_physics', Empty, self.__unpause_physics)
+        rospy.Service('/gazebo/get_physics_properties', GetPhysicsProperties,
+                      self.__get_physics_properties)
+        self.__publish_clock()
+        clock_thread = threading.Thread(target=self.__run_clock)
+        clock_thread.daemon = True
+        clock_thread.start()
+
+        rospy.Service('/gazebo/step_world', StepWorld, self.__step_world)
+        rospy.loginfo('status: world control server (%s) is ready', self._mode)
+
+    def __step_world(self, request):
+        """
+        This function is called when /gazebo/step_world service is requested
+
+        :param openai_ros.srv.StepWorldRequest request: number of physics iterations
+        :return openai_ros.srv.StepWorldResponse
+        """
+
+        response = StepWorldResponse()
+        with self.__condition:
+            if not self.__is_paused:
+                response.success = False
+                response.status_message = 'world must be paused to be stepped'
+                response.sim_time = self.__sim_time
+                return response
+        if not self.__send_cmd_vel(request):
+            response.success = False
+            response.status_message = 'no subscriber of {0}'.format(request.cmd_vel_topic)
+            return response
+        with self.__condition:
+            self.__advance(request.iterations)
+            response.sim_time = self.__sim_time
+        self.__publish_clock()
+        response.success = True
+        return response
+
+    def __send_cmd_vel(self, request):
+        """
+        Publish the velocity command of the step request before the world is advanced,
+        publisher is synchronous (no outgoing queue) and waits for its subscribers
+
+        :param openai_ros.srv.StepWorldRequest request: step request
+        :return bool (whether the command is sent or there is none)
+        """
+
+        if not request.cmd_vel_topic:
+            return True
+        publisher = self.__cmd_vel_pubs.get(request.cmd_vel_topic)
+        if publisher is None:
+            publisher = rospy.Publisher(request.cmd_vel_topic, Twist, queue_size = None)
+            self.__cmd_vel_pubs[request.cmd_vel_topic] = publisher
+        deadline = time.monotonic() + self._time_out
+        while publisher.get_num_connections() == 0:
+            if time.monotonic() > deadline or rospy.is_shutdown():
+                return False
+            time.sleep(0.01)
+        publisher.publish(request.cmd_vel)
+        return True
+
+    def __advance(self, iterations: int):
+        """
+        Advance the standalone simulation clock (caller holds the condition)
+
+        :param int iterations: number of physics iterations
+        """
+        self.__iterations += iterations
+        self.__sim_time = rospy.Time.from_sec(self.__iterations * self._time_step)
+
+    def __publish_clock(self):
+        """
+        Publish the standalone simulation clock
+        """
+        with self.__condition:
+            sim_time = self.__sim_time
+        self.__clock_pub.publish(Clock(clock = sim_time))
+
+    def __run_clock(self):
+        """
+        Advance the standalone simulation clock while unpaused
+        """
+        period = 0.01
+        while not rospy.is_shutdown():
+            time.sleep(period)
+            with self.__condition:
+                if self.__is_paused:
+                    continue
+                self.__advance(max(int(round(period * self._real_time_factor / self._time_step)), 1))
+            self.__publish_clock()
+
+    def __pause_physics(self, request):
+        """
+        This function is called when /gazebo/pause_physics service is requested
+        """
+        with self.__condition:
+            self.__is_paused = True
+        return EmptyResponse()
+
+    def __unpause_physics(self, request):
+        """
+        This function is called when /gazebo/unpause_physics service is requested
+        """
+        with self.__condition:
+            self.__is_paused = False
+        return EmptyResponse()
+
+    def __get_physics_properties(self, request):
+        """
+        This function is called when /gazebo/get_physics_properties service is requested
+        """
+        response = GetPhysicsPropertiesResponse()
+        response.time_step = self._time_step
+        response.pause = self.__is_paused
+        response.max_update_rate = self._real_time_factor / self._time_step
+        response.success = True
+        return response
+
+if __name__ == '__main__':
+    rospy.init_node('world_control_server')
+
+    mode = rospy.get_param('~mode', 'STANDALONE')
+    time_step = rospy.get_param('~time_step', 0.001)
+    real_time_factor = rospy.get_param('~real_time_factor', 1.0)
+    server = WorldControlServer(mode = mode, time_step = time_step, real_time_factor = real_time_factor)
+
+    # prevent the code from exiting until an shutdown signal (ctrl+c) is received
+    rospy.spin()
@@ -0,0 +1,173 @@
+/*
+ * StepWorldPlugin serves /gazebo/step_world (openai_ros/StepWorld) from within gazebo,
+ * used by lock-step mode of the environment
+ *
+ * The velocity command of the request is published in-process to the drive plugin, the
+ * step waits until the command is received in-process (intra process delivery is done
+ * within publish(), a loopback subscriber of the plugin confirms it) and then advances
+ * the paused world by exact number of physics iterations (World::Step blocks until they
+ * are done), so no external process or /clock round trip is involved per step
+ *
+ * Load it within the <world> of the world file:
+ *   <plugin name="step_world" filename="libopenai_ros_step_world.so"/>
+ */
+
+#include <chrono>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <thread>
+
+#include <gazebo/common/Plugin.hh>
+#include <gazebo/physics/World.hh>
+#include <geometry_msgs/Twist.h>
+#include <openai_ros/StepWorld.h>
+#include <ros/callback_queue.h>
+#include <ros/ros.h>
+#include <ros/topic_manager.h>
+
+namespace openai_ros
+{
+
+class StepWorldPlugin : public gazebo::WorldPlugin
+{
+public:
+  ~StepWorldPlugin() override
+  {
+    queue_.disable();
+    if (nh_)
+      nh_->shutdown();
+    if (cmd_vel_nh_)
+      cmd_vel_nh_->shutdown();
+    if (queue_thread_.joinable())
+      queue_thread_.join();
+  }
+
+  void Load(gazebo::physics::WorldPtr world, sdf::ElementPtr sdf) override
+  {
+    if (!ros::isInitialized())
+    {
+      ROS_FATAL_STREAM("ros is not initialized, load the plugin along with libgazebo_ros_api_plugin.so");
+      return;
+    }
+
+    world_ = world;
+    // timeout in seconds to wait for the drive plugin to subscribe to the velocity command
+    time_out_ = sdf->HasElement("timeOut") ? sdf->Get<double>("timeOut") : 10.0;
+
+    nh_.reset(new ros::NodeHandle("gazebo"));
+    nh_->setCallbackQueue(&queue_);
+    cmd_vel_nh_.reset(new ros::NodeHandle("gazebo"));
+    cmd_vel_nh_->setCallbackQueue(&cmd_vel_queue_);
+    service_ = nh_->advertiseService("step_world", &StepWorldPlugin::stepWorld, this);
+    queue_thread_ = std::thread(&StepWorldPlugin::queueThread, this);
+    ROS_INFO_STREAM("status: step world plugin is ready");
+  }
+
+private:
+  bool stepWorld(openai_ros::StepWorld::Request& request, openai_ros::StepWorld::Response& response)
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (!world_->IsPaused())
+    {
+      response.success = false;
+      response.status_message = "world must be paused to be stepped";
+      response.sim_time = simTime();
+      return true;
+    }
+
+    if (!request.cmd_vel_topic.empty() && !sendCmdVel(request.cmd_vel_topic, request.cmd_vel))
+    {
+      response.success = false;
+      response.status_message = "no subscriber of " + request.cmd_vel_topic;
+      response.sim_time = simTime();
+      return true;
+    }
+
+    // blocks until the world is advanced by the iterations, world remains paused
+    const uint64_t target_iterations = world_->Iterations() + request.iterations;
+    world_->Step(request.iterations);
+
+    response.sim_time = simTime();
+    response.success = world_->Iterations() >= target_iterations;
+    if (!response.success)
+      response.status_message = "gazebo world was not advanced";
+    return true;
+  }
+
+  bool sendCmdVel(const std::string& topic_name, const geometry_msgs::Twist& cmd_vel)
+  {
+    CmdVelLink& link = cmd_vel_links_[topic_name];
+    if (!link.publisher)
+    {
+      link.publisher = nh_->advertise<geometry_msgs::Twist>(topic_name, 1);
+      // loopback subscriber within gazebo, its callbacks are only called from sendCmdVel()
+      link.received.reset(new uint64_t(0));
+      std::shared_ptr<uint64_t> received = link.received;
+      link.subscriber = cmd_vel_nh_->subscribe<geometry_msgs::Twist>(
+          topic_name, 1, [received](const geometry_msgs::Twist::ConstPtr&) { ++(*received); });
+    }
+
+    // in-process subscriber callbacks of the topic: drive plugin and the loopback subscriber
+    const std::string resolved_name = nh_->resolveName(topic_name);
+    const auto deadline = std::chrono::steady_clock::now() + std::chrono::duration<double>(time_out_);
+    while (ros::TopicManager::instance()->getNumSubscribers(resolved_name) < 2)
+    {
+      if (std::chrono::steady_clock::now() > deadline || !ros::ok())
+        return false;
+      std::this_thread::sleep_for(std::chrono::milliseconds(10));
+    }
+
+    // drop stale loopback messages, so only receipt of this command is counted
+    cmd_vel_queue_.callAvailable();
+    const uint64_t expected = *link.received + 1;
+    link.publisher.publish(cmd_vel);
+    // intra process messages are queued to every in-process subscriber within publish(),
+    // receipt by the loopback subscriber confirms the command is delivered to the drive plugin
+    while (*link.received < expected)
+    {
+      if (std::chrono::steady_clock::now() > deadline || !ros::ok())
+        return false;
+      cmd_vel_queue_.callAvailable(ros::WallDuration(0.001));
+    }
+    return true;
+  }
+
+  ros::Time simTime() const
+  {
+    const gazebo::common::Time sim_time = world_->SimTime();
+    return ros::Time(sim_time.sec, sim_time.nsec);
+  }
+
+  void queueThread()
+  {
+    while (nh_->ok())
+      queue_.callAvailable(ros::WallDuration(0.01));
+  }
+
+  gazebo::physics::WorldPtr world_;
+  double time_out_ = 10.0;
+  std::unique_ptr<ros::NodeHandle> nh_;
+  ros::CallbackQueue queue_;
+  std::thread queue_thread_;
+  ros::ServiceServer service_;
+  struct CmdVelLink
+  {
+    ros::Publisher publisher;
+    ros::Subscriber subscriber;
+    // number of commands received by the loopback subscriber
+    std::shared_ptr<uint64_t> received;
+  };
+
+  // cmd_vel topic => publisher (and loopback subscriber) of velocity commands sent along with step requests
+  std::map<std::string, CmdVelLink> cmd_vel_links_;
+  // loopback subscribers are served only from the step request, never by a spinner
+  std::unique_ptr<ros::NodeHandle> cmd_vel_nh_;
+  ros::CallbackQueue cmd_vel_queue_;
+  std::mutex mutex_;
+};
+
+GZ_REGISTER_WORLD_PLUGIN(StepWorldPlugin)
+
+}  // namespace openai_ros